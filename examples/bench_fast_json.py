@@ -0,0 +1,107 @@
+"""
+Benchmark the fast_json callback serializer against dash's default encoder on figures and tables.
+
+    python examples/bench_fast_json.py [point count]
+
+Each case times a full /_dash-update-component request through the flask test client, so the numbers include dash's
+response handling, for a plain dash_helper callback, fast_json=True and fast_json='cache' (unchanged output).
+"""
+import os
+import sys
+import time
+
+SRC_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.append(SRC_PATH)
+
+DEFAULT_POINT_COUNT = 500000
+REPEAT = 5
+
+
+def build_outputs(points):
+    import numpy as np
+    import pandas as pd
+    import plotly.graph_objects as go
+
+    rng = np.random.default_rng(0)
+    times = pd.date_range('2024-01-01', periods=points, freq='s')
+    line = go.Figure(go.Scattergl(x=times, y=rng.standard_normal(points).cumsum()))
+
+    heatmap = go.Figure(go.Heatmap(z=rng.random((1000, 500))))
+
+    rows = points // 5
+    table = pd.DataFrame({
+        'time': pd.date_range('2024-01-01', periods=rows, freq='min'),
+        'value': rng.random(rows),
+        'count': rng.integers(0, 1000, rows),
+        'name': rng.choice(['alpha', 'beta', 'gamma'], rows),
+    }).to_dict('records')
+
+    return {
+        f'line figure ({points:,} points)': ('figure', line),
+        'heatmap figure (1000 x 500)': ('figure', heatmap),
+        f'table records ({rows:,} rows)': ('data', table),
+    }
+
+
+def build_app(prop, value, fast_json):
+    import dash
+    from dash import dcc, html, dash_table, Input, Output
+    from dash_helper import dash_helper
+
+    app = dash.Dash(__name__)
+    output = dcc.Graph(id='output') if prop == 'figure' else dash_table.DataTable(id='output')
+    app.layout = html.Div([html.Button(id='button'), output])
+
+    @dash_helper(Output('output', prop), Input('button', 'n_clicks'), app=app, callback_name='bench',
+                 fast_json=fast_json)
+    def update(dh):
+        dh.set('output', value, property_id=prop)
+
+    return app
+
+
+def measure(prop, value, fast_json):
+    """Best request time (seconds) and response size (bytes)."""
+    app = build_app(prop, value, fast_json)
+    client = app.server.test_client()
+    body = {
+        'output': f'output.{prop}',
+        'outputs': {'id': 'output', 'property': prop},
+        'inputs': [{'id': 'button', 'property': 'n_clicks', 'value': 1}],
+        'changedPropIds': ['button.n_clicks'],
+    }
+    best = None
+    size = 0
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        response = client.post('/_dash-update-component', json=body)
+        elapsed = time.perf_counter() - start
+        if response.status_code != 200:
+            raise RuntimeError(f"request failed with {response.status_code}")
+        size = len(response.get_data())
+        best = elapsed if best is None else min(best, elapsed)
+    return best, size
+
+
+def main():
+    import logging
+
+    from dash_helper import get_callback_registry
+
+    logging.getLogger('dash_helper').setLevel(logging.WARNING)
+    points = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_POINT_COUNT
+
+    for label, (prop, value) in build_outputs(points).items():
+        print(label)
+        baseline = None
+        for mode in (False, True, 'cache'):
+            get_callback_registry().clear()
+            elapsed, size = measure(prop, value, mode)
+            baseline = baseline or elapsed
+            name = {False: 'dash encoder', True: 'fast_json', 'cache': 'fast_json cache'}[mode]
+            print(f"    {name:16} {elapsed * 1000:8.1f} ms  {size / 1024 / 1024:6.1f} MB  "
+                  f"x{baseline / elapsed:.1f}")
+
+
+if __name__ == "__main__":
+    main()
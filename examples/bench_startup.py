@@ -0,0 +1,82 @@
+"""
+Benchmark dash_helper import and callback registration time for an app with many callbacks.
+
+    python examples/bench_startup.py [callback count]
+
+The import time is the median of IMPORT_RUNS fresh interpreters with dash already imported and the dash_helper
+bytecode compiled beforehand, so a stale __pycache__ (compiling the sources) does not count.
+"""
+import compileall
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+SRC_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.append(SRC_PATH)
+
+DEFAULT_CALLBACK_COUNT = 300
+IMPORT_RUNS = 15
+
+
+def measure_import():
+    """Import time of dash_helper in a fresh interpreter, with dash already imported so only dash_helper is counted."""
+    code = ("import sys, time; sys.path.append(%r); import dash; start = time.perf_counter(); import dash_helper; "
+            "print(time.perf_counter() - start)" % SRC_PATH)
+    result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def build_app(count):
+    import dash
+    from dash import html
+
+    app = dash.Dash(__name__)
+    app.layout = html.Div([
+        html.Div([html.Button(id=f'button-{idx}'), html.Div(id=f'output-{idx}')]) for idx in range(count)
+    ])
+    return app
+
+
+def update_output(dh):
+    return dh.trigger_count
+
+
+def measure_registration(count, debug=False):
+    from dash import Input, Output
+    from dash_helper import dash_helper, dash_helper_register, get_callback_registry
+
+    app = build_app(count)
+    get_callback_registry().clear()
+
+    start = time.perf_counter()
+    for idx in range(count // 2):
+        dash_helper_register(Output(f'output-{idx}', 'children'), Input(f'button-{idx}', 'n_clicks'),
+                             func=update_output, app=app, callback_name=f'cb{idx}', debug=debug)
+    for idx in range(count // 2, count):
+        @dash_helper(Output(f'output-{idx}', 'children'), Input(f'button-{idx}', 'n_clicks'),
+                     app=app, callback_name=f'cb{idx}', debug=debug)
+        def decorated(dh):
+            return dh.trigger_count
+    return time.perf_counter() - start
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_CALLBACK_COUNT
+
+    compileall.compile_dir(SRC_PATH, quiet=1)
+    import_times = [measure_import() for _ in range(IMPORT_RUNS)]
+    print(f"import dash_helper: median {statistics.median(import_times) * 1000:.1f} ms "
+          f"(min {min(import_times) * 1000:.1f} ms, {IMPORT_RUNS} runs)")
+
+    registration_time = measure_registration(count)
+    print(f"register {count} callbacks: {registration_time * 1000:.1f} ms "
+          f"({registration_time / count * 1e6:.0f} us per callback)")
+
+    registration_time = measure_registration(count, debug=True)
+    print(f"register {count} callbacks (debug=True, INFO logging disabled): {registration_time * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
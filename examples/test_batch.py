@@ -0,0 +1,33 @@
+"""
+Test batch runs of registered callbacks
+"""
+
+import os
+import sys
+import dash
+from dash import html
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+from dash_helper import dash_helper, Input, Output, BatchExecutor
+
+
+app = dash.Dash(__name__)
+app.layout = html.Div([html.Button(id='btn1'), html.Button(id='btn2'), html.Div(id='out')])
+
+
+@dash_helper(Output('out', 'children'), Input('btn1', 'n_clicks'), Input('btn2', 'n_clicks'), app=app,
+             callback_name='batch_trigger')
+def report_trigger(dh):
+    return f"{dh.trigger_id}:{dh['btn1']}"
+
+
+def test_trigger_in_processes():
+    executor = BatchExecutor.from_registration(f"{__name__}:batch_trigger", trigger='btn2.n_clicks')
+    rows = [{'btn1': idx, 'btn2': 0} for idx in range(4)]
+    in_process = executor.run(rows)
+    pooled = executor.run(rows, processes=2, chunk_size=2)
+    assert in_process['out.children'] == ['btn2:0', 'btn2:1', 'btn2:2', 'btn2:3']
+    assert pooled['out.children'] == in_process['out.children']
+
+
+if __name__ == "__main__":
+    test_trigger_in_processes()
@@ -0,0 +1,60 @@
+"""
+Test blob store defaults and eviction
+"""
+
+import multiprocessing
+import os
+import stat
+import sys
+import time
+import pytest
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+from dash_helper import BlobStore, FileBlobStore, MemoryBlobStore, get_blob_store
+
+
+def put_value(queue):
+    queue.put(get_blob_store().put({'rows': list(range(100))}))
+
+
+def test_default_store_is_shared_by_processes():
+    assert isinstance(get_blob_store(), FileBlobStore)
+    queue = multiprocessing.Queue()
+    worker = multiprocessing.Process(target=put_value, args=(queue,))
+    worker.start()
+    ref = queue.get(timeout=10)
+    worker.join()
+    assert get_blob_store().get(ref) == {'rows': list(range(100))}
+
+
+def test_memory_store_expires_oldest():
+    store = MemoryBlobStore(ttl=0.05)
+    old = store.put('old')
+    time.sleep(0.1)
+    new = store.put('new')
+    assert not store.contains(old)
+    assert store.get(new) == 'new'
+
+
+def test_file_store_private_directory(tmp_path):
+    store = FileBlobStore(tmp_path / 'blobs')
+    assert stat.S_IMODE(os.stat(store.directory).st_mode) & 0o077 == 0
+
+    shared = tmp_path / 'shared'
+    shared.mkdir()
+    os.chmod(shared, 0o777)
+    with pytest.raises(ValueError, match='refusing'):
+        FileBlobStore(shared)
+
+
+def test_incomplete_store():
+    class WriteOnly(BlobStore):
+        def _write(self, key, kind, data):
+            pass
+
+    with pytest.raises(TypeError, match='_read'):
+        WriteOnly()
+
+
+if __name__ == "__main__":
+    test_default_store_is_shared_by_processes()
+    test_memory_store_expires_oldest()
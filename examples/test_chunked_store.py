@@ -0,0 +1,84 @@
+"""
+Test chunked dcc.Store writes in standalone mode
+"""
+
+import os
+import sys
+import dash
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+from dash_helper import DashHelper, Input, State, Output, chunked_data, chunked_value
+from dash_helper.session_cache import get_session_cache_backend
+
+
+def run(store_state=None):
+    """DashHelper of a callback writing the 'log' store, with its data as a State when store_state is given"""
+    states = [State('log', 'data')] if store_state is not None else []
+    values = [1] + ([store_state] if store_state is not None else [])
+    return DashHelper([Input('poll', 'n_intervals')], states, [Output('log', 'data')], values,
+                      callback_name='log', standalone_mode=True)
+
+
+def apply_patch(data, patch):
+    """Apply the dash.Patch operations used by chunked stores to a browser value"""
+    data = {**data, 'chunks': [list(x) for x in data['chunks']]}
+    for operation in patch.to_plotly_json()['operations']:
+        location, params = operation['location'], operation['params']
+        target = data
+        for key in location[:-1]:
+            target = target[key]
+        if operation['operation'] == 'Assign':
+            target[location[-1]] = params['value']
+        elif operation['operation'] == 'Append':
+            target[location[-1]].append(params['value'])
+        elif operation['operation'] == 'Extend':
+            target[location[-1]].extend(params['value'])
+        elif operation['operation'] == 'Delete':
+            del target[location[-1]]
+    return data
+
+
+def test_append_patch():
+    get_session_cache_backend().clear()
+    dh = run(chunked_data(chunk_size=4))
+    dh.chunked_store('log', chunk_size=4).append(range(6))
+    browser = apply_patch(chunked_data(chunk_size=4), dh.return_value)
+
+    dh = run()
+    store = dh.chunked_store('log')
+    store.append([6, 7])
+    store.append([8])
+    operations = dh.return_value.to_plotly_json()['operations']
+    assert [x['operation'] for x in operations if x['location'][0] == 'chunks'] == ['Extend', 'Append']
+    browser = apply_patch(browser, dh.return_value)
+    assert chunked_value(browser) == list(range(9))
+    assert browser['version'] == 3
+
+
+def test_evicted_copy():
+    get_session_cache_backend().clear()
+    dh = run(chunked_data(chunk_size=4))
+    dh.chunked_store('log', chunk_size=4).append(range(10))
+    browser = apply_patch(chunked_data(chunk_size=4), dh.return_value)
+
+    # the server copy is gone and the data is not a State: only chunks are added, the browser value is kept
+    get_session_cache_backend().clear()
+    dh = run()
+    assert dh.chunked_store('log', chunk_size=4).append([99]) is None
+    assert isinstance(dh.return_value, dash.Patch)
+    browser = apply_patch(browser, dh.return_value)
+    assert chunked_value(browser) == list(range(10)) + [99]
+    assert browser['resync'] is True
+
+    # the next callback with the data as a State rebuilds the copy and clears the flag
+    dh = run(browser)
+    store = dh.chunked_store('log', chunk_size=4)
+    assert store.value == list(range(10)) + [99]
+    store.append([100])
+    browser = apply_patch(browser, dh.return_value)
+    assert chunked_value(browser) == list(range(10)) + [99, 100]
+    assert browser['resync'] is False
+
+
+if __name__ == "__main__":
+    test_append_patch()
+    test_evicted_copy()
@@ -0,0 +1,59 @@
+"""
+Test callbacks promoted to clientside callbacks
+"""
+
+import os
+import sys
+import dash
+import pytest
+from dash import html
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+from dash_helper import dash_helper_clientside, Input, State, Output, Passthrough, Lookup, Toggle, TRIGGER, \
+    ChainExecutor, DashHelperGen
+from dash_helper.clientside import Mapping
+
+
+def test_mappings():
+    app = dash.Dash(__name__)
+    app.layout = html.Div([html.Button(id='open'), html.Button(id='close'), html.Div(id='modal'),
+                           html.Div(id='name'), html.Div(id='panel'), html.Div(id='echo')])
+
+    panel = dash_helper_clientside(Output('panel', 'style'), Output('echo', 'children'),
+                                   Input('open', 'n_clicks'), State('name', 'children'), app=app,
+                                   callback_name='panel',
+                                   mapping=[Toggle({'display': 'block'}, {'display': 'none'}, odd=True),
+                                            Passthrough('name')])
+    modal = dash_helper_clientside(Output('modal', 'children'), Input('open', 'n_clicks'),
+                                   Input('close', 'n_clicks'), app=app, callback_name='modal',
+                                   mapping=Lookup({'open': 'shown', 'close': 'hidden'}, source=TRIGGER))
+
+    assert panel.js.startswith('function(a0, a1)') and 'window.dash_clientside' in modal.js
+
+    dh = DashHelperGen(Output('panel', 'style'), Output('echo', 'children'),
+                       Input('open', 'n_clicks', value=3), State('name', 'children', value='Ada'),
+                       callback_name='panel').dh_obj
+    assert panel(dh) == ({'display': 'block'}, 'Ada')
+
+    # the python version also runs in offline chains
+    result = ChainExecutor(app=app).run({'name.children': 'Ada', 'open.n_clicks': 1}, trigger='close.n_clicks',
+                                        changes={'close.n_clicks': 1})
+    assert result['modal.children'] == 'hidden' and 'panel.style' not in result.state
+
+
+def test_invalid_mapping():
+    app = dash.Dash(__name__)
+    with pytest.raises(ValueError, match='2 mappings found for 1 outputs'):
+        dash_helper_clientside(Output('a', 'children'), Input('b', 'value'), app=app,
+                               mapping=[Passthrough(), Passthrough()])
+    with pytest.raises(ValueError, match='not an Input or State'):
+        dash_helper_clientside(Output('a', 'children'), Input('b', 'value'), app=app,
+                               mapping=Passthrough('missing'))
+
+
+def test_incomplete_mapping():
+    class JsOnly(Mapping):
+        def js(self, arg):
+            return arg
+
+    with pytest.raises(TypeError, match='apply'):
+        JsOnly()
@@ -0,0 +1,58 @@
+"""
+Test that every callback invocation gets its own correlation id
+"""
+
+import os
+import sys
+import dash
+from dash import html
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+from dash_helper import dash_helper, Input, Output, get_uuid, set_uuid
+
+
+def test_fresh_id_per_invocation():
+    app = dash.Dash(__name__)
+    app.layout = html.Div([html.Button(id='btn'), html.Div(id='out')])
+
+    @dash_helper(Output('out', 'children'), Input('btn', 'n_clicks'), app=app, callback_name='correlation')
+    def show_id(dh):
+        return get_uuid()
+
+    client = app.server.test_client()
+    body = {
+        'output': 'out.children',
+        'outputs': {'id': 'out', 'property': 'children'},
+        'inputs': [{'id': 'btn', 'property': 'n_clicks', 'value': 1}],
+        'changedPropIds': ['btn.n_clicks'],
+    }
+    set_uuid('outer')
+    ids = [client.post('/_dash-update-component', json=body).get_json()['response']['out']['children']
+           for _ in range(2)]
+    assert ids[0] and ids[1] and ids[0] != ids[1]
+    assert 'outer' not in ids
+    assert get_uuid() == 'outer'
+
+
+def test_registration_keeps_id():
+    set_uuid('mine')
+    app = dash.Dash(__name__)
+    layout_ids = []
+
+    def layout():
+        layout_ids.append(get_uuid())
+        return html.Div([html.Button(id='btn'), html.Div(id='out')])
+
+    app.layout = layout
+
+    @dash_helper(Output('out', 'children'), Input('btn', 'n_clicks'), app=app, callback_name='correlation_layout',
+                 layout=layout)
+    def show_id(dh):
+        return get_uuid()
+
+    assert layout_ids and set(layout_ids) == {'mine'}
+    assert get_uuid() == 'mine'
+
+
+if __name__ == "__main__":
+    test_fresh_id_per_invocation()
+    test_registration_keeps_id()
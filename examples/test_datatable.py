@@ -0,0 +1,37 @@
+"""
+Test DataTable filter_query parsing and evaluation
+"""
+
+import os
+import sys
+import pandas as pd
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+from dash_helper import TableDataset, parse_filter_query
+
+
+def test_operator_prefixes():
+    assert parse_filter_query('{name} i= "ALPHA"') == (('name', 'ieq', 'ALPHA'),)
+    assert parse_filter_query('{count} s> 3 && {name} ine beta') == (('count', 'gt', 3), ('name', 'ine', 'beta'))
+    assert parse_filter_query('{name} scontains al') == (('name', 'contains', 'al'),)
+
+
+def test_quoted_operators():
+    assert parse_filter_query('{name} contains "x && y" && {count} < 5') == \
+        (('name', 'contains', 'x && y'), ('count', 'lt', 5))
+    assert parse_filter_query("{name} = 'a || b'") == (('name', 'eq', 'a || b'),)
+
+
+def test_case_insensitive_rows():
+    dataset = TableDataset(pd.DataFrame({'name': ['Alpha', 'alpha', 'Beta', 'x && y'], 'count': [1, 2, 3, 4]}))
+    records, _, row_count = dataset.page(filter_query='{name} ieq ALPHA', page_size=10)
+    assert row_count == 2
+    records, _, row_count = dataset.page(filter_query='{name} eq alpha', page_size=10)
+    assert [x['count'] for x in records] == [2]
+    records, _, row_count = dataset.page(filter_query='{name} contains "x && y"', page_size=10)
+    assert [x['count'] for x in records] == [4]
+
+
+if __name__ == "__main__":
+    test_operator_prefixes()
+    test_quoted_operators()
+    test_case_insensitive_rows()
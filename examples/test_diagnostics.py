@@ -0,0 +1,34 @@
+"""
+Test access to the diagnostics page
+"""
+
+import os
+import sys
+import dash
+from dash import html
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+from dash_helper import register_diagnostics_route
+
+
+def build_app(**kwargs):
+    app = dash.Dash(__name__)
+    app.layout = html.Div()
+    register_diagnostics_route(app, **kwargs)
+    return app
+
+
+def test_denied_without_authorize():
+    app = build_app()
+    assert app.server.test_client().get('/_dash_helper?format=json').status_code == 403
+    app.server.debug = True
+    assert app.server.test_client().get('/_dash_helper?format=json').status_code == 200
+
+
+def test_authorize():
+    assert build_app(authorize=lambda: False).server.test_client().get('/_dash_helper').status_code == 403
+    assert build_app(authorize=lambda: True).server.test_client().get('/_dash_helper').status_code == 200
+
+
+if __name__ == "__main__":
+    test_denied_without_authorize()
+    test_authorize()
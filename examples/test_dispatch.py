@@ -0,0 +1,81 @@
+"""
+Test routing a callback to per trigger handlers
+"""
+
+import os
+import sys
+import dash
+import pytest
+from dash import html, ALL
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+from dash_helper import dash_helper_dispatch, Input, Output, get_metrics_registry
+
+
+def make_dispatcher(with_default=True):
+    app = dash.Dash(__name__)
+    app.layout = html.Div([html.Button(id='btn1'), html.Button(id='btn2'), html.Div(id='out')]
+                          + [html.Button(id={'type': 'row', 'index': idx}) for idx in range(2)])
+    cb = dash_helper_dispatch(Output('out', 'children'), Input('btn1', 'n_clicks'), Input('btn2', 'n_clicks'),
+                              Input({'type': 'row', 'index': ALL}, 'n_clicks'), app=app,
+                              callback_name='dispatch_buttons')
+
+    @cb.on('btn1')
+    def on_btn1(dh):
+        return f"btn1 {dh['btn1']}"
+
+    @cb.on('btn2', 'n_clicks', name='second')
+    def on_btn2(dh):
+        return f"btn2 {dh['btn2']}"
+
+    @cb.on({'type': 'row'})
+    def on_row(dh):
+        return f"row {dh.trigger_idx}"
+
+    if with_default:
+        @cb.default
+        def initial(dh):
+            return 'initial'
+
+    return cb
+
+
+def run(cb, prop_id=None, value=1):
+    triggered = [{'prop_id': prop_id, 'value': value}] if prop_id else None
+    dh = cb.registration.run_standalone([3, 4, [5, 6]], triggered)
+    return dh.return_value
+
+
+def test_routes():
+    cb = make_dispatcher()
+    assert cb.routes == {('btn1', None): 'on_btn1', ('btn2', 'n_clicks'): 'second', ('row', None): 'on_row'}
+    assert run(cb, 'btn1.n_clicks') == 'btn1 3'
+    assert run(cb, 'btn2.n_clicks') == 'btn2 4'
+    assert run(cb, '{"index":1,"type":"row"}.n_clicks') == 'row 1'
+    assert run(cb) == 'initial'
+
+
+def test_no_default():
+    cb = make_dispatcher(with_default=False)
+    # without a default handler an unrouted trigger (here the initial call) leaves the outputs unchanged
+    assert cb.route(cb.registration.run_standalone([3, 4, [5, 6]], None)) is None
+    assert run(cb) is dash.no_update
+
+
+def test_handler_metrics():
+    cb = make_dispatcher()
+    run(cb, 'btn1.n_clicks')
+    run(cb, 'btn1.n_clicks')
+    run(cb, 'btn2.n_clicks')
+    metrics = get_metrics_registry()
+    assert metrics.callback(f"{cb.registration.name}[on_btn1]").counters['calls'] == 2
+    assert metrics.callback(f"{cb.registration.name}[second]").counters['calls'] == 1
+
+
+def test_invalid_routes():
+    cb = make_dispatcher()
+    with pytest.raises(ValueError, match='already has handler'):
+        cb.on('btn1')(lambda dh: None)
+    with pytest.raises(ValueError, match="Unable to find 'type'"):
+        cb.on({'index': 1})
+    with pytest.raises(ValueError, match="must be a 'str' or 'dict'"):
+        cb.on(1)
@@ -0,0 +1,44 @@
+"""
+Test figure downsampling keeps the full resolution figure for later zooms
+"""
+
+import os
+import sys
+import numpy as np
+import plotly.graph_objects as go
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+from dash_helper import downsample_figure
+
+POINTS = 100000
+
+
+def build_figures():
+    x = np.arange(POINTS, dtype=np.float64)
+    y = np.sin(x / 500.0)
+    return [go.Figure(go.Scattergl(x=x, y=y)), {'data': [{'type': 'scatter', 'x': x, 'y': y}], 'layout': {}}]
+
+
+def trace_xy(fig):
+    trace = fig['data'][0] if isinstance(fig, dict) else fig.data[0]
+    return np.asarray(trace['x']), np.asarray(trace['y'])
+
+
+def test_zoom_after_downsample():
+    for fig in build_figures():
+        overview, stats = downsample_figure(fig, n_out=500)
+        assert stats == {'points': POINTS, 'downsampled': len(trace_xy(overview)[1])}
+        assert len(trace_xy(fig)[0]) == POINTS
+
+        # zooming in on the same figure uses the full resolution data of the range
+        zoomed, _ = downsample_figure(fig, n_out=500, x_range=(1000, 2000))
+        x, _ = trace_xy(zoomed)
+        assert 400 <= len(x) <= 500
+        assert x.min() >= 999 and x.max() <= 2001
+        assert np.all(np.diff(x) <= 3)
+        assert len(trace_xy(fig)[0]) == POINTS
+        layout = fig['layout'] if isinstance(fig, dict) else fig.layout.to_plotly_json()
+        assert 'range' not in layout.get('xaxis', {})
+
+
+if __name__ == "__main__":
+    test_zoom_after_downsample()
@@ -0,0 +1,53 @@
+"""
+Test the response of fast_json callbacks matches dash's own encoding
+"""
+
+import json
+import os
+import sys
+import numpy as np
+import plotly.graph_objects as go
+import dash
+from dash import dcc, html
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+from dash_helper import dash_helper, Input, Output
+
+
+def build_app(fast_json):
+    app = dash.Dash(__name__)
+    app.layout = html.Div([html.Button(id='btn'), dcc.Graph(id='graph'), html.Div(id='label')])
+    fig = go.Figure(go.Scatter(x=np.arange(5), y=np.array([1.5, 2.5, np.nan, 4.0, 5.0]), name='a</script>'))
+
+    @dash_helper(Output('graph', 'figure'), Output('label', 'children'), Input('btn', 'n_clicks'), app=app,
+                 callback_name=f'fast_json_{fast_json}', fast_json=fast_json)
+    def update(dh):
+        return fig, ['line\u2028break', {'n': dh['btn']}]
+
+    return app
+
+
+def post(app):
+    body = {
+        'output': '..graph.figure...label.children..',
+        'outputs': [{'id': 'graph', 'property': 'figure'}, {'id': 'label', 'property': 'children'}],
+        'inputs': [{'id': 'btn', 'property': 'n_clicks', 'value': 3}],
+        'changedPropIds': ['btn.n_clicks'],
+    }
+    response = app.server.test_client().post('/_dash-update-component', json=body)
+    assert response.status_code == 200
+    assert response.mimetype == 'application/json'
+    return response.get_data(as_text=True)
+
+
+def test_response_format():
+    expected = post(build_app(False))
+    for mode in (True, 'cache'):
+        text = post(build_app(mode))
+        # same document, and the same HTML safe escaping as dash's encoder
+        assert json.loads(text) == json.loads(expected)
+        for unsafe in ('</', '\u2028', '<script'):
+            assert unsafe not in text
+
+
+if __name__ == "__main__":
+    test_response_format()
@@ -0,0 +1,50 @@
+"""
+Test the callback dependency graph analysis
+"""
+
+import os
+import sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+from dash_helper import CallbackGraph
+
+
+def io(inputs, outputs, states=()):
+    return {'inputs': tuple(inputs), 'states': tuple(states), 'outputs': tuple(outputs)}
+
+
+def test_critical_path():
+    # filter -> load -> (chart, table), chart -> legend
+    graph = CallbackGraph({
+        'load': io(['filter.value'], ['store.data']),
+        'chart': io(['store.data'], ['chart.figure']),
+        'table': io(['store.data'], ['table.data']),
+        'legend': io(['chart.figure'], ['legend.children']),
+    }, {'load': 0.2, 'chart': 0.1, 'table': 0.25, 'legend': 0.1})
+
+    assert graph.actions == ['filter.value']
+    assert graph.cascade('filter.value') == {'load', 'chart', 'table', 'legend'}
+    path, latency = graph.critical_path('filter.value')
+    assert path == ['load', 'table'] and abs(latency - 0.45) < 1e-9
+
+    report = graph.analyse()
+    assert report['cascades'][0]['round_trips'] == 2 and report['cycles'] == []
+    assert {'reason': 'serial', 'callbacks': ['chart', 'legend'], 'props': ['chart.figure']} in \
+        report['merge_candidates']
+    assert '"load" -> "table" [label="store.data", fontsize=8, color=red' in graph.to_dot()
+
+
+def test_cycles_and_fan_out():
+    graph = CallbackGraph({
+        'a': io(['x.value', 'b.value'], ['a.value']),
+        'b': io(['a.value'], ['b.value']),
+        'c': io(['x.value'], ['c.value']),
+        'd': io(['x.value'], ['d.value']),
+    }, {})
+
+    assert [sorted(x) for x in graph.cycles()] == [['a', 'b']]
+    assert graph.fan_outs(threshold=3) == [{'prop': 'x.value', 'callbacks': ['a', 'c', 'd']}]
+    # callbacks in the cycle are not followed, whether the cycles are passed or found by critical_path
+    path, latency = graph.critical_path('x.value', cyclic={'a', 'b'})
+    assert path and latency == 0.0
+    assert graph.critical_path('x.value') == (path, latency)
+    assert graph.analyse()['cascades'][0]['unmeasured'] == ['a', 'b', 'c', 'd']
@@ -0,0 +1,80 @@
+"""
+Test 'latest wins' cancellation through the flask test client
+"""
+
+import os
+import sys
+import threading
+import dash
+from dash import html, dcc, MATCH
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+from dash_helper import dash_helper, Input, Output
+
+
+def post(client, body):
+    response = client.post('/_dash-update-component', json=body)
+    return response.status_code, response.get_json()
+
+
+def match_body(index, value):
+    input_id = {'type': 'query', 'index': index}
+    output_id = {'type': 'result', 'index': index}
+    return {
+        'output': '{"index":["MATCH"],"type":"result"}.children',
+        'outputs': {'id': output_id, 'property': 'children'},
+        'inputs': [{'id': input_id, 'property': 'value', 'value': value}],
+        'changedPropIds': ['{"index":' + str(index) + ',"type":"query"}.value'],
+    }
+
+
+def test_match_instances_do_not_supersede_each_other():
+    app = dash.Dash(__name__)
+    app.server.secret_key = 'test'
+    app.layout = html.Div([dcc.Input(id={'type': 'query', 'index': 0}),
+                           html.Div(id={'type': 'result', 'index': 0})])
+    started = threading.Event()
+    release = threading.Event()
+
+    @dash_helper(Output({'type': 'result', 'index': MATCH}, 'children'),
+                 Input({'type': 'query', 'index': MATCH}, 'value'), app=app, callback_name='match_latest',
+                 latest_wins=True)
+    def search(dh):
+        if dh.trigger_val == 'slow':
+            started.set()
+            release.wait(5)
+        return dh.trigger_val
+
+    client = app.server.test_client()
+    # the first callback creates the session id cookie
+    post(client, match_body(0, 'init'))
+    results = {}
+    slow = threading.Thread(target=lambda: results.update(slow=post(client, match_body(0, 'slow'))))
+    slow.start()
+    try:
+        assert started.wait(5)
+        # another instance of the same session does not cancel the running one
+        status, _ = post(client, match_body(1, 'fast'))
+        assert status == 200
+    finally:
+        release.set()
+        slow.join()
+    assert results['slow'][0] == 200
+    assert results['slow'][1]['response']['{"index":0,"type":"result"}']['children'] == 'slow'
+
+    # a newer run of the same instance does
+    started.clear()
+    release.clear()
+    slow = threading.Thread(target=lambda: results.update(slow=post(client, match_body(0, 'slow'))))
+    slow.start()
+    try:
+        assert started.wait(5)
+        post(client, match_body(0, 'fast'))
+    finally:
+        release.set()
+        slow.join()
+    # the cancelled run does not update its output
+    assert results['slow'][0] == 204 or not results['slow'][1]['response']
+
+
+if __name__ == "__main__":
+    test_match_instances_do_not_supersede_each_other()
@@ -0,0 +1,82 @@
+"""
+Test concurrency limits and deadlines of live callbacks
+"""
+
+import os
+import sys
+import threading
+import time
+import dash
+from dash import html
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+from dash_helper import dash_helper, Input, Output
+
+
+def request_body(button):
+    return {'output': 'out.children', 'outputs': {'id': 'out', 'property': 'children'},
+            'inputs': [{'id': button, 'property': 'n_clicks', 'value': 1}],
+            'changedPropIds': [f'{button}.n_clicks'], 'state': []}
+
+
+def test_overload():
+    release = threading.Event()
+    started = threading.Event()
+    app = dash.Dash(__name__)
+    app.layout = html.Div([html.Button(id='busy'), html.Div(id='out')])
+
+    @dash_helper(Output('out', 'children'), Input('busy', 'n_clicks'), app=app, callback_name='limited_busy',
+                 max_concurrency=1, queue_timeout=0.05, on_overload='503')
+    def busy(dh):
+        started.set()
+        release.wait(5)
+        return 'done'
+
+    client = app.server.test_client()
+    responses = []
+    first = threading.Thread(target=lambda: responses.append(
+        app.server.test_client().post('/_dash-update-component', json=request_body('busy'))))
+    first.start()
+    assert started.wait(5)
+    # the only slot is taken, the second request is shed after queue_timeout
+    assert client.post('/_dash-update-component', json=request_body('busy')).status_code == 503
+
+    release.set()
+    first.join(5)
+    assert responses[0].status_code == 200 and b'done' in responses[0].data
+    response = client.post('/_dash-update-component', json=request_body('busy'))
+    assert response.status_code == 200
+
+
+def test_deadline_keeps_slot():
+    release = threading.Event()
+    started = threading.Event()
+    app = dash.Dash(__name__)
+    app.layout = html.Div([html.Button(id='slow'), html.Div(id='out')])
+
+    @dash_helper(Output('out', 'children'), Input('slow', 'n_clicks'), app=app, callback_name='limited_slow',
+                 max_concurrency=1, queue_timeout=0.05, on_overload='503', timeout=0.2, timeout_thread=True,
+                 timeout_fallback='timed out')
+    def slow(dh):
+        started.set()
+        release.wait(5)
+        return 'done'
+
+    client = app.server.test_client()
+    start = time.perf_counter()
+    response = client.post('/_dash-update-component', json=request_body('slow'))
+    # the request returns at the deadline with the fallback, the thread keeps running
+    assert started.is_set() and time.perf_counter() - start < 2
+    assert b'timed out' in response.data
+
+    # the overrunning thread still holds the only slot, so the next request is shed
+    response = client.post('/_dash-update-component', json=request_body('slow'))
+    assert response.status_code == 503
+
+    release.set()
+    deadline = time.time() + 5
+    while time.time() < deadline:
+        response = client.post('/_dash-update-component', json=request_body('slow'))
+        if response.status_code != 503:
+            break
+        time.sleep(0.02)
+    assert response.status_code == 200 and b'done' in response.data
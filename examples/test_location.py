@@ -0,0 +1,60 @@
+"""
+Test which callbacks get the dcc.Location States
+"""
+
+import logging
+import os
+import sys
+import dash
+from dash import dcc, html
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+from dash_helper import dash_helper, Input, Output, get_callback_registry
+
+
+def read_path(dh):
+    return dh.location_pathname
+
+
+def test_indirect_location(caplog):
+    app = dash.Dash(__name__)
+    app.layout = html.Div([dcc.Location(id='url'), html.Button(id='btn'), html.Div(id='a'), html.Div(id='b'),
+                           html.Div(id='c')])
+
+    with caplog.at_level(logging.WARNING, logger='dash_helper'):
+        @dash_helper(Output('a', 'children'), Input('btn', 'n_clicks'), app=app, callback_name='loc_indirect')
+        def indirect(dh):
+            return read_path(dh)
+
+        @dash_helper(Output('b', 'children'), Input('btn', 'n_clicks'), app=app, callback_name='loc_explicit',
+                     location=True)
+        def explicit(dh):
+            return read_path(dh)
+
+        @dash_helper(Output('c', 'children'), Input('btn', 'n_clicks'), app=app, callback_name='loc_direct')
+        def direct(dh):
+            return dh.location_pathname
+
+    options = {x.callback_name: x.options['location'] for x in get_callback_registry()
+               if x.callback_name.startswith('loc_')}
+    assert options == {'loc_indirect': False, 'loc_explicit': True, 'loc_direct': True}
+    warnings = [x.getMessage() for x in caplog.records if "Location 'url' is not attached" in x.getMessage()]
+    assert len(warnings) == 1 and 'location=True' in warnings[0]
+
+
+def test_location_false_does_not_warn(caplog):
+    app = dash.Dash(__name__)
+    app.layout = html.Div([dcc.Location(id='url'), html.Button(id='btn'), html.Div(id='a'), html.Div(id='b')])
+
+    with caplog.at_level(logging.WARNING, logger='dash_helper'):
+        @dash_helper(Output('a', 'children'), Input('btn', 'n_clicks'), app=app, callback_name='loc_off',
+                     location=False)
+        def off(dh):
+            return read_path(dh)
+
+        assert not [x for x in caplog.records if "is not attached" in x.getMessage()]
+
+        @dash_helper(Output('b', 'children'), Input('btn', 'n_clicks'), app=app, callback_name='loc_omitted')
+        def omitted(dh):
+            return read_path(dh)
+
+    assert len([x for x in caplog.records if "is not attached" in x.getMessage()]) == 1
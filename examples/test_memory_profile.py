@@ -0,0 +1,52 @@
+"""
+Test memory profiling of live callbacks
+"""
+
+import logging
+import os
+import sys
+import threading
+import dash
+from dash import html
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+from dash_helper import dash_helper, Input, Output, get_metrics_registry
+
+
+def request_body(button):
+    return {'output': f'{button}-out.children', 'outputs': {'id': f'{button}-out', 'property': 'children'},
+            'inputs': [{'id': button, 'property': 'n_clicks', 'value': 1}],
+            'changedPropIds': [f'{button}.n_clicks'], 'state': []}
+
+
+def test_profile_and_overrun(caplog):
+    release = threading.Event()
+    app = dash.Dash(__name__)
+    app.layout = html.Div([html.Button(id='fast'), html.Button(id='slow'), html.Div(id='fast-out'),
+                           html.Div(id='slow-out')])
+
+    @dash_helper(Output('fast-out', 'children'), Input('fast', 'n_clicks'), app=app,
+                 callback_name='profiled_fast', memory_profile=1.0, prevent_initial_call=True)
+    def fast(dh):
+        return len([0] * 100000)
+
+    @dash_helper(Output('slow-out', 'children'), Input('slow', 'n_clicks'), app=app,
+                 callback_name='profiled_slow', memory_profile=1.0, timeout=0.1, timeout_thread=True,
+                 prevent_initial_call=True)
+    def slow(dh):
+        release.wait(5)
+        return 'done'
+
+    client = app.server.test_client()
+    with caplog.at_level(logging.INFO, logger='dash_helper'):
+        client.post('/_dash-update-component', json=request_body('fast'))
+        client.post('/_dash-update-component', json=request_body('slow'))
+    release.set()
+
+    metrics = get_metrics_registry()
+    fast_counters = metrics.callback(f"{__name__}:profiled_fast").counters
+    slow_counters = metrics.callback(f"{__name__}:profiled_slow").counters
+    assert fast_counters['memory_profiled'] == 1 and 'memory_profile_incomplete' not in fast_counters
+    # the profile of the overrunning callback stopped while func was still running
+    assert slow_counters['memory_profile_incomplete'] == 1 and 'memory_profiled' not in slow_counters
+    timeouts = [x.getMessage() for x in caplog.records if 'Timed out' in x.getMessage()]
+    assert timeouts and 'incomplete=still_running' in timeouts[0]
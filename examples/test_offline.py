@@ -0,0 +1,106 @@
+"""
+Test running callback chains offline with ChainExecutor
+"""
+
+import os
+import sys
+import time
+import dash
+import pytest
+from dash import html
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+from dash_helper import dash_helper, Input, State, Output, ChainExecutor, layout_state
+
+
+def callback_names(executor, names):
+    """Short callback names of registry names (registering the same app twice makes the names unique)"""
+    return [executor.nodes[x].registration.callback_name for x in names]
+
+
+def diamond_app():
+    """source -> left, right -> total, with 'other' feeding an unrelated callback"""
+    app = dash.Dash(__name__)
+    app.layout = html.Div([html.Div(id=x) for x in ('source', 'left', 'right', 'total', 'other', 'echo')])
+
+    @dash_helper(Output('left', 'children'), Input('source', 'children'), app=app, callback_name='left')
+    def left(dh):
+        time.sleep(0.02)
+        return dh['source'] * 2
+
+    @dash_helper(Output('right', 'children'), Input('source', 'children'), app=app, callback_name='right')
+    def right(dh):
+        return dh['source'] + 1
+
+    @dash_helper(Output('total', 'children'), Input('left', 'children'), Input('right', 'children'),
+                 State('source', 'children'), app=app, callback_name='total')
+    def total(dh):
+        return [dh['left'], dh['right'], dh['source']]
+
+    @dash_helper(Output('echo', 'children'), Input('other', 'children'), app=app, callback_name='echo',
+                 prevent_initial_call=True)
+    def echo(dh):
+        return dh['other']
+
+    return app
+
+
+def test_chain_order():
+    app = diamond_app()
+    executor = ChainExecutor(app=app)
+    result = executor.run({'source.children': 1}, trigger='source.children', changes={'source.children': 3})
+    ran = callback_names(executor, result.ran)
+    # 'total' waits for both of its producers, the slower 'left' included
+    assert sorted(ran[:2]) == ['left', 'right'] and ran[2:] == ['total']
+    assert result['total.children'] == [6, 4, 3]
+    assert result.changed == {'left.children', 'right.children', 'total.children'}
+    assert 'echo.children' not in result.state
+
+
+def test_initial_load():
+    app = diamond_app()
+    executor = ChainExecutor(app=app)
+    result = executor.run({**layout_state(app.layout), 'source.children': 1, 'other.children': 'x'})
+    assert sorted(callback_names(executor, result.ran)) == ['left', 'right', 'total']
+    assert result['total.children'] == [2, 2, 1]
+    skipped = callback_names(executor, [x['name'] for x in result.runs if x['status'] == 'skipped'])
+    assert skipped == ['echo']
+
+
+def test_cycle_and_unknown_trigger():
+    app = dash.Dash(__name__)
+    app.layout = html.Div([html.Div(id='a'), html.Div(id='b')])
+
+    @dash_helper(Output('b', 'children'), Input('a', 'children'), app=app, callback_name='a_to_b')
+    def a_to_b(dh):
+        return dh['a']
+
+    @dash_helper(Output('a', 'children'), Input('b', 'children'), app=app, callback_name='b_to_a')
+    def b_to_a(dh):
+        return dh['b']
+
+    executor = ChainExecutor(app=app)
+    with pytest.raises(ValueError, match='cycle'):
+        executor.run({}, trigger='a.children', changes={'a.children': 1})
+    with pytest.raises(ValueError, match='not an Input'):
+        executor.run({}, trigger='missing.children')
+
+
+def test_errors():
+    app = dash.Dash(__name__)
+    app.layout = html.Div([html.Div(id='src'), html.Div(id='bad'), html.Div(id='after')])
+
+    @dash_helper(Output('bad', 'children'), Input('src', 'children'), app=app, callback_name='fails')
+    def fails(dh):
+        raise RuntimeError('boom')
+
+    @dash_helper(Output('after', 'children'), Input('bad', 'children'), app=app, callback_name='after_fail')
+    def after_fail(dh):
+        return 'ran'
+
+    executor = ChainExecutor(app=app)
+    with pytest.raises(RuntimeError, match='boom'):
+        executor.run({}, trigger='src.children', changes={'src.children': 1})
+    result = executor.run({}, trigger='src.children', changes={'src.children': 1}, raise_errors=False)
+    assert callback_names(executor, result.errors) == ['fails']
+    # nothing changed upstream, so the downstream callback does not fire
+    assert 'after.children' not in result.state
@@ -0,0 +1,30 @@
+"""
+Test the large output warning of payload size accounting
+"""
+
+import logging
+import os
+import sys
+import dash
+from dash import html
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+from dash_helper import dash_helper, Input, Output
+
+
+def test_large_output_warning(caplog):
+    app = dash.Dash(__name__)
+    app.layout = html.Div([html.Button(id='btn'), html.Div(id='out')])
+
+    @dash_helper(Output('out', 'children'), Input('btn', 'n_clicks'), app=app, callback_name='large_payload',
+                 payload_size={'large_output_kb': 1})
+    def large(dh):
+        return 'x' * 4096
+
+    body = {'output': 'out.children', 'outputs': {'id': 'out', 'property': 'children'},
+            'inputs': [{'id': 'btn', 'property': 'n_clicks', 'value': 1}],
+            'changedPropIds': ['btn.n_clicks'], 'state': []}
+    with caplog.at_level(logging.WARNING, logger='dash_helper'):
+        response = app.server.test_client().post('/_dash-update-component', json=body)
+    assert response.status_code == 200
+    warnings = [x.getMessage() for x in caplog.records if 'Large outputs' in x.getMessage()]
+    assert len(warnings) == 1 and 'out.children=' in warnings[0]
@@ -0,0 +1,42 @@
+"""
+Test freezing the heap before the workers fork
+"""
+
+import gc
+import os
+import sys
+import dash
+from dash import html
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+from dash_helper import dash_helper, Input, Output, freeze, unfreeze, get_callback_registry
+
+
+def test_freeze_without_collect(monkeypatch):
+    collections = []
+    monkeypatch.setattr(gc, 'collect', lambda *args: collections.append(args))
+    try:
+        freeze(preload_modules=())
+        assert collections == []
+        assert gc.get_freeze_count() > 0
+        freeze(preload_modules=(), gc_collect=True)
+        assert len(collections) == 1
+    finally:
+        unfreeze()
+
+
+def test_freeze_prepares_callbacks():
+    app = dash.Dash(__name__)
+    app.layout = html.Div([html.Button(id='btn'), html.Div(id='out')])
+
+    @dash_helper(Output('out', 'children'), Input('btn', 'n_clicks'), app=app, callback_name='preload_prepare')
+    def prepare(dh):
+        return dh['btn']
+
+    registration = [x for x in get_callback_registry() if x.callback_name == 'preload_prepare'][-1]
+    assert callable(registration._layout_info)
+    try:
+        freeze(preload_modules=())
+    finally:
+        unfreeze()
+    assert not callable(registration._layout_info)
+    assert registration.layout_info
@@ -0,0 +1,101 @@
+"""
+Test callback result caching through the flask test client
+"""
+
+import os
+import sys
+import threading
+import dash
+import pytest
+from dash import html, dcc
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+from dash_helper import dash_helper, Input, Output, get_result_cache, ResultCacheBackend
+
+
+def build_app(name, **kwargs):
+    app = dash.Dash(__name__)
+    app.server.secret_key = 'test'
+    app.layout = html.Div([dcc.Input(id='query'), html.Div(id='out')])
+    calls = []
+    started = threading.Event()
+    release = threading.Event()
+    release.set()
+
+    @dash_helper(Output('out', 'children'), Input('query', 'value'), app=app, callback_name=name, **kwargs)
+    def search(dh):
+        calls.append(dh['query'])
+        started.set()
+        release.wait(5)
+        return f"{dh['query']}:{dh.session_cache.get('user')}:{len(calls)}"
+
+    @app.server.route('/login/<user>')
+    def login(user):
+        from dash_helper.session_cache import SessionCache, get_session_cache_backend, get_session_id
+        SessionCache(get_session_cache_backend(), get_session_id())['user'] = user
+        return 'ok'
+
+    return app, calls, started, release
+
+
+def post(client, value):
+    body = {
+        'output': 'out.children',
+        'outputs': {'id': 'out', 'property': 'children'},
+        'inputs': [{'id': 'query', 'property': 'value', 'value': value}],
+        'changedPropIds': ['query.value'],
+    }
+    response = client.post('/_dash-update-component', json=body)
+    if response.status_code != 200:
+        return response.status_code
+    return response.get_json()['response']['out']['children']
+
+
+def test_per_session():
+    get_result_cache().clear()
+    app, calls, _, _ = build_app('cache_per_session', cache={'per_session': True})
+    alice, bob = app.server.test_client(), app.server.test_client()
+    alice.get('/login/alice')
+    bob.get('/login/bob')
+    assert post(alice, 'x') == 'x:alice:1'
+    assert post(bob, 'x') == 'x:bob:2'
+    assert post(alice, 'x') == 'x:alice:1'
+    assert calls == ['x', 'x']
+
+
+def test_hit_does_not_queue():
+    get_result_cache().clear()
+    app, calls, started, release = build_app('cache_no_queue', cache=True, max_concurrency=1, queue_timeout=0.05)
+    client = app.server.test_client()
+    assert post(client, 'cached') == 'cached:None:1'
+
+    started.clear()
+    release.clear()
+    slow = threading.Thread(target=post, args=(app.server.test_client(), 'slow'))
+    slow.start()
+    try:
+        assert started.wait(5)
+        # the only slot is taken by the slow call, a cached result is still returned
+        assert post(client, 'cached') == 'cached:None:1'
+    finally:
+        release.set()
+        slow.join()
+
+
+def test_incomplete_backend():
+    class NoClear(ResultCacheBackend):
+        def get(self, key, default=None):
+            return default
+
+        def set(self, key, value, ttl=None):
+            pass
+
+        def delete(self, key):
+            pass
+
+    with pytest.raises(TypeError, match='clear'):
+        NoClear()
+
+
+if __name__ == "__main__":
+    test_per_session()
+    test_hit_does_not_queue()
@@ -0,0 +1,69 @@
+"""
+Test URL routing and query string parsing
+"""
+
+import os
+import sys
+import uuid
+import pytest
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+from dash_helper import Router
+from dash_helper.router import parse_query
+
+
+def make_router():
+    router = Router()
+    router.add('/', 'home')
+    router.add('/item/new', 'item_new')
+    router.add('/item/<int:id>', 'item')
+    router.add('/item/<int:item_id>/edit', 'item_edit')
+    router.add('/item/<slug>', 'item_slug')
+    router.add('/doc/<uuid:doc_id>', 'doc')
+    router.add('/ratio/<float:value>', 'ratio', query={'page': int, 'flag': bool})
+    router.add('/files/<path:rest>', 'files')
+    return router
+
+
+def test_precedence_and_names():
+    router = make_router()
+    assert router.match('/').name == 'home'
+    # static beats parameters, typed parameters beat str
+    assert router.match('/item/new').name == 'item_new'
+    match = router.match('/item/42')
+    assert (match.name, match.path_params) == ('item', {'id': 42})
+    # same type and level as '/item/<int:id>', with its own parameter name
+    match = router.match('/item/42/edit')
+    assert (match.name, match.path_params) == ('item_edit', {'item_id': 42})
+    assert router.match('/item/widget').path_params == {'slug': 'widget'}
+    assert router.match('/files/a/b/c.txt').path_params == {'rest': 'a/b/c.txt'}
+
+
+def test_conversions():
+    router = make_router()
+    doc_id = uuid.uuid4()
+    assert router.match(f'/doc/{doc_id}').path_params == {'doc_id': doc_id}
+    match = router.match('/ratio/0.5', '?page=3&flag=yes&tag=a&tag=b')
+    assert match.path_params == {'value': 0.5}
+    assert match.query_params == {'page': 3, 'flag': True, 'tag': ['a', 'b']}
+    assert match.params == {'value': 0.5, 'page': 3, 'flag': True, 'tag': ['a', 'b']}
+    assert router.url_for('item_edit', item_id=7) == '/item/7/edit'
+
+
+def test_missing_routes():
+    router = make_router()
+    assert router.match('/doc/not-a-uuid') is None
+    assert router.match('/item/42/delete') is None
+    assert router.match('/ratio/0.5', '?page=two') is None
+    assert router.match(None) is None
+    with pytest.raises(ValueError, match='duplicates'):
+        router.add('/item/<int:other>', 'item_other')
+    with pytest.raises(ValueError, match='more than once'):
+        router.add('/pair/<a>/<a>', 'pair')
+
+
+def test_parse_query():
+    assert parse_query(None) == {}
+    assert parse_query('?a=1&b=x%20y&b=z') == {'a': '1', 'b': ['x y', 'z']}
+    first = parse_query('?a=1')
+    first['a'] = 'changed'
+    assert parse_query('?a=1') == {'a': '1'}
@@ -0,0 +1,62 @@
+"""
+Test the in-memory session cache backend and the session id
+"""
+
+import os
+import sys
+import flask
+import pytest
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+from dash_helper import session_cache
+from dash_helper.session_cache import SessionCacheBackend, MemorySessionCacheBackend, get_session_id
+
+
+def test_ttl_and_lru(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(session_cache.time, 'time', lambda: now[0])
+    backend = MemorySessionCacheBackend(max_bytes=300, session_quota=None, ttl=60)
+    backend.set('s1', 'a', 1, size=100)
+    now[0] += 30
+    backend.set('s2', 'b', 2, size=100)
+    now[0] += 10
+    assert backend.get('s1', 'a') == 1  # refreshed, now the most recently used
+
+    now[0] += 30
+    backend.set('s2', 'c', 3, size=100)
+    assert backend.keys('s1') == ['a'] and backend.keys('s2') == ['b', 'c']
+
+    now[0] += 25
+    backend.set('s1', 'd', 4, size=100)  # 'b' expired, 'a' and 'c' did not
+    assert backend.keys('s1') == ['a', 'd'] and backend.keys('s2') == ['c']
+
+    backend.set('s2', 'e', 5, size=100)  # over max_bytes, the least recently used goes
+    assert backend.keys('s1') == ['d'] and backend.keys('s2') == ['c', 'e']
+    assert backend.size == 300
+
+
+def test_session_id_written_once():
+    app = flask.Flask(__name__)
+    app.secret_key = 'test'
+
+    @app.route('/')
+    def index():
+        return get_session_id()
+
+    client = app.test_client()
+    response = client.get('/')
+    assert 'Set-Cookie' in response.headers
+    response_again = client.get('/')
+    assert response_again.get_data(as_text=True) == response.get_data(as_text=True)
+    assert 'Set-Cookie' not in response_again.headers
+
+
+def test_incomplete_backend():
+    class GetSetOnly(SessionCacheBackend):
+        def get(self, session_id, key, default=None):
+            return default
+
+        def set(self, session_id, key, value, size=None):
+            return False
+
+    with pytest.raises(TypeError, match='session_size'):
+        GetSetOnly()
@@ -0,0 +1,52 @@
+"""
+Test setting several outputs at once
+"""
+
+import os
+import sys
+import dash
+import pytest
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+from dash_helper import DashHelper, Input, Output
+
+
+def make_dh():
+    outputs = [Output('title', 'children'), Output('graph', 'figure'), Output('graph', 'style'),
+               Output({'type': 'row', 'index': 1}, 'children')]
+    return DashHelper([Input('btn', 'n_clicks')], [], outputs, [1], callback_name='set_many', standalone_mode=True)
+
+
+def test_keys_and_property_ids():
+    dh = make_dh()
+    dh.set_many([('title', 'T'), ('graph', 'figure', {'data': []}), (('graph', 'style'), {'width': 1}),
+                 ({'type': 'row', 'index': 1}, 'R')])
+    assert dh.return_value == ['T', {'data': []}, {'width': 1}, 'R']
+
+    dh = make_dh()
+    # property_id and value swapped, as set() accepts
+    dh.set_many([('graph', {'data': [1]}, 'figure'), ('title', 'children', 'X')])
+    assert dh.return_value[:2] == ['X', {'data': [1]}]
+
+
+def test_invalid_outputs():
+    dh = make_dh()
+    with pytest.raises(ValueError) as error:
+        dh.set_many({'missing': 1, 'graph': 2, 'title:value': 3, 'title': 'ok'})
+    message = str(error.value)
+    assert '3 invalid output(s)' in message and "'missing'" in message and "'graph' has multiple" in message
+    assert dh.return_value[0] is dash.no_update
+
+    with pytest.raises(ValueError, match='more than once'):
+        dh.set_many({'title': 'a', 'title:children': 'b'})
+    assert dh.return_value[0] is dash.no_update
+
+
+def test_set_dict_matches_set():
+    values = {'title': 'T', 'graph:figure': {'data': []}, Output('graph', 'style'): {'height': 2},
+              'row': 'R'}
+    expected = make_dh()
+    for key, value in values.items():
+        expected.set(key, value)
+    dh = make_dh()
+    dh.set_dict(values)
+    assert dh.return_value == expected.return_value == ['T', {'data': []}, {'height': 2}, 'R']
@@ -5,6 +5,8 @@ Demo how to test a standalone function
 import os
 import sys
 import logging
+import dash
+from dash import ALL
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
 from dash_helper import DashHelper, Input, State, Output, DashHelperGen
 from demo_dash_logic import update_output_btn1_btn2, DASH_CONTROL_DIV_OUTPUT_ID1, \
@@ -28,5 +30,34 @@ def test1():
                  func=update_output_btn1_btn2).dh_obj
     update_output_btn1_btn2(dh_obj)
 
+def test_trigger():
+    dh_obj = DashHelperGen(
+                 Output(DASH_CONTROL_DIV_OUTPUT_ID1, DASH_CONTROL_DIV_OUTPUT_PROP),
+                 Input(DASH_CONTROL_BUTTON1_INPUT_ID, DASH_CONTROL_BUTTON_INPUT_PROP, value=1),
+                 Input(DASH_CONTROL_BUTTON2_INPUT_ID, DASH_CONTROL_BUTTON_INPUT_PROP, value=5, trigger=True),
+                 callback_name="btn1_btn2").dh_obj
+
+    assert dh_obj.trigger_id == DASH_CONTROL_BUTTON2_INPUT_ID
+    assert dh_obj.trigger_prop == DASH_CONTROL_BUTTON_INPUT_PROP
+    assert dh_obj.trigger_val == 5
+
+def test_pattern_matching():
+    row_ids = [{'type': 'row', 'index': idx} for idx in range(3)]
+    label_ids = [{'type': 'label', 'index': idx} for idx in range(3)]
+    dh_obj = DashHelperGen(
+                 Output({'type': 'label', 'index': ALL}, 'children'),
+                 Input({'type': 'row', 'index': ALL}, 'value', value=['a', 'b', 'c']),
+                 callback_name="pattern",
+                 inputs_list=[[{'id': x, 'property': 'value'} for x in row_ids]],
+                 outputs_list=[{'id': x, 'property': 'children'} for x in label_ids]).dh_obj
+
+    assert dh_obj.get_all('row', 'value') == {'id': row_ids, 'value': ['a', 'b', 'c'], 'index': [0, 1, 2]}
+    assert dh_obj.get_instance({'type': 'row', 'index': 1}, 'value') == 'b'
+    dh_obj.set_all('label', 'children', {2: 'C'})
+    dh_obj.set_instance({'type': 'label', 'index': 0}, 'children', 'A')
+    assert dh_obj.return_value == ['A', dash.no_update, 'C']
+
 if __name__ == "__main__":
     test1()
+    test_trigger()
+    test_pattern_matching()
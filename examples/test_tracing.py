@@ -0,0 +1,49 @@
+"""
+Test span export does not hold up callbacks
+"""
+
+import os
+import sys
+import threading
+import time
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+from dash_helper import BatchSpanProcessor, InMemorySpanExporter, Tracer
+
+
+class SlowExporter(InMemorySpanExporter):
+    def __init__(self):
+        super().__init__()
+        self.exporting = threading.Event()
+        self.release = threading.Event()
+
+    def export(self, spans):
+        self.exporting.set()
+        self.release.wait(5)
+        super().export(spans)
+
+
+def test_span_end_during_export():
+    exporter = SlowExporter()
+    processor = BatchSpanProcessor(exporter, schedule_delay=60)
+    tracer = Tracer(processor=processor)
+    with tracer.start_trace('first'):
+        pass
+    flush = threading.Thread(target=processor.force_flush)
+    flush.start()
+    try:
+        assert exporter.exporting.wait(5)
+        # e.g. the first span of a forked worker, it starts the export thread while the master's export is running
+        processor._pid = None
+        start = time.perf_counter()
+        with tracer.start_trace('second'):
+            pass
+        assert time.perf_counter() - start < 1
+    finally:
+        exporter.release.set()
+        flush.join()
+    processor.force_flush()
+    assert [x.name for x in exporter.get_finished_spans()] == ['first', 'second']
+
+
+if __name__ == "__main__":
+    test_span_end_during_export()
@@ -1,3 +1,58 @@
-from .dash_helper import dash_helper, DashHelper, Input, State, Output, DashHelperGen, dash_helper_register, set_uuid, \
+"""
+dash_helper package.   Public names of the callback wrapper and its features.
+  - only the modules the core wrapper (dash_helper.py) needs to register and run a plain callback are imported eagerly:
+    correlation, tracing, metrics, payload, registry, cancellation, limits, deadline and schema
+  - every other feature module is listed in _LAZY_NAMES and imported by __getattr__ on first use of one of its names,
+    dash_helper.py imports them inside the functions that use them, preload.freeze imports them before the workers fork
+"""
+import importlib
+
+from .dash_helper import dash_helper, DashHelper, Input, State, Output, DashHelperGen, dash_helper_register, set_uuid, get_uuid, \
     register_log_cb_functions, TRIGGER_LOG_DEFAULT, TRIGGER_LOG_ALL, TRIGGER_LOG_DISPLAY_LABEL, TRIGGER_DISPLAY_INPUT, \
     TRIGGER_DISPLAY_OUTPUT, TRIGGER_EXCLUDE, TRIGGER_LOG_FUNC_START, TRIGGER_LOG_FUNC_END
+from .correlation import CorrelationBackend, FlaskSessionCorrelationBackend, CorrelationIdFilter, \
+    register_correlation_backend, get_correlation_id, set_correlation_id, new_correlation_id, correlation_scope
+from .tracing import Tracer, Span, InMemorySpanExporter, FileSpanExporter, BatchSpanProcessor, SimpleSpanProcessor, \
+    register_tracer, get_tracer, start_span, current_span, spans_to_otlp
+from .metrics import MetricsRegistry, get_metrics_registry
+from .payload import PayloadSizeConfig, estimate_json_size, json_size
+from .registry import CallbackRegistration, get_callback_registry
+from .limits import register_app_concurrency_limit, CallbackOverloaded, PRIORITY_INTERACTIVE, PRIORITY_BACKGROUND
+from .deadline import CallbackTimeout
+from .schema import CallbackSchema
+
+_LAZY_NAMES = {
+    'memory_profile': ('MemoryProfileConfig',),
+    'diagnostics': ('register_diagnostics_route', 'collect_diagnostics'),
+    'blob_store': ('BlobStore', 'MemoryBlobStore', 'FileBlobStore', 'register_blob_store', 'get_blob_store',
+                   'is_blob_ref'),
+    'session_cache': ('SessionCache', 'SessionCacheBackend', 'MemorySessionCacheBackend',
+                      'register_session_cache_backend', 'get_session_cache_backend', 'get_session_id'),
+    'preload': ('freeze', 'unfreeze', 'memory_report'),
+    'dispatch': ('CallbackDispatcher', 'dash_helper_dispatch'),
+    'router': ('Router', 'RouteMatch', 'parse_query'),
+    'batch': ('BatchExecutor', 'BatchResult', 'run_batch'),
+    'result_cache': ('ResultCacheBackend', 'MemoryResultCache', 'ResultCacheConfig', 'register_result_cache',
+                     'get_result_cache'),
+    'offline': ('ChainExecutor', 'ChainResult', 'layout_state', 'run_chain'),
+    'graph': ('CallbackGraph', 'callback_graph'),
+    'clientside': ('dash_helper_clientside', 'Passthrough', 'Lookup', 'Toggle', 'TRIGGER'),
+    'downsample': ('downsample_figure', 'downsample_xy', 'relayout_range'),
+    'datatable': ('TableDataset', 'parse_filter_query', 'table_dataset'),
+    'fast_json': ('FastJSONConfig', 'SerializedOutput', 'content_fingerprint'),
+    'chunked_store': ('ChunkedStore', 'chunked_data', 'chunked_value'),
+}
+_LAZY_MODULES = {name: module for module, names in _LAZY_NAMES.items() for name in names}
+
+
+def __getattr__(name):
+    module = _LAZY_MODULES.get(name)
+    if module is None:
+        raise AttributeError(f"module '{__name__}' has no attribute '{name}'")
+    value = getattr(importlib.import_module(f'.{module}', __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_MODULES))
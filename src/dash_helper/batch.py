@@ -0,0 +1,200 @@
+"""
+Batch execution logic.   Run a dash_helper callback function over many rows of input / state values.
+  - the callback schema is built once (once per worker process) and reused for every row
+  - rows are split in chunks and run in a process pool, or in process when processes is 0 / None
+  - results are columnar: one list per output plus per row errors and durations
+"""
+import logging
+import math
+import time
+
+import dash
+
+from .dash_helper import DashHelper, Input, State, Output, INPUT_FLAGS, STATE_FLAGS, OUTPUT_FLAGS, has_pattern_ids
+from .registry import REGISTRY
+from .schema import CallbackSchema, argument_columns, values_from_row
+
+LOGGER = logging.getLogger('dash_helper')
+
+COLUMN_ERROR = 'error'
+COLUMN_DURATION = 'duration'
+
+# per worker process state, set by _init_worker
+_WORKER_EXECUTOR = None
+
+
+def _to_dash(definition):
+    if isinstance(definition, (Input, State, Output)):
+        return definition.to_obj()
+    return definition
+
+
+class BatchResult:
+    """Columnar result of a batch run: {'output_id.prop': [...], 'error': [...], 'duration': [...]}"""
+
+    def __init__(self, columns, output_names):
+        self.columns = columns
+        self.output_names = output_names
+
+    @property
+    def errors(self):
+        """(row index, error) of the rows that failed"""
+        return [(idx, error) for idx, error in enumerate(self.columns[COLUMN_ERROR]) if error is not None]
+
+    def to_dataframe(self):
+        import pandas as pd
+        return pd.DataFrame(self.columns)
+
+    def __getitem__(self, item):
+        return self.columns[item]
+
+    def __len__(self):
+        return len(self.columns[COLUMN_DURATION])
+
+    def __repr__(self):
+        return f"BatchResult({len(self)} rows, {len(self.errors)} errors, outputs={self.output_names})"
+
+
+class BatchExecutor:
+    """
+    Run a callback function over rows of values.
+        executor = BatchExecutor(Output('output1', 'children'), Input('btn1', 'n_clicks'), Input('btn2', 'n_clicks'),
+                                 func=update_output_btn1_btn2, trigger='btn1.n_clicks')
+        result = executor.run([{'btn1': 1, 'btn2': 0}, {'btn1': 2, 'btn2': 5}], processes=4)
+        result['output1.children']
+    Rows are dicts (or a DataFrame) keyed by 'component_id.property', or by 'component_id' if it has one property.
+    Missing values are None.
+    """
+
+    def __init__(self, *definitions, func=None, callback_name=None, trigger=None, registration_name=None):
+        if func is None:
+            raise ValueError("BatchExecutor requires a 'func' argument")
+        self.func = func
+        self.callback_name = callback_name or getattr(func, '__name__', 'batch')
+        self.registration_name = registration_name
+        self.inputs = [_to_dash(x) for x in definitions if isinstance(x, (Input, dash.Input))]
+        self.states = [_to_dash(x) for x in definitions if isinstance(x, (State, dash.State))]
+        self.outputs = [_to_dash(x) for x in definitions if isinstance(x, (Output, dash.Output))]
+        if not self.inputs:
+            raise ValueError(f"[{self.callback_name}] BatchExecutor requires at least one Input")
+        if not self.outputs:
+            raise ValueError(f"[{self.callback_name}] BatchExecutor requires at least one Output")
+
+        self.trigger = trigger
+        self.trigger_id = None
+        self.trigger_prop = None
+        if trigger is not None:
+            self.trigger_id, _, trigger_prop = str(trigger).partition('.')
+            self.trigger_prop = trigger_prop or None
+
+        self.schema = CallbackSchema.build(self.callback_name, self.inputs, self.states, self.outputs,
+                                           INPUT_FLAGS, STATE_FLAGS, OUTPUT_FLAGS,
+                                           has_patterns=has_pattern_ids(self.inputs, self.states, self.outputs))
+        if self.schema.has_patterns:
+            raise ValueError(f"[{self.callback_name}] pattern matching callbacks are not supported by BatchExecutor")
+        self._input_columns = argument_columns(self.schema)
+        self.output_names = [f"{x.key}.{x.prop}" for x in self.schema.outputs]
+
+    @classmethod
+    def from_registration(cls, name, trigger=None):
+        """Executor for a callback registered with dash_helper, by its registry name."""
+        registration = REGISTRY.get(name)
+        if registration is None:
+            raise ValueError(f"Callback '{name}' is not registered, registered callbacks are {REGISTRY.names()}")
+        return cls(*registration.defined_outputs, *registration.defined_inputs, *registration.defined_states,
+                   func=registration.func, callback_name=registration.callback_name, trigger=trigger,
+                   registration_name=registration.name)
+
+    def run_row(self, row):
+        """Run the function for one row, returns (outputs, error, duration)."""
+        start = time.perf_counter()
+        try:
+            dh = DashHelper(self.inputs, self.states, self.outputs, values_from_row(self._input_columns, row),
+                            callback_name=self.callback_name, standalone_mode=True,
+                            trigger_id=self.trigger_id, trigger_prop=self.trigger_prop, schema=self.schema)
+            return_value = self.func(dh)
+            if isinstance(return_value, tuple):
+                dh.set_list(return_value)
+            elif return_value and return_value is not dash.no_update:
+                dh.set_list([return_value, ])
+            outputs = [dh._outputs[x.key][x.prop] for x in self.schema.outputs]
+            outputs = [None if x is dash.no_update else x for x in outputs]
+            return outputs, None, time.perf_counter() - start
+        except Exception as e:
+            return [None] * len(self.schema.outputs), f"{type(e).__name__}: {e}", time.perf_counter() - start
+
+    def run_chunk(self, rows):
+        return [self.run_row(row) for row in rows]
+
+    def run(self, rows, processes=None, chunk_size=None, mp_context=None):
+        """
+        Run every row and return a BatchResult.
+        :param rows: list of dicts or a pandas DataFrame
+        :param processes: worker processes, 0 / None runs in this process
+        :param chunk_size: rows sent to a worker at a time (default splits the rows in 4 chunks per process)
+        :param mp_context: multiprocessing context, default 'fork' where available so registered callbacks are
+                           inherited by the workers
+        """
+        if hasattr(rows, 'to_dict') and hasattr(rows, 'columns'):
+            rows = rows.to_dict('records')
+        rows = list(rows)
+
+        start = time.perf_counter()
+        if not processes or processes <= 1 or len(rows) <= 1:
+            row_results = self.run_chunk(rows)
+        else:
+            # imported on use, most apps never run a batch in processes
+            import multiprocessing
+            from concurrent.futures import ProcessPoolExecutor
+
+            if chunk_size is None:
+                chunk_size = max(1, math.ceil(len(rows) / (processes * 4)))
+            chunks = [rows[idx:idx + chunk_size] for idx in range(0, len(rows), chunk_size)]
+            if mp_context is None and 'fork' in multiprocessing.get_all_start_methods():
+                mp_context = multiprocessing.get_context('fork')
+            init_args = (self.registration_name, self.trigger, None) if self.registration_name else (None, None, self)
+            with ProcessPoolExecutor(max_workers=processes, mp_context=mp_context, initializer=_init_worker,
+                                     initargs=init_args) as pool:
+                row_results = [x for chunk_result in pool.map(_run_worker_chunk, chunks) for x in chunk_result]
+
+        columns = {name: [] for name in self.output_names}
+        columns[COLUMN_ERROR] = []
+        columns[COLUMN_DURATION] = []
+        for outputs, error, duration in row_results:
+            for name, value in zip(self.output_names, outputs):
+                columns[name].append(value)
+            columns[COLUMN_ERROR].append(error)
+            columns[COLUMN_DURATION].append(duration)
+
+        result = BatchResult(columns, self.output_names)
+        LOGGER.info(f"[{self.callback_name}] batch of {len(rows)} rows completed in "
+                    f"{time.perf_counter() - start:.3f}s ({len(result.errors)} errors)")
+        return result
+
+    def __getstate__(self):
+        # the schema holds read-only mappings, which can not be pickled, it is rebuilt by the worker
+        state = dict(self.__dict__)
+        state['schema'] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.schema = CallbackSchema.build(self.callback_name, self.inputs, self.states, self.outputs,
+                                           INPUT_FLAGS, STATE_FLAGS, OUTPUT_FLAGS)
+
+
+def _init_worker(registration_name, trigger, executor):
+    global _WORKER_EXECUTOR
+    if registration_name is not None:
+        executor = BatchExecutor.from_registration(registration_name, trigger=trigger)
+    _WORKER_EXECUTOR = executor
+
+
+def _run_worker_chunk(rows):
+    return _WORKER_EXECUTOR.run_chunk(rows)
+
+
+def run_batch(*definitions, func=None, rows=(), processes=None, chunk_size=None, trigger=None, callback_name=None):
+    """Shortcut for BatchExecutor(*definitions, func=func, ...).run(rows, ...)"""
+    executor = BatchExecutor(*definitions, func=func, callback_name=callback_name, trigger=trigger)
+    return executor.run(rows, processes=processes, chunk_size=chunk_size)
@@ -0,0 +1,376 @@
+"""
+Blob store logic.   Keep large callback values on the server and only send a small reference to the browser.
+  - values are content addressed (sha256 of the serialized bytes), so storing the same value twice is free
+  - a reference is a small dict that can be put in a dcc.Store, DashHelper.get resolves it transparently
+  - numpy arrays are stored as .npy and memory mapped on read, tables use Arrow IPC when pyarrow is installed
+  - the file store uses atomic renames so gunicorn workers can share one directory, it is the default (in the temp
+    directory) because a reference written by one worker is usually read back by another
+"""
+import collections
+import hashlib
+import io
+import logging
+import os
+import pickle
+import re
+import tempfile
+import threading
+import time
+from abc import ABC, abstractmethod
+
+LOGGER = logging.getLogger('dash_helper')
+
+BLOB_REF_KEY = '__dh_blob__'
+
+BLOB_KIND_NUMPY = 'numpy'
+BLOB_KIND_ARROW = 'arrow'
+BLOB_KIND_PICKLE = 'pickle'
+
+_BLOB_EXTENSIONS = {BLOB_KIND_NUMPY: '.npy', BLOB_KIND_ARROW: '.arrow', BLOB_KIND_PICKLE: '.pkl'}
+_BLOB_KEY_RE = re.compile(r'^[0-9a-f]{64}$')
+
+DEFAULT_BLOB_MAX_BYTES = 1024 * 1024 * 1024
+DEFAULT_BLOB_TTL = 24 * 60 * 60
+DEFAULT_BLOB_DIRECTORY_NAME = 'dash_helper_blobs'
+
+
+def is_blob_ref(value):
+    return isinstance(value, dict) and BLOB_REF_KEY in value
+
+
+def _validate_ref(ref):
+    if not is_blob_ref(ref):
+        raise ValueError(f"'{ref}' is not a blob reference")
+    key = ref[BLOB_REF_KEY]
+    kind = ref.get('kind', BLOB_KIND_PICKLE)
+    # keys come back from the browser, never use one that is not a plain sha256 hex digest
+    if not isinstance(key, str) or not _BLOB_KEY_RE.match(key) or kind not in _BLOB_EXTENSIONS:
+        raise ValueError(f"Invalid blob reference '{ref}'")
+    return key, kind
+
+
+def serialize_blob(value):
+    """
+    Serialize a value for the blob store.
+    :return: (kind, bytes)
+    """
+    module = type(value).__module__.split('.')[0]
+    if module == 'numpy' and type(value).__name__ == 'ndarray' and value.dtype.kind != 'O':
+        import numpy as np
+        buffer = io.BytesIO()
+        np.save(buffer, value, allow_pickle=False)
+        return BLOB_KIND_NUMPY, buffer.getvalue()
+
+    if module in ('pandas', 'pyarrow') and type(value).__name__ in ('DataFrame', 'Table'):
+        try:
+            import pyarrow as pa
+        except ImportError:
+            pa = None
+        if pa is not None:
+            table = value if isinstance(value, pa.Table) else pa.Table.from_pandas(value)
+            sink = pa.BufferOutputStream()
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+            return BLOB_KIND_ARROW, sink.getvalue().to_pybytes()
+
+    return BLOB_KIND_PICKLE, pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def deserialize_blob(kind, data):
+    """Inverse of serialize_blob for in-memory bytes."""
+    if kind == BLOB_KIND_NUMPY:
+        import numpy as np
+        return np.load(io.BytesIO(data), allow_pickle=False)
+    if kind == BLOB_KIND_ARROW:
+        import pyarrow as pa
+        table = pa.ipc.open_file(pa.py_buffer(data)).read_all()
+        return _arrow_to_value(table)
+    return pickle.loads(data)
+
+
+def _arrow_to_value(table):
+    if table.schema.metadata and b'pandas' in table.schema.metadata:
+        return table.to_pandas()
+    return table
+
+
+class BlobStore(ABC):
+    """
+    Base blob store.   Subclasses implement _write / _read / _delete / _evict.
+    :param max_bytes: total size after which least recently used blobs are evicted
+    :param ttl: seconds since last access after which a blob expires (None to never expire)
+    """
+
+    def __init__(self, max_bytes=DEFAULT_BLOB_MAX_BYTES, ttl=DEFAULT_BLOB_TTL):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+
+    def put(self, value):
+        """Store a value and return the reference to keep in the browser."""
+        kind, data = serialize_blob(value)
+        key = hashlib.sha256(data).hexdigest()
+        self._write(key, kind, data)
+        return {BLOB_REF_KEY: key, 'kind': kind, 'size': len(data)}
+
+    def get(self, ref):
+        """Return the value for a reference.   Raises ValueError if it has expired or been evicted."""
+        key, kind = _validate_ref(ref)
+        value = self._read(key, kind)
+        if value is None:
+            raise ValueError(f"Blob '{key}' has expired or been evicted")
+        return value
+
+    def contains(self, ref):
+        try:
+            key, kind = _validate_ref(ref)
+        except ValueError:
+            return False
+        return self._exists(key, kind)
+
+    def delete(self, ref):
+        key, kind = _validate_ref(ref)
+        self._delete(key, kind)
+
+    def evict(self):
+        """Remove expired blobs and the least recently used ones until the store is under max_bytes."""
+        self._evict()
+
+    @abstractmethod
+    def _write(self, key, kind, data):
+        raise NotImplementedError
+
+    @abstractmethod
+    def _read(self, key, kind):
+        raise NotImplementedError
+
+    @abstractmethod
+    def _exists(self, key, kind):
+        raise NotImplementedError
+
+    @abstractmethod
+    def _delete(self, key, kind):
+        raise NotImplementedError
+
+    @abstractmethod
+    def _evict(self):
+        raise NotImplementedError
+
+
+class MemoryBlobStore(BlobStore):
+    """
+    In-process blob store, values are kept as serialized bytes in an LRU ordered dict.   Only for a single worker
+    process, other workers can not resolve its references.
+    """
+
+    def __init__(self, max_bytes=256 * 1024 * 1024, ttl=DEFAULT_BLOB_TTL):
+        super().__init__(max_bytes=max_bytes, ttl=ttl)
+        self._blobs = collections.OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def _write(self, key, kind, data):
+        with self._lock:
+            if key in self._blobs:
+                self._blobs.move_to_end(key)
+                self._blobs[key] = (kind, self._blobs[key][1], time.time())
+            else:
+                self._blobs[key] = (kind, data, time.time())
+                self._size += len(data)
+        self._evict()
+
+    def _read(self, key, kind):
+        with self._lock:
+            entry = self._blobs.get(key)
+            if entry is None:
+                return None
+            if self.ttl is not None and time.time() - entry[2] > self.ttl:
+                del self._blobs[key]
+                self._size -= len(entry[1])
+                return None
+            self._blobs.move_to_end(key)
+            self._blobs[key] = (entry[0], entry[1], time.time())
+        return deserialize_blob(entry[0], entry[1])
+
+    def _exists(self, key, kind):
+        return key in self._blobs
+
+    def _delete(self, key, kind):
+        with self._lock:
+            entry = self._blobs.pop(key, None)
+            if entry is not None:
+                self._size -= len(entry[1])
+
+    def _evict(self):
+        now = time.time()
+        with self._lock:
+            # every access moves a blob to the end, so the expired ones are at the front
+            while self.ttl is not None and self._blobs:
+                key, entry = next(iter(self._blobs.items()))
+                if now - entry[2] <= self.ttl:
+                    break
+                del self._blobs[key]
+                self._size -= len(entry[1])
+            while self.max_bytes is not None and self._size > self.max_bytes and self._blobs:
+                key, entry = self._blobs.popitem(last=False)
+                self._size -= len(entry[1])
+
+
+class FileBlobStore(BlobStore):
+    """
+    Blob store in a local directory that can be shared by every worker on the host.
+    The file modification time is used as the last access time for LRU / TTL eviction.
+    :param directory: directory to keep blobs in, created with mode 0o700 if missing.   Blobs are unpickled on read, so
+        the directory must be owned by the current user and not writable by group or others
+    :param evict_interval: minimum seconds between eviction scans of the directory
+    """
+
+    def __init__(self, directory, max_bytes=DEFAULT_BLOB_MAX_BYTES, ttl=DEFAULT_BLOB_TTL, evict_interval=60):
+        super().__init__(max_bytes=max_bytes, ttl=ttl)
+        self.directory = str(directory)
+        self.evict_interval = evict_interval
+        self._last_evict = 0
+        os.makedirs(self.directory, mode=0o700, exist_ok=True)
+        check_private_directory(self.directory)
+
+    def _path(self, key, kind):
+        return os.path.join(self.directory, key[:2], key + _BLOB_EXTENSIONS[kind])
+
+    def _write(self, key, kind, data):
+        path = self._path(key, kind)
+        if os.path.exists(path):
+            os.utime(path)
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(data)
+                os.replace(tmp_path, path)
+            except Exception:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+
+        if time.time() - self._last_evict > self.evict_interval:
+            self._evict()
+
+    def _read(self, key, kind):
+        path = self._path(key, kind)
+        try:
+            mtime = os.path.getmtime(path)
+        except OSError:
+            return None
+        if self.ttl is not None and time.time() - mtime > self.ttl:
+            self._delete(key, kind)
+            return None
+
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+        if kind == BLOB_KIND_NUMPY:
+            import numpy as np
+            return np.load(path, mmap_mode='r', allow_pickle=False)
+        if kind == BLOB_KIND_ARROW:
+            import pyarrow as pa
+            table = pa.ipc.open_file(pa.memory_map(path, 'r')).read_all()
+            return _arrow_to_value(table)
+        with open(path, 'rb') as f:
+            return pickle.load(f)
+
+    def _exists(self, key, kind):
+        return os.path.exists(self._path(key, kind))
+
+    def _delete(self, key, kind):
+        try:
+            os.remove(self._path(key, kind))
+        except OSError:
+            pass
+
+    def _evict(self):
+        self._last_evict = time.time()
+        now = self._last_evict
+        entries = []
+        total = 0
+        for root, dirs, files in os.walk(self.directory):
+            for name in files:
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                if name.endswith('.tmp'):
+                    if now - stat.st_mtime > 3600:
+                        self._remove(path)
+                    continue
+                if self.ttl is not None and now - stat.st_mtime > self.ttl:
+                    self._remove(path)
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+                total += stat.st_size
+
+        if self.max_bytes is None or total <= self.max_bytes:
+            return
+        for mtime, size, path in sorted(entries):
+            self._remove(path)
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+GLOBAL_BLOB_STORE = None
+_BLOB_STORE_LOCK = threading.Lock()
+
+
+def register_blob_store(store):
+    """
+    Globally register the blob store used by dh.store.   Defaults to a FileBlobStore in the temp directory, shared by
+    the workers of one host, register a store on shared storage when workers run on several hosts.
+    """
+    global GLOBAL_BLOB_STORE
+    if store is not None and not isinstance(store, BlobStore):
+        raise ValueError(f"blob store must be a BlobStore, found {type(store)}")
+    GLOBAL_BLOB_STORE = store
+
+
+def get_blob_store():
+    global GLOBAL_BLOB_STORE
+    if GLOBAL_BLOB_STORE is None:
+        with _BLOB_STORE_LOCK:
+            if GLOBAL_BLOB_STORE is None:
+                GLOBAL_BLOB_STORE = FileBlobStore(default_blob_directory())
+    return GLOBAL_BLOB_STORE
+
+
+def check_private_directory(directory):
+    """
+    Raise ValueError unless directory is owned by the current user and not writable by group or others, so no other
+    local user can plant a file that is then unpickled.
+    """
+    if not hasattr(os, 'getuid'):
+        return
+    st = os.stat(directory)
+    if st.st_uid != os.getuid() or st.st_mode & 0o022:
+        error_msg = f"Blob store directory '{directory}' must be owned by uid {os.getuid()} and not writable by group " \
+                    f"or others (owner uid {st.st_uid}, mode {oct(st.st_mode & 0o777)}), refusing to use it"
+        LOGGER.error(error_msg)
+        raise ValueError(error_msg)
+
+
+def default_blob_directory():
+    """
+    Directory of the default FileBlobStore, per user so workers of different users do not share files.   The name is
+    predictable, FileBlobStore refuses it if another user created it first.
+    """
+    name = DEFAULT_BLOB_DIRECTORY_NAME
+    if hasattr(os, 'getuid'):
+        name = f"{name}_{os.getuid()}"
+    return os.path.join(tempfile.gettempdir(), name)
@@ -0,0 +1,43 @@
+"""
+Stale request cancellation logic.   'Latest wins' tracking of callback runs per (session, callback).
+  - every run takes a new generation number, a run is superseded as soon as a newer run of the same key starts
+  - superseded runs are skipped before func(dh) starts, or can stop early by checking dh.cancelled
+  - generations are tracked in process, only runs handled by the same worker process supersede each other
+"""
+import collections
+import itertools
+import threading
+
+DEFAULT_MAX_TRACKED_KEYS = 10000
+
+
+class GenerationTracker:
+    """Latest generation number per key, bounded to the most recently used keys."""
+
+    def __init__(self, max_keys=DEFAULT_MAX_TRACKED_KEYS):
+        self.max_keys = max_keys
+        self._latest = collections.OrderedDict()
+        self._sequence = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def begin(self, key):
+        """Start a new run for key and return its generation, superseding any earlier run."""
+        with self._lock:
+            generation = next(self._sequence)
+            self._latest[key] = generation
+            self._latest.move_to_end(key)
+            while len(self._latest) > self.max_keys:
+                self._latest.popitem(last=False)
+        return generation
+
+    def is_current(self, key, generation):
+        """True unless a newer run of key has started (keys dropped from the table are not cancelled)."""
+        latest = self._latest.get(key)
+        return latest is None or latest <= generation
+
+    def clear(self):
+        with self._lock:
+            self._latest.clear()
+
+
+GENERATIONS = GenerationTracker()
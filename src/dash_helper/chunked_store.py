@@ -0,0 +1,245 @@
+"""
+Chunked store logic.   Keep a large, growing list in a dcc.Store and only send what changed.
+  - the browser value is split into versioned chunks of chunk_size items, writes are sent as a dash.Patch holding the
+    new / changed chunks only, so an append costs the size of the delta instead of the size of the store
+  - the server keeps a copy of the chunks per session (session cache) keyed by version, reads rebuild the list from it
+    lazily, callbacks that do not declare the store's data as a State do not upload it at all
+  - when the browser's version is known (data is an Input / State) and does not match the server copy, the copy is
+    rebuilt from the browser
+  - when the server has no copy (evicted, expired or another worker) and the browser value is not known, an append
+    only adds chunks and flags the store 'resync', the next callback with data as a State rebuilds the copy from it
+"""
+import logging
+
+import dash
+
+from .fast_json import content_fingerprint
+from .payload import estimate_json_size
+
+LOGGER = logging.getLogger('dash_helper')
+
+CHUNKED_KEY = '__dh_chunked__'
+DEFAULT_CHUNK_SIZE = 500
+SESSION_KEY_PREFIX = 'chunked_store:'
+
+_MISSING = object()
+
+
+def is_chunked(value):
+    return isinstance(value, dict) and CHUNKED_KEY in value
+
+
+def _split(items, chunk_size):
+    return [items[idx:idx + chunk_size] for idx in range(0, len(items), chunk_size)]
+
+
+def chunked_data(items=(), chunk_size=DEFAULT_CHUNK_SIZE, version=0):
+    """
+    Browser value of a chunked store, e.g. the initial data of the layout:
+        dcc.Store(id='log', data=chunked_data())
+    """
+    items = list(items)
+    return {CHUNKED_KEY: chunk_size, 'version': version, 'length': len(items), 'chunks': _split(items, chunk_size)}
+
+
+def chunked_value(data):
+    """Flat list of a chunked store's browser value."""
+    return [item for chunk in data['chunks'] for item in chunk]
+
+
+class ChunkState:
+    """Server copy of a chunked store: chunks, their fingerprints and the version they belong to."""
+
+    def __init__(self, version, chunk_size, chunks, hashes=None, resync=False):
+        self.version = version
+        self.chunk_size = chunk_size
+        self.chunks = chunks
+        self.hashes = hashes if hashes is not None else [content_fingerprint(x) for x in chunks]
+        # the browser value is flagged for resync, the next write clears the flag
+        self.resync = resync
+        self._value = None
+
+    @classmethod
+    def from_data(cls, data):
+        return cls(data['version'], data[CHUNKED_KEY], [list(x) for x in data['chunks']],
+                   resync=bool(data.get('resync')))
+
+    @property
+    def length(self):
+        return sum(len(x) for x in self.chunks)
+
+    @property
+    def value(self):
+        """The flat list, built on first access."""
+        if self._value is None:
+            self._value = [item for chunk in self.chunks for item in chunk]
+        return self._value
+
+    def to_data(self):
+        return {CHUNKED_KEY: self.chunk_size, 'version': self.version, 'length': self.length, 'chunks': self.chunks}
+
+
+class ChunkedStore:
+    """
+    Read / write access to one chunked dcc.Store from a callback, see DashHelper.chunked_store.
+        log = dh.chunked_store('log')
+        log.append(new_lines)
+    """
+
+    def __init__(self, dh, component_id, chunk_size=DEFAULT_CHUNK_SIZE):
+        self.dh = dh
+        self.component_id = component_id
+        self.chunk_size = chunk_size
+        self.session_key = f"{SESSION_KEY_PREFIX}{component_id}"
+        self._state = _MISSING
+        self._browser_known = False
+        # writes of one callback go into one Patch (or one full value), a later write must not drop an earlier one
+        self._patch = None
+        self._full = False
+
+    @property
+    def state(self):
+        """The server copy checked against the browser value when the callback receives it, None if unknown."""
+        if self._state is not _MISSING:
+            return self._state
+        state = self.dh.session_cache.get(self.session_key)
+        browser = self.dh.get(self.component_id, 'data', default=_MISSING, allow_invalid=True, resolve_blob=False)
+        self._browser_known = browser is not _MISSING
+        if self._browser_known:
+            if not is_chunked(browser):
+                # the store holds its initial (or a cleared) value, anything the server kept is stale
+                state = None
+            elif state is None or state.version != browser['version'] or browser.get('resync'):
+                LOGGER.debug(f"[{self.dh._name}] chunked store '{self.component_id}' rebuilt from the browser value "
+                             f"(version {browser['version']})")
+                state = ChunkState.from_data(browser)
+                self._save(state)
+        self._state = state
+        return state
+
+    @property
+    def version(self):
+        state = self.state
+        return state.version if state is not None else None
+
+    @property
+    def value(self):
+        """The stored list, empty if nothing is known about the store."""
+        state = self.state
+        if state is None and not self._browser_known:
+            LOGGER.warning(f"[{self.dh._name}] chunked store '{self.component_id}' has no server copy and its data is "
+                           f"not an Input / State of the callback, its value is unknown")
+        return state.value if state is not None else []
+
+    def __len__(self):
+        state = self.state
+        return state.length if state is not None else 0
+
+    def _save(self, state):
+        self.dh.session_cache.set(self.session_key, state, size=estimate_json_size(state.chunks))
+
+    def _new_patch(self):
+        if self._patch is None:
+            self._patch = dash.Patch()
+        return self._patch
+
+    def _write(self, state, patch):
+        if patch is None or self._full:
+            self._full = True
+            value = state.to_data()
+        else:
+            patch['version'] = state.version
+            patch['length'] = state.length
+            if self._state is not None and self._state.resync:
+                patch['resync'] = False
+            value = patch
+        self._save(state)
+        self._state = state
+        self.dh.set(self.component_id, value, property_id='data')
+        return state.version
+
+    def append(self, items):
+        """
+        Append items to the store, only the filled up last chunk and the new chunks are sent.
+        :return: new version, None when the server copy is missing and the store is flagged for resync
+        """
+        items = list(items)
+        state = self.state
+        if state is None and self._browser_known:
+            return self._write(ChunkState(1, self.chunk_size, _split(items, self.chunk_size)), None)
+        if not items:
+            return state.version if state is not None else None
+        if state is None:
+            return self._append_unknown(items)
+
+        chunks = list(state.chunks)
+        hashes = list(state.hashes)
+        patch = self._new_patch()
+        if chunks and len(chunks[-1]) < state.chunk_size:
+            room = state.chunk_size - len(chunks[-1])
+            head, items = items[:room], items[room:]
+            chunks[-1] = chunks[-1] + head
+            hashes[-1] = content_fingerprint(chunks[-1])
+            patch['chunks'][len(chunks) - 1].extend(head)
+        for chunk in _split(items, state.chunk_size):
+            chunks.append(chunk)
+            hashes.append(content_fingerprint(chunk))
+            patch['chunks'].append(chunk)
+
+        return self._write(ChunkState(state.version + 1, state.chunk_size, chunks, hashes), patch)
+
+    def _append_unknown(self, items):
+        """
+        Append without knowing the browser value: only new chunks are added, the rest of the browser value is kept.
+        The store is flagged 'resync' (version 0) and no server copy is kept, so the next callback with the data as a
+        State rebuilds it from the browser.
+        """
+        LOGGER.warning(f"[{self.dh._name}] chunked store '{self.component_id}' has no server copy (evicted, expired or "
+                       f"another worker) and its data is not a State, appending without it, declare "
+                       f"State('{self.component_id}', 'data') to resync")
+        patch = self._new_patch()
+        for chunk in _split(items, self.chunk_size):
+            patch['chunks'].append(chunk)
+        patch['version'] = 0
+        patch['resync'] = True
+        self.dh.set(self.component_id, patch, property_id='data')
+        return None
+
+    def set(self, items):
+        """
+        Replace the stored list, only chunks whose content changed are sent.   Without a server copy the whole value
+        is sent, which replaces the browser value as asked.
+        :return: new version
+        """
+        items = list(items)
+        state = self.state
+        if state is None:
+            return self._write(ChunkState(1, self.chunk_size, _split(items, self.chunk_size)), None)
+
+        chunks = _split(items, state.chunk_size)
+        hashes = [content_fingerprint(x) for x in chunks]
+        patch = self._new_patch()
+        for idx, (chunk, chunk_hash) in enumerate(zip(chunks, hashes)):
+            if idx >= len(state.chunks):
+                patch['chunks'].append(chunk)
+            elif chunk_hash is None or chunk_hash != state.hashes[idx]:
+                patch['chunks'][idx] = chunk
+        # remove the chunks past the new end, last first so the indexes stay valid
+        for idx in range(len(state.chunks) - 1, len(chunks) - 1, -1):
+            del patch['chunks'][idx]
+
+        return self._write(ChunkState(state.version + 1, state.chunk_size, chunks, hashes), patch)
+
+    def clear(self):
+        """Empty the store."""
+        return self.set([])
+
+    def resend(self):
+        """Send the whole value again, e.g. after the browser store was reset."""
+        state = self.state
+        if state is None:
+            error_msg = f"[{self.dh._name}] chunked store '{self.component_id}' has no server copy to resend, declare " \
+                        f"State('{self.component_id}', 'data') to rebuild it from the browser"
+            LOGGER.error(error_msg)
+            raise ValueError(error_msg)
+        return self._write(ChunkState(state.version + 1, state.chunk_size, state.chunks, state.hashes), None)
@@ -0,0 +1,235 @@
+"""
+Clientside promotion logic.   Compile callbacks declared as simple mappings into app.clientside_callback.
+  - Passthrough copies an input / state value, Lookup maps a value (or the trigger id) through a table, Toggle picks
+    one of two values from a boolean (or an odd click count)
+  - the generated JavaScript runs in the browser, so these callbacks cost no request and no DashHelper construction
+  - the same mapping is kept as a Python function for DashHelperGen tests and the offline chain executor
+"""
+import json
+import logging
+import math
+from abc import ABC, abstractmethod
+from pathlib import Path
+
+import dash
+
+from .dash_helper import DashHelper, Input, State, Output, find_caller, format_callback_name, get_dash_helper_arg, \
+    has_pattern_ids, INPUT_FLAGS, STATE_FLAGS, OUTPUT_FLAGS
+from .registry import REGISTRY, CallbackRegistration
+from .schema import CallbackSchema, argument_columns
+
+LOGGER = logging.getLogger('dash_helper')
+
+# Lookup source meaning the id of the component that triggered the callback
+TRIGGER = '__trigger__'
+
+_JS_NO_UPDATE = 'window.dash_clientside.no_update'
+_JS_TRIGGER_ID = "(window.dash_clientside.callback_context.triggered.length ? " \
+                 "window.dash_clientside.callback_context.triggered[0].prop_id.split('.')[0] : null)"
+
+
+def _js_literal(value):
+    """JavaScript literal of a JSON serializable value, dash.no_update becomes dash_clientside.no_update."""
+    if value is dash.no_update:
+        return _JS_NO_UPDATE
+    return json.dumps(value, separators=(',', ':'))
+
+
+def js_key(value):
+    """String form of a lookup key, the same as javascript's String(value) for JSON values."""
+    if value is None:
+        return 'null'
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if isinstance(value, float) and math.isfinite(value) and value == int(value):
+        return str(int(value))
+    return str(value)
+
+
+class Mapping(ABC):
+    """Base class of the clientside mappings, source is 'id.prop' / 'id' of an Input or State (default first Input)."""
+
+    def __init__(self, source=None):
+        self.source = source
+
+    @abstractmethod
+    def js(self, arg):
+        """JavaScript expression computing the output from the source argument expression."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def apply(self, value):
+        """Python equivalent of js, used by the fallback function."""
+        raise NotImplementedError
+
+
+class Passthrough(Mapping):
+    """Output = source value"""
+
+    def js(self, arg):
+        return arg
+
+    def apply(self, value):
+        return value
+
+    def __repr__(self):
+        return f"Passthrough({self.source})"
+
+
+class Lookup(Mapping):
+    """
+    Output = table[source value], default (no_update unless given) for values not in the table.
+    Keys are compared as strings (javascript objects), use source=TRIGGER to map the trigger id.
+    """
+
+    def __init__(self, table, source=None, default=dash.no_update):
+        super().__init__(source)
+        self.table = {js_key(k): v for k, v in table.items()}
+        self.default = default
+
+    def js(self, arg):
+        return f"(function(t, k) {{ return Object.prototype.hasOwnProperty.call(t, k) ? t[k] : " \
+               f"{_js_literal(self.default)}; }})({_js_literal(self.table)}, String({arg}))"
+
+    def apply(self, value):
+        return self.table.get(js_key(value), self.default)
+
+    def __repr__(self):
+        return f"Lookup({self.source}, {len(self.table)} entries)"
+
+
+class Toggle(Mapping):
+    """Output = on if the source value is truthy (or an odd number with odd=True, e.g. n_clicks) else off."""
+
+    def __init__(self, on, off, source=None, odd=False):
+        super().__init__(source)
+        self.on = on
+        self.off = off
+        self.odd = odd
+
+    def js(self, arg):
+        test = f"(({arg} || 0) % 2 === 1)" if self.odd else f"!!({arg})"
+        return f"({test} ? {_js_literal(self.on)} : {_js_literal(self.off)})"
+
+    def apply(self, value):
+        test = (value or 0) % 2 == 1 if self.odd else bool(value)
+        return self.on if test else self.off
+
+    def __repr__(self):
+        return f"Toggle({self.source}, odd={self.odd})"
+
+
+def _source_index(name, columns, source):
+    if source is None:
+        return 0
+    for idx, (full_name, short_name) in enumerate(columns):
+        if source in (full_name, short_name):
+            return idx
+    error_msg = f"[{name}] clientside mapping source '{source}' is not an Input or State of the callback"
+    LOGGER.error(error_msg)
+    raise ValueError(error_msg)
+
+
+def generate_js(schema, mappings):
+    """Source of the clientside function for the mappings (one per output, in output order)."""
+    columns = argument_columns(schema)
+    arg_names = [f"a{idx}" for idx in range(len(columns))]
+    expressions = []
+    for mapping in mappings:
+        if mapping.source == TRIGGER:
+            expressions.append(mapping.js(_JS_TRIGGER_ID))
+        else:
+            expressions.append(mapping.js(arg_names[_source_index(schema.name, columns, mapping.source)]))
+    result = expressions[0] if len(expressions) == 1 else '[' + ', '.join(expressions) + ']'
+    return f"function({', '.join(arg_names)}) {{\n    return {result};\n}}"
+
+
+def dash_helper_clientside(*args, **kwargs):
+    """
+    Register a callback declared as a mapping as a clientside callback:
+        show_panel = dash_helper_clientside(Output('panel', 'style'), Input('show', 'value'),
+                                            mapping=Toggle({'display': 'block'}, {'display': 'none'}))
+    :param mapping: a Mapping, or a list of one Mapping per Output
+    Other arguments are the dash_helper ones (app, callback_name, dash_app_name, prevent_initial_call, ...).
+    :return: the python fallback function, fallback(dh) returns the same outputs as the javascript, its 'js'
+             attribute holds the generated source
+    """
+    my_kwargs = kwargs.copy()
+    mappings = get_dash_helper_arg(my_kwargs, 'mapping')
+    if isinstance(mappings, Mapping):
+        mappings = [mappings]
+    app = get_dash_helper_arg(my_kwargs, 'app')
+    if app is None:
+        app = dash.get_app()
+    dash_app_name = get_dash_helper_arg(my_kwargs, 'dash_app_name')
+    callback_name = get_dash_helper_arg(my_kwargs, 'callback_name') or 'clientside'
+    cb_path, cb_line = find_caller()
+    cb_file = Path(cb_path).stem
+    if not dash_app_name:
+        dash_app_name = cb_file
+    cb_name_str = format_callback_name(dash_app_name, callback_name)
+
+    flat_args = []
+
+    def flatten(items):
+        if isinstance(items, (list, tuple)):
+            for item in items:
+                flatten(item)
+        else:
+            flat_args.append(items.to_obj() if isinstance(items, (Input, State, Output)) else items)
+
+    flatten(args)
+    defined_inputs = [x for x in flat_args if isinstance(x, dash.Input)]
+    defined_states = [x for x in flat_args if isinstance(x, dash.State)]
+    defined_outputs = [x for x in flat_args if isinstance(x, dash.Output)]
+
+    if not mappings or not all(isinstance(x, Mapping) for x in mappings):
+        error_msg = f"[{cb_name_str}] dash_helper_clientside requires a 'mapping' argument, a Mapping or list of them"
+        LOGGER.error(error_msg)
+        raise ValueError(error_msg)
+    if len(mappings) != len(defined_outputs):
+        error_msg = f"[{cb_name_str}] {len(mappings)} mappings found for {len(defined_outputs)} outputs"
+        LOGGER.error(error_msg)
+        raise ValueError(error_msg)
+    if has_pattern_ids(defined_inputs, defined_states, defined_outputs):
+        error_msg = f"[{cb_name_str}] pattern matching callbacks can not be promoted to clientside"
+        LOGGER.error(error_msg)
+        raise ValueError(error_msg)
+
+    registration = REGISTRY.register(CallbackRegistration(
+        cb_name_str, app, dash_app_name, callback_name, cb_file, cb_path, cb_line,
+        defined_inputs, defined_states, defined_outputs,
+        options={'clientside': True, 'prevent_initial_call': my_kwargs.get('prevent_initial_call', False)},
+    ))
+    schema = CallbackSchema.build(registration.name, defined_inputs, defined_states, defined_outputs,
+                                  INPUT_FLAGS, STATE_FLAGS, OUTPUT_FLAGS)
+    registration.schema = schema
+    columns = argument_columns(schema)
+    js = generate_js(schema, mappings)
+
+    def fallback(dh):
+        """Python version of the generated javascript."""
+        values = []
+        for mapping in mappings:
+            if mapping.source == TRIGGER:
+                values.append(mapping.apply(dh.trigger_id))
+            else:
+                full_name = columns[_source_index(registration.name, columns, mapping.source)][0]
+                key, _, prop = full_name.rpartition('.')
+                values.append(mapping.apply(dh.get(key, prop)))
+        return tuple(values) if len(values) > 1 else values[0]
+
+    def run_standalone(values, triggered=None):
+        dh = DashHelper(defined_inputs, defined_states, defined_outputs, values, callback_name=callback_name,
+                        standalone_mode=True, schema=schema, triggered=triggered)
+        return_value = fallback(dh)
+        dh.set_list(return_value if isinstance(return_value, tuple) else [return_value])
+        return dh
+
+    app.clientside_callback(js, *flat_args, **my_kwargs)
+    fallback.__name__ = callback_name
+    fallback.js = js
+    registration.func = fallback
+    registration.run_standalone = run_standalone
+    LOGGER.debug(f"[{cb_name_str}] registered as a clientside callback:\n{js}")
+    return fallback
@@ -0,0 +1,183 @@
+"""
+Correlation ID logic.   Track the correlation id of the current callback without writing to the flask session.
+  - the current id lives in a context variable, so it follows the request / thread that set it
+  - ids are generated straight from os.urandom instead of building uuid objects
+  - the optional 'utils.tracing_context' integration is resolved once, not on every call
+  - propagation is pluggable, the flask session backend is opt-in and only writes when the value changes
+  - the session cache (and latest_wins / per_session caching, which use its session id) still writes the flask session
+    once, when the session id is created on first use, see session_cache.get_session_id
+  - each callback invocation runs in its own correlation_scope, a fresh id that is reset when the callback returns, so
+    an id never leaks into the next request served by the same thread
+"""
+import contextlib
+import contextvars
+import logging
+import os
+
+LOGGER = logging.getLogger('dash_helper')
+
+CORRELATION_ID_HEADER = 'X-Correlation-ID'
+SESSION_CORRELATION_KEY = 'current_correlation_id'
+
+_CORRELATION_ID = contextvars.ContextVar('dash_helper_correlation_id', default=None)
+
+_TRACING_RESOLVED = False
+_TRACING_GET_CONTEXT = None
+_TRACING_SET_ID = None
+
+
+class CorrelationBackend:
+    """
+    Default propagation backend.   The id is only kept in the context variable, nothing is persisted.
+    Subclass and override load / store to propagate the id somewhere else (session, headers, ...).
+    """
+
+    def load(self):
+        """Return a previously persisted id, or None if there is nothing to reuse."""
+        return None
+
+    def store(self, value):
+        """Persist the id.   Called every time set_correlation_id assigns a value."""
+        return None
+
+
+class FlaskSessionCorrelationBackend(CorrelationBackend):
+    """
+    Persist the correlation id in the flask session.   The session is only written when the value actually changes,
+    so flask does not re-sign and resend the session cookie on every callback.
+
+    :param key: session key to store the id under
+    :param reuse: if True, an id already in the session is reused instead of generating a new one per callback
+    """
+
+    def __init__(self, key=SESSION_CORRELATION_KEY, reuse=False):
+        self.key = key
+        self.reuse = reuse
+
+    def load(self):
+        if not self.reuse:
+            return None
+
+        from flask import has_request_context, session
+        if not has_request_context():
+            return None
+
+        try:
+            return session.get(self.key)
+        except Exception:
+            return None
+
+    def store(self, value):
+        from flask import has_request_context, session
+        if not has_request_context():
+            return
+
+        try:
+            if session.get(self.key) != value:
+                session[self.key] = value
+        except Exception as e:
+            LOGGER.debug(f"Unable to store correlation id in session: {e}")
+
+
+_BACKEND = CorrelationBackend()
+
+
+def register_correlation_backend(backend):
+    """
+    Globally register the correlation id propagation backend.   Pass None to go back to the context-only default.
+    """
+    global _BACKEND
+    if backend is None:
+        backend = CorrelationBackend()
+    elif not isinstance(backend, CorrelationBackend):
+        raise ValueError(f"Correlation backend must be a CorrelationBackend, found {type(backend)}")
+    _BACKEND = backend
+
+
+def _resolve_tracing():
+    """Look up the optional tracing integration once and remember the outcome (including failure)."""
+    global _TRACING_RESOLVED, _TRACING_GET_CONTEXT, _TRACING_SET_ID
+    if not _TRACING_RESOLVED:
+        try:
+            from utils.tracing_context import get_trace_context, set_trace_correlation_id
+            _TRACING_GET_CONTEXT = get_trace_context
+            _TRACING_SET_ID = set_trace_correlation_id
+        except Exception:
+            _TRACING_GET_CONTEXT = None
+            _TRACING_SET_ID = None
+        _TRACING_RESOLVED = True
+
+    return _TRACING_GET_CONTEXT, _TRACING_SET_ID
+
+
+def new_correlation_id():
+    """Generate a random uuid4 formatted id."""
+    raw = bytearray(os.urandom(16))
+    raw[6] = (raw[6] & 0x0F) | 0x40
+    raw[8] = (raw[8] & 0x3F) | 0x80
+    h = raw.hex()
+    return f"{h[:8]}-{h[8:12]}-{h[12:16]}-{h[16:20]}-{h[20:]}"
+
+
+def get_correlation_id(default=None):
+    """Return the correlation id of the current context."""
+    value = _CORRELATION_ID.get()
+    if value is None:
+        return default
+    return value
+
+
+def set_correlation_id(new_id=None, overwrite=False):
+    """
+    Establish the correlation id for the current context.
+    :param new_id: explicit id to use
+    :param overwrite: if True always assign a new id, even if the tracing integration / backend already has one
+    :return: the active correlation id
+    """
+    get_trace_context, set_trace_correlation_id = _resolve_tracing()
+
+    if not overwrite and not new_id:
+        existing = None
+        if get_trace_context is not None:
+            try:
+                existing = get_trace_context().get(CORRELATION_ID_HEADER)
+            except Exception:
+                existing = None
+        if not existing:
+            existing = _BACKEND.load()
+        if existing:
+            _CORRELATION_ID.set(existing)
+            return existing
+
+    val = new_id or new_correlation_id()
+    _CORRELATION_ID.set(val)
+
+    if set_trace_correlation_id is not None:
+        try:
+            set_trace_correlation_id(val)
+        except Exception:
+            pass
+
+    _BACKEND.store(val)
+    return val
+
+
+@contextlib.contextmanager
+def correlation_scope(new_id=None):
+    """
+    Establish a correlation id (see set_correlation_id) for the duration of the block and restore the previous one
+    afterwards.   dash_helper runs every callback invocation in its own scope.
+    """
+    token = _CORRELATION_ID.set(None)
+    try:
+        yield set_correlation_id(new_id)
+    finally:
+        _CORRELATION_ID.reset(token)
+
+
+class CorrelationIdFilter(logging.Filter):
+    """Logging filter that adds 'correlation_id' to every record so it can be used in format strings."""
+
+    def filter(self, record):
+        record.correlation_id = _CORRELATION_ID.get() or '-'
+        return True
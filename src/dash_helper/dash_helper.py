@@ -5,17 +5,29 @@ Dash helper logic.   Simplify the passing of data into and out of a dash callbac
   - enhanced logging / debugging
   - easier to detach callback to allow for standalone testing
 """
-import inspect
+import os
+import sys
+import types
 import dash
 from pathlib import Path
 from dash.dependencies import ComponentIdType
 import json
 import logging
 import copy
+import time
 from datetime import datetime, timezone
-from urllib.parse import parse_qs
 
-from tabulate import tabulate
+
+from .correlation import set_correlation_id, get_correlation_id, correlation_scope
+from .tracing import get_tracer, start_span, NOOP_SPAN, STATUS_OK, STATUS_ERROR
+from .metrics import METRICS, METRIC_QUEUE_WAIT, COUNTER_SHED, COUNTER_CACHE_HIT, COUNTER_CACHE_MISS
+from .registry import REGISTRY, CallbackRegistration
+from .payload import PayloadSizeConfig, PAYLOAD_MODE_EXACT, PAYLOAD_MODE_ESTIMATE, json_size, estimate_json_size, \
+    format_size
+from .cancellation import GENERATIONS
+from .deadline import CallbackTimeout, SharedRelease, run_with_deadline, timeout_result
+from .schema import CallbackSchema
+from .limits import CallbackLimiter, CallbackOverloaded, PRIORITY_INTERACTIVE, OVERLOAD_PREVENT_UPDATE
 
 LOGGER = logging.getLogger('dash_helper')
 
@@ -26,6 +38,10 @@ IO_OUTPUT = 'output'
 LOG_EVENT_NO_CHANGE = 'no_change'
 LOG_EVENT_ERROR = 'error'
 LOG_EVENT_COMPLETED = 'completed'
+LOG_EVENT_CANCELLED = 'cancelled'
+LOG_EVENT_SHED = 'shed'
+LOG_EVENT_TIMEOUT = 'timeout'
+LOG_EVENT_CACHED = 'cached'
 
 TRIGGER_LOG_ALL = 'all'
 TRIGGER_LOG_DISPLAY_LABEL = 'display_value'
@@ -76,8 +92,13 @@ class DashHelper:
                  dash_app_name=None, callback_name=None, debug=False, location_id=None,
                  log_on_exit=False, cb_file=None, cb_path=None, cb_line=None, standalone_mode = False,
                  trigger_id=None, trigger_prop=None, skip_no_callback=False, prevent_initial_update=False,
-                 func=None, max_display_size=DEFAULT_MAX_DISPLAY_SIZE):
+                 func=None, max_display_size=DEFAULT_MAX_DISPLAY_SIZE,
+                 inputs_list=None, states_list=None, outputs_list=None, session_id=None, timeout=None,
+                 schema=None, triggered=None):
         self.standalone_mode = standalone_mode
+        if standalone_mode and triggered is None and trigger_id is not None:
+            triggered = standalone_triggered(inputs_def, args, trigger_id, trigger_prop)
+        self._standalone_triggered = triggered
         if self.standalone_mode is False:
             self.ctx = dash.callback_context
         else:
@@ -90,7 +111,9 @@ class DashHelper:
         self.log_on_exit = log_on_exit
         self.location_id = location_id
         self.location_pathname = None
+        self.location_search = None
         self.location_hash = None
+        self.route = None
         for trigger_field in TRIGGER_FIELDS.values():
             setattr(self, trigger_field, None)
         self.trigger_prop = None
@@ -105,6 +128,19 @@ class DashHelper:
         self.skip_no_callback = skip_no_callback
         self.prevent_initial_update = prevent_initial_update
         self.max_display_size = max_display_size
+        self.memory_profile = None
+        self.payload_sizes = None
+        self.large_outputs = {}
+        self._blobs = {}
+        self._chunked_stores = {}
+        self.session_id = session_id
+        self._session_cache = None
+        self._generation = None
+        self.queue_wait = None
+        self.handler_name = None
+        self.timeout = None
+        self.deadline = None
+        self.set_deadline(timeout)
 
         if args is None:
             args = []
@@ -120,98 +156,57 @@ class DashHelper:
         self._start = datetime.now(tz=timezone.utc)
         self.debug = self.is_debug(debug)
 
+        # Keys, properties and flags come from the callback schema, built once per callback at registration
+        if schema is None:
+            schema = CallbackSchema.build(self._name, inputs_def, states_def, outputs_def,
+                                          INPUT_FLAGS, STATE_FLAGS, OUTPUT_FLAGS,
+                                          has_patterns=has_pattern_ids(inputs_def, states_def, outputs_def))
+        self.schema = schema
+
         # Dash passes arguments as a flattened list: [...inputs, ...states]
         # We map these values back to their definitions based on the order they were defined.
-        num_inputs = len(inputs_def)
+        num_inputs = len(schema.inputs)
         input_vals = args[:num_inputs]
         state_vals = args[num_inputs:]
 
-        co_obj = CallOrigin('__init__', depth=1)
-
-        # Map inputs
-        count = 0
-        for definition, val in zip(inputs_def, input_vals):
-            count += 1
-            try:
-                key, prop = self._make_key(definition, co_obj=co_obj)
-            except Exception as e:
-                error_msg = f"[{self._name}] Unable to process input ({count}) '{definition.component_id}': {e}"
-                LOGGER.error(error_msg, exc_info=True)
-                raise ValueError(error_msg)
-
+        for (key, prop, flags), val in zip(schema.inputs, input_vals):
             if key not in self._inputs:
                 self._inputs[key] = {}
                 self._inputs_flags[key] = {}
-
-            self._inputs_flags[key][prop] = {}
-            for flag_name, flag_default in INPUT_FLAGS.items():
-                if hasattr(definition, flag_name):
-                    self._inputs_flags[key][prop][flag_name] = getattr(definition, flag_name)
-                else:
-                    self._inputs_flags[key][prop][flag_name] = flag_default
-
+            self._inputs_flags[key][prop] = flags
             self._inputs[key][prop] = val
 
-        # Map states
-        count = 0
-        for definition, val in zip(states_def, state_vals):
-            count += 1
-            try:
-                key, prop = self._make_key(definition, co_obj=co_obj)
-            except Exception as e:
-                error_msg = f"[{self._name}] Unable to process input ({count}) '{definition.component_id}': {e}"
-                LOGGER.error(error_msg, exc_info=True)
-                raise ValueError(error_msg)
-
+        for (key, prop, flags), val in zip(schema.states, state_vals):
             if key not in self._states:
                 self._states[key] = {}
                 self._states_flags[key] = {}
-
-            self._states_flags[key][prop] = {}
-            for flag_name, flag_default in STATE_FLAGS.items():
-                if hasattr(definition, flag_name):
-                    self._states_flags[key][prop][flag_name] = getattr(definition, flag_name)
-                else:
-                    self._states_flags[key][prop][flag_name] = flag_default
-
+            self._states_flags[key][prop] = flags
             self._states[key][prop] = val
 
-        # Make sure there are no duplicate input & state
-        for key in self._inputs:
-            if key not in self._states:
-                continue
-
-            for prop in self._inputs[key]:
-                if prop in self._states[key]:
-                    error_msg = f"[{self._name}] input and state both have key='{key}' and property='{prop}'"
-                    LOGGER.error(error_msg)
-                    raise ValueError(error_msg)
-
-        # Map outputs
-        count = 0
-        for definition in outputs_def:
-            count += 1
-            try:
-                key, prop = self._make_key(definition, co_obj=co_obj)
-            except Exception as e:
-                error_msg = f"[{self._name}] Unable to process input ({count}) '{definition.component_id}': {e}"
-                LOGGER.error(error_msg, exc_info=True)
-                raise ValueError(error_msg)
-            self._output_order.append({'key': key, 'prop': prop})
-
+        self._output_order = list(schema.output_order)
+        for key, prop, flags in schema.outputs:
             if key not in self._outputs:
                 self._outputs[key] = {}
                 self._outputs_flags[key] = {}
-
-            self._outputs_flags[key][prop] = {}
-            for flag_name, flag_default in OUTPUT_FLAGS.items():
-                if hasattr(definition, flag_name):
-                    self._outputs_flags[key][prop][flag_name] = getattr(definition, flag_name)
-                else:
-                    self._outputs_flags[key][prop][flag_name] = flag_default
-
+            self._outputs_flags[key][prop] = flags
             self._outputs[key][prop] = dash.no_update
 
+        # Pattern matching (ALL / MATCH / ALLSMALLER) ids are indexed by their concrete id
+        self._pattern_index = {}
+        self._pattern_ids = {}
+        self._pattern_output_ids = {}
+        if schema.has_patterns:
+            if self.ctx is not None:
+                inputs_list = self.ctx.inputs_list if inputs_list is None else inputs_list
+                states_list = self.ctx.states_list if states_list is None else states_list
+                outputs_list = self.ctx.outputs_list if outputs_list is None else outputs_list
+            # dash does not wrap the outputs_list of a single output callback
+            if outputs_list is not None and len(outputs_def) == 1:
+                outputs_list = [outputs_list]
+            self._index_patterns(IO_INPUT, inputs_def, inputs_list)
+            self._index_patterns(IO_STATE, states_def, states_list)
+            self._index_patterns(IO_OUTPUT, outputs_def, outputs_list)
+
         if location_id:
             self._find_location()
 
@@ -307,22 +302,20 @@ class DashHelper:
         return control_id, control_property
 
     def _find_location(self):
-        location_component = self._states.get(self.location_id, {})
+        # the location properties can be Inputs (e.g. a page routing callback) or States
+        location_component = dict(self._states.get(self.location_id, {}))
+        location_component.update(self._inputs.get(self.location_id, {}))
         self.location_pathname = location_component.get('pathname', None)
         self.location_hash = location_component.get('hash', None)
-        params = location_component.get('search', None)
-        if params:
-            # Remove leading '?' if present
-            if params.startswith('?'):
-                params = params[1:]
+        self.location_search = location_component.get('search', None)
+        # parsed query strings are cached, the same search string is only parsed once
+        from .router import parse_query
+        self.location_params = parse_query(self.location_search)
 
-            # Parse query string into a dictionary
-            parsed_params = parse_qs(params)
-
-            # parse_qs returns values as lists, flatten them if single value
-            self.location_params = {k: v[0] if len(v) == 1 else v for k, v in parsed_params.items()}
-        else:
-            self.location_params = {}
+    def match_route(self, router):
+        """Match the callback's location against a Router, sets and returns dh.route (None if no route matches)."""
+        self.route = router.match(self.location_pathname, self.location_search)
+        return self.route
 
     def process_trigger(self):
         self.trigger_prop = None
@@ -331,29 +324,34 @@ class DashHelper:
         self.trigger_dict = {}
         self.raw_trigger_id = None
         self.trigger_id_str = None
+        self.trigger_instance = None
+        self._triggered_props = set()
         first_trigger_fields = {}
         for field in TRIGGER_FIELDS.keys():
             first_trigger_fields[field] = None
 
         if self.ctx is None:
-            return
-
-        try:
-            if not self.ctx.triggered:
+            # standalone mode, an explicit list of triggers in the callback_context.triggered format
+            triggered = self._standalone_triggered
+        else:
+            try:
+                triggered = self.ctx.triggered
+            except LookupError:
                 return
-        except LookupError:
+
+        if not triggered:
             return
 
-        self.raw_trigger_id = self.ctx.triggered
-        if isinstance(self.ctx.triggered, list) is False:
+        self.raw_trigger_id = triggered
+        if isinstance(triggered, list) is False:
             raise ValueError("Unexpected trigger")
 
-        if len(self.ctx.triggered) == 0:
+        if len(triggered) == 0:
             return None
 
-        self.trigger_count = len(self.ctx.triggered)
+        self.trigger_count = len(triggered)
 
-        for idx, trigger in enumerate(self.ctx.triggered):
+        for idx, trigger in enumerate(triggered):
             if isinstance(trigger, dict) is False:
                 raise ValueError("Unexpected trigger")
 
@@ -384,6 +382,8 @@ class DashHelper:
                     raise ValueError("Unexpected trigger prop_id")
 
                 trigger_id = trigger_dict.get('index') or trigger_dict.get('type') or 'unknown'
+                trigger_key = pattern_id_str(trigger_dict)
+                trigger_instance = trigger_dict
                 for field in trigger_dict.keys():
                     if field not in TRIGGER_FIELDS:
                         LOGGER.debug(f"Custom trigger field '{field}' found for trigger '{trigger_id}'")
@@ -392,6 +392,8 @@ class DashHelper:
                     this_trigger_fields[field] = trigger_dict.get(field, None)
             else:
                 trigger_id = trigger_tok[0]
+                trigger_key = trigger_id
+                trigger_instance = trigger_id
                 this_trigger_fields['type'] = trigger_tok[0]
 
             trigger_prop = trigger_tok[1]
@@ -403,19 +405,170 @@ class DashHelper:
                     setattr(self, field_name, val)
                 self.trigger_prop = trigger_prop
                 self.trigger_val = trigger_val
+                self.trigger_instance = trigger_instance
 
+            self._triggered_props.add((this_trigger_fields.get('type'), trigger_prop))
             temp_dict = {}
             for field, value in this_trigger_fields.items():
                 temp_dict[field] = value
             temp_dict['prop'] = trigger_prop
             temp_dict['value'] = trigger_val
-            self.trigger_dict[trigger_id] = copy.copy(temp_dict)
+            self.trigger_dict[trigger_key] = copy.copy(temp_dict)
 
         if self.trigger_idx:
             self.trigger_id_str = f"{self.trigger_id}:{self.trigger_idx}"
         else:
             self.trigger_id_str = self.trigger_id
 
+    def _index_patterns(self, io_type, definitions, callback_list):
+        """
+        Index the concrete ids of pattern matching definitions.   callback_list is dash's inputs_list / states_list /
+        outputs_list: one entry per definition, a list of {'id', 'property'} dicts for ALL / ALLSMALLER and a single
+        dict for MATCH.
+        """
+        if not callback_list:
+            return
+
+        for definition, entries in zip(definitions, callback_list):
+            if not is_pattern_id(definition.component_id):
+                continue
+
+            key, prop = self._make_key(definition)
+            if isinstance(entries, dict):
+                concrete_ids = [entries.get('id')]
+                positions = [None]
+            else:
+                concrete_ids = [entry.get('id') for entry in entries]
+                positions = list(range(len(concrete_ids)))
+
+            if io_type == IO_OUTPUT:
+                self._pattern_output_ids[(key, prop)] = concrete_ids if positions != [None] else concrete_ids[0]
+                for concrete_id, position in zip(concrete_ids, positions):
+                    self._pattern_index[(IO_OUTPUT, pattern_key(concrete_id), prop)] = (key, position)
+                continue
+
+            self._pattern_ids[(key, prop)] = concrete_ids
+            for concrete_id, position in zip(concrete_ids, positions):
+                self._pattern_index[(io_type, pattern_key(concrete_id), prop)] = (key, position)
+
+    def _pattern_slot(self, io_list, component_id, property_id):
+        id_key = pattern_key(component_id)
+        for io_type in io_list:
+            slot = self._pattern_index.get((io_type, id_key, property_id))
+            if slot is not None:
+                return io_type, slot[0], slot[1]
+        return None, None, None
+
+    def get_instance(self, component_id, property_id, default=None):
+        """
+        Value of one concrete instance of a pattern matching Input / State, e.g.
+            dh.get_instance({'type': 'row', 'index': 5}, 'value')
+        """
+        io_type, key, position = self._pattern_slot([IO_INPUT, IO_STATE], component_id, property_id)
+        if io_type is None:
+            return default
+
+        value = self._get_io_dict(io_type)[key][property_id]
+        if position is None:
+            return value
+        if not isinstance(value, (list, tuple)) or position >= len(value):
+            return default
+        return value[position]
+
+    def get_all(self, component_type, property_id):
+        """
+        Columnar view of a pattern matching Input / State: {'id': [...], 'value': [...], <id field>: [...]} with one
+        entry per concrete instance, in the order dash passed them.
+        """
+        concrete_ids = self._pattern_ids.get((component_type, property_id))
+        if concrete_ids is None:
+            error_msg = f"[{self._name}] Pattern matching input/state '{component_type}' property '{property_id}' was not found"
+            LOGGER.error(error_msg)
+            raise ValueError(error_msg)
+
+        if component_type in self._inputs and property_id in self._inputs[component_type]:
+            values = self._inputs[component_type][property_id]
+        else:
+            values = self._states[component_type][property_id]
+        if not isinstance(values, (list, tuple)):
+            values = [values]
+
+        columns = {'id': list(concrete_ids), 'value': list(values)}
+        for concrete_id in concrete_ids:
+            for field in concrete_id:
+                if field != 'type' and field not in columns:
+                    columns[field] = [x.get(field) for x in concrete_ids]
+        return columns
+
+    def output_ids(self, component_type, property_id):
+        """Concrete ids of a pattern matching Output, in the order its values must be returned."""
+        if (component_type, property_id) not in self._pattern_output_ids:
+            error_msg = f"[{self._name}] Pattern matching output '{component_type}' property '{property_id}' was not found"
+            LOGGER.error(error_msg)
+            raise ValueError(error_msg)
+        return self._pattern_output_ids[(component_type, property_id)]
+
+    def set_all(self, component_type, property_id, values):
+        """
+        Set every instance of an ALL / ALLSMALLER Output.   values can be
+          - a list in output id order
+          - a dict keyed by the id's 'index' (instances not in the dict are not updated)
+          - a callable taking the concrete id dict and returning the value
+        """
+        concrete_ids = self.output_ids(component_type, property_id)
+        if not isinstance(concrete_ids, list):
+            error_msg = f"[{self._name}] Output '{component_type}' property '{property_id}' is a MATCH output, use set_match"
+            LOGGER.error(error_msg)
+            raise ValueError(error_msg)
+
+        if callable(values):
+            output_values = [values(concrete_id) for concrete_id in concrete_ids]
+        elif isinstance(values, dict):
+            output_values = [values.get(concrete_id.get('index'), dash.no_update) for concrete_id in concrete_ids]
+        else:
+            output_values = list(values)
+            if len(output_values) != len(concrete_ids):
+                error_msg = f"[{self._name}] set_all '{component_type}' property '{property_id}' passed {len(output_values)} values, expecting {len(concrete_ids)}"
+                LOGGER.error(error_msg)
+                raise ValueError(error_msg)
+
+        self._outputs[component_type][property_id] = output_values
+
+    def set_match(self, component_type, property_id, value):
+        """Set the value of a MATCH Output (the single instance matching the triggering input)."""
+        concrete_id = self.output_ids(component_type, property_id)
+        if isinstance(concrete_id, list):
+            error_msg = f"[{self._name}] Output '{component_type}' property '{property_id}' is an ALL output, use set_all or set_instance"
+            LOGGER.error(error_msg)
+            raise ValueError(error_msg)
+        self._outputs[component_type][property_id] = value
+
+    def set_instance(self, component_id, property_id, value):
+        """Set one concrete instance of a pattern matching Output, e.g. dh.set_instance({'type': 'row', 'index': 5}, 'style', {...})"""
+        io_type, key, position = self._pattern_slot([IO_OUTPUT], component_id, property_id)
+        if io_type is None:
+            error_msg = f"[{self._name}] Pattern matching output '{component_id}' property '{property_id}' was not found"
+            LOGGER.error(error_msg)
+            raise ValueError(error_msg)
+
+        if position is None:
+            self._outputs[key][property_id] = value
+            return
+
+        current = self._outputs[key][property_id]
+        if not isinstance(current, list):
+            current = [dash.no_update] * len(self._pattern_output_ids[(key, property_id)])
+            self._outputs[key][property_id] = current
+        current[position] = value
+
+    @property
+    def trigger_position(self):
+        """Position of the triggering instance within its pattern matching Input (None if not a pattern trigger)."""
+        if not isinstance(self.trigger_instance, dict):
+            return None
+        io_type, key, position = self._pattern_slot([IO_INPUT], self.trigger_instance, self.trigger_prop)
+        return position
+
     @property
     def triggered_id(self):
         """Returns the ID of the component that triggered the callback."""
@@ -448,6 +601,55 @@ class DashHelper:
 
         return output_list
 
+    def output_sizes(self, mode=PAYLOAD_MODE_EXACT):
+        """
+        Serialized size (bytes) of each output that has been set, keyed by 'component_id.property'.
+        Outputs that are still dash.no_update are not included.
+        :param mode: 'exact' to serialize with the plotly JSON encoder, 'estimate' for the fast estimator
+        """
+        size_func = json_size if mode == PAYLOAD_MODE_EXACT else estimate_json_size
+
+        sizes = {}
+        for output_field in self._output_order:
+            key = output_field['key']
+            prop = output_field['prop']
+            value = self._outputs.get(key, {}).get(prop, dash.no_update)
+            if value is dash.no_update:
+                continue
+            try:
+                sizes[f"{key}.{prop}"] = size_func(value)
+            except Exception as e:
+                LOGGER.debug(f"[{self._name}] Unable to size output '{key}.{prop}': {e}")
+        return sizes
+
+    def measure_payload(self, config):
+        """
+        Measure output sizes per the PayloadSizeConfig, storing them in payload_sizes and the ones over the
+        configured limit in large_outputs.
+        """
+        self.payload_sizes = self.output_sizes(mode=config.mode)
+        limit = config.large_output_kb * 1024 if config.large_output_kb is not None else None
+        self.large_outputs = {}
+        if limit is not None:
+            for output_name, output_size in self.payload_sizes.items():
+                if output_size >= limit:
+                    self.large_outputs[output_name] = output_size
+        return self.payload_sizes
+
+    @property
+    def large_outputs_str(self):
+        """Log friendly list of the outputs flagged as large, e.g. 'graph.figure=2.3MB'."""
+        return ', '.join(f"{name}={format_size(size)}" for name, size in self.large_outputs.items())
+
+    def span(self, name, **attributes):
+        """
+        Start a trace span for a sub operation of the callback, e.g.
+            with dh.span('load_data', rows=len(df)):
+                ...
+        Returns a no-op span when tracing is disabled or the callback is not sampled.
+        """
+        return start_span(name, attributes=attributes)
+
     @property
     def debug_str(self):
         """Returns a string displaying the value of the callback."""
@@ -471,7 +673,7 @@ class DashHelper:
                 output += f"    {input_id}:\n"
                 for property, property_val in input_val.items():
                     trigger = ' '
-                    if input_id in self.trigger_dict and self.trigger_dict[input_id].get('prop') == property:
+                    if (input_id, property) in self._triggered_props:
                         trigger = '*'
 
                     if self.get_property_input(input_id, property, FIELD_DISPLAY_DATA, True):
@@ -547,7 +749,6 @@ class DashHelper:
             if key in io_dict:
                 if prop is None:
                     if len(self._outputs[key]) != 1:
-                        caller_frame = inspect.stack()[1]
                         error_msg = f"[{self._name}] io='{io_type}' component_id='{component_id}' has multiple properties defined ({co_obj})"
                         LOGGER.error(error_msg)
                         raise ValueError(error_msg)
@@ -565,8 +766,12 @@ class DashHelper:
 
         return None, component_id, property_id
 
-    def get(self, component_id, property_id=None, default=None, allow_invalid=False):
-        """Retrieve a callback's Input or State value by its ID."""
+    def get(self, component_id, property_id=None, default=None, allow_invalid=False, resolve_blob=True):
+        """
+        Retrieve a callback's Input or State value by its ID.
+        Blob store references (see dh.store) are resolved to the stored value, and chunked stores (see
+        dh.chunked_store) to their list, unless resolve_blob is False.
+        """
         # We force allow_invalid=True to support returning the default value if not found
         co_obj = CallOrigin('get', depth=2)
         io_dict, key, prop = self._find_callback_io_dict([IO_INPUT, IO_STATE], component_id,
@@ -577,7 +782,113 @@ class DashHelper:
         if io_dict is None:
             return default
 
-        return io_dict[key][prop]
+        value = io_dict[key][prop]
+        if resolve_blob and isinstance(value, dict):
+            from .blob_store import is_blob_ref
+            from .chunked_store import is_chunked
+            if is_blob_ref(value):
+                return self._resolve_blob(key, prop, value)
+            if is_chunked(value):
+                return self.chunked_store(key).value
+        return value
+
+    @property
+    def store(self):
+        """
+        Server side blob store, keep large values out of the browser:
+            dh.set('data-store', 'data', dh.store.put(df))
+        The reference is resolved back to the value by dh.get() in later callbacks.
+        """
+        from .blob_store import get_blob_store
+        return get_blob_store()
+
+    @property
+    def session_cache(self):
+        """
+        Server side cache scoped to the browser session, shared by every callback of the session:
+            df = dh.session_cache.get_or_set('filtered', lambda: filter_df(raw, dh['filter']))
+        In standalone mode the session_id passed to DashHelperGen is used.
+        """
+        if self._session_cache is None:
+            from .session_cache import SessionCache, get_session_cache_backend, get_session_id, STANDALONE_SESSION_ID
+            if self.session_id is None:
+                self.session_id = STANDALONE_SESSION_ID if self.standalone_mode else get_session_id()
+            self._session_cache = SessionCache(get_session_cache_backend(), self.session_id)
+        return self._session_cache
+
+    def chunked_store(self, component_id, chunk_size=None):
+        """
+        Chunked access to a dcc.Store holding a large list, writes only send the changed chunks as a dash.Patch:
+            dh.chunked_store('log').append(new_lines)
+        The store is read from the server copy of the session (lazily rebuilt), its data only needs to be an Input /
+        State of the callback to check the copy against the browser.
+        :param chunk_size: items per chunk, default chunked_store.DEFAULT_CHUNK_SIZE
+        """
+        store = self._chunked_stores.get(component_id)
+        if store is None:
+            from .chunked_store import ChunkedStore, DEFAULT_CHUNK_SIZE
+            store = ChunkedStore(self, component_id, chunk_size=chunk_size or DEFAULT_CHUNK_SIZE)
+            self._chunked_stores[component_id] = store
+        return store
+
+    def begin_generation(self, tracker, name):
+        """
+        Start a 'latest wins' run of the callback for the current session, superseding earlier runs of the same session.
+        Without a session id the run can not be superseded.
+        """
+        session_id = self.session_id
+        if session_id is None:
+            from .session_cache import get_session_id, STANDALONE_SESSION_ID
+            session_id = STANDALONE_SESSION_ID if self.standalone_mode else get_session_id()
+        if session_id is None:
+            return None
+        key = (session_id, name)
+        self._generation = (tracker, key, tracker.begin(key))
+        return self._generation[2]
+
+    @property
+    def cancelled(self):
+        """
+        True once a newer run of this callback has started for the same session (latest_wins=True).
+        Long running callbacks can check it to stop early, the result of a cancelled run is discarded.
+        """
+        if self._generation is None:
+            return False
+        tracker, key, generation = self._generation
+        return not tracker.is_current(key, generation)
+
+    def set_deadline(self, timeout):
+        """Set the callback deadline to timeout seconds from now (None to remove it)."""
+        self.timeout = timeout
+        self.deadline = time.monotonic() + timeout if timeout is not None else None
+
+    def remaining(self):
+        """Seconds left before the deadline (0 once it has passed), None if the callback has no timeout."""
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - time.monotonic())
+
+    @property
+    def timed_out(self):
+        return self.deadline is not None and time.monotonic() >= self.deadline
+
+    def check_deadline(self):
+        """Raise CallbackTimeout if the deadline has passed, call it between slow steps of a long callback."""
+        if self.timed_out:
+            raise CallbackTimeout(f"did not complete within {self.timeout}s")
+
+    def _resolve_blob(self, key, prop, ref):
+        cache_key = (key, prop)
+        if cache_key not in self._blobs:
+            from .blob_store import get_blob_store
+            try:
+                with start_span('blob_get', attributes={'component': f"{key}.{prop}", 'size': ref.get('size')}):
+                    self._blobs[cache_key] = get_blob_store().get(ref)
+            except ValueError as e:
+                error_msg = f"[{self._name}] component_id='{key}' property_id='{prop}': {e}"
+                LOGGER.error(error_msg)
+                raise ValueError(error_msg)
+        return self._blobs[cache_key]
 
     def __getitem__(self, item):
         """Dictionary-style access for Inputs and States (e.g., dh['my-id'])."""
@@ -601,36 +912,156 @@ class DashHelper:
             key = component_id.split(':')[0] if ':' in component_id else component_id
 
         if key and key in self._outputs and property_id is not None:
-            # If value is a valid property name but property_id is not (and not a list or a dict), they are likely swapped
-            if isinstance(value, dict) is False and isinstance(value, list) is False and \
-                    value in self._outputs[key] and property_id not in self._outputs[key]:
+            # If value is a valid property name but property_id is not, they are likely swapped
+            if isinstance(value, str) and value in self._outputs[key] and property_id not in self._outputs[key]:
                 value, property_id = property_id, value
 
         io_dict, key, prop = self._find_callback_io_dict([IO_OUTPUT], component_id, property_id=property_id,
                                                          co_obj=co_obj)
         io_dict[key][prop] = value
 
+    def set_figure(self, component_id, fig, property_id='figure', n_out=None, width=None, method='lttb',
+                   relayout=True):
+        """
+        Downsample the scatter traces of a figure (LTTB or min-max) and set it as an output.
+        With relayout, the graph's relayoutData (an Input or State of the callback) restricts the full resolution data
+        to the zoomed x range first, so zooming in re-queries the detail of that range.
+        :param n_out: target points per trace, default width * 2
+        :param width: graph width in pixels, default the figure layout width
+        :param method: 'lttb' or 'minmax'
+        :return: {'points': original point count, 'downsampled': output point count}
+        """
+        from .downsample import downsample_figure, relayout_range
+
+        x_range = None
+        if relayout:
+            x_range = relayout_range(self.get(component_id, 'relayoutData', allow_invalid=True))
+        fig, stats = downsample_figure(fig, n_out=n_out, width=width, method=method, x_range=x_range)
+        self.set(component_id, fig, property_id=property_id, co_obj=CallOrigin('set_figure', depth=2))
+        return stats
+
+    def set_table_page(self, component_id, dataset, page_size=None):
+        """
+        Set a DataTable's 'data' to the visible page of a server-held dataset.
+        The table's page_current, page_size, sort_by and filter_query are read from the Inputs / States of the callback
+        (missing ones use defaults), the table should use page_action / sort_action / filter_action='custom'.
+        'page_count' is also set when it is an output of the callback.
+        :param dataset: TableDataset, or a DataFrame (its TableDataset is created on first use and reused)
+        :param page_size: page size when the table's page_size is not an Input / State
+        :return: number of rows after filtering
+        """
+        from .datatable import table_dataset
+
+        co_obj = CallOrigin('set_table_page', depth=2)
+        records, page_count, row_count = table_dataset(dataset).page(
+            page_current=self.get(component_id, 'page_current', allow_invalid=True),
+            page_size=self.get(component_id, 'page_size', allow_invalid=True) or page_size,
+            sort_by=self.get(component_id, 'sort_by', allow_invalid=True),
+            filter_query=self.get(component_id, 'filter_query', allow_invalid=True),
+        )
+        self.set(component_id, records, property_id='data', co_obj=co_obj)
+        key = component_id.get('type') if isinstance(component_id, dict) else component_id
+        if 'page_count' in self._outputs.get(key, {}):
+            self.set(component_id, page_count, property_id='page_count', co_obj=co_obj)
+        return row_count
+
     def set_dict(self, output_dict):
-        """ Take a dictionary of output and associated values and call set method on each one """
-        co_obj = CallOrigin('set', depth=2)
-        for component_id, value in output_dict.items():
-            key, prop = self._make_key(component_id, helper=IO_OUTPUT, co_obj=co_obj)
-            self.set(component_id=component_id, property_id=prop, value=value, co_obj=co_obj)
+        """ Take a dictionary of output and associated values and set each one """
+        self.set_many(output_dict)
 
     def set_list(self, output_list):
-        """ Take a dictionary of output and associated values and call set method on each one """
+        """ Take a list of values in callback output order and set each one """
         output_list_len = len(output_list)
         output_callback_len = len(self._output_order)
         if output_list_len != output_callback_len:
-            error_msg = f"[{self._name}] set_list passed {output_list_len}, expecting {output_callback_len} {self._output_order}"
+            expected = [f"{x['key']}.{x['prop']}" for x in self._output_order]
+            error_msg = f"[{self._name}] set_list passed {output_list_len}, expecting {output_callback_len} {expected}"
             LOGGER.error(error_msg)
             raise ValueError(error_msg)
 
-        for idx in range(output_list_len):
-            key = self._output_order[idx]['key']
-            prop = self._output_order[idx]['prop']
-            value = output_list[idx]
-            self.set(component_id=key, property_id=prop, value=value)
+        # keys come from the callback definition, so they do not need to be validated again
+        for output_field, value in zip(self._output_order, output_list):
+            self._outputs[output_field['key']][output_field['prop']] = value
+
+    def _resolve_output_key(self, component_id, property_id=None):
+        """
+        Resolve an output key to (key, prop) without raising.
+        :return: (key, prop, error) where error is None if the output exists
+        """
+        if isinstance(component_id, (tuple, list)) and len(component_id) == 2 and property_id is None:
+            component_id, property_id = component_id
+
+        if isinstance(component_id, (dash.Output, Output)):
+            key, prop = component_id.component_id, component_id.component_property
+        elif isinstance(component_id, str) and ':' in component_id and property_id is None:
+            key, _, prop = component_id.partition(':')
+        else:
+            key, prop = component_id, property_id
+
+        if isinstance(key, dict):
+            key = key.get('type')
+        if not isinstance(key, str):
+            return key, prop, f"'{component_id}' is not a str or dict id"
+
+        props = self._outputs.get(key)
+        if props is None:
+            return key, prop, f"'{key}' is not an output (valid {list(self._outputs.keys())})"
+        if prop is None:
+            if len(props) != 1:
+                return key, prop, f"'{key}' has multiple properties {list(props.keys())}, one must be specified"
+            prop = next(iter(props))
+        elif not isinstance(prop, str) or prop not in props:
+            return key, prop, f"'{key}' property '{prop}' is not an output (valid {list(props.keys())})"
+        return key, prop, None
+
+    def set_many(self, outputs):
+        """
+        Set several outputs at once.   All keys are validated in one pass and every invalid key is reported in a
+        single error, nothing is set if any key is invalid or if two keys resolve to the same output.   Like set, a
+        (component_id, property_id, value) entry whose property_id and value are swapped is corrected.
+        :param outputs: mapping of key -> value, or a sequence of (key, value) / (component_id, property_id, value)
+                        tuples.   A key is 'id', 'id:prop', (id, prop), a dict id or an Output.
+        """
+        if isinstance(outputs, dict):
+            items = [(key, None, value) for key, value in outputs.items()]
+        else:
+            items = []
+            for item in outputs:
+                if len(item) == 3:
+                    items.append(item)
+                elif len(item) == 2:
+                    items.append((item[0], None, item[1]))
+                else:
+                    error_msg = f"[{self._name}] set_many entry '{item}' should be (key, value) or (component_id, property_id, value)"
+                    LOGGER.error(error_msg)
+                    raise ValueError(error_msg)
+
+        resolved = []
+        errors = []
+        seen = set()
+        for component_id, property_id, value in items:
+            key, prop, error = self._resolve_output_key(component_id, property_id)
+            if error and property_id is not None and isinstance(value, str):
+                # property_id and value swapped, e.g. ('graph', fig, 'figure')
+                swapped_key, swapped_prop, swapped_error = self._resolve_output_key(component_id, value)
+                if swapped_error is None:
+                    key, prop, error, value = swapped_key, swapped_prop, None, property_id
+            if error:
+                errors.append(error)
+            elif (key, prop) in seen:
+                errors.append(f"'{key}' property '{prop}' is set more than once")
+            else:
+                seen.add((key, prop))
+                resolved.append((key, prop, value))
+
+        if errors:
+            error_msg = f"[{self._name}] set_many has {len(errors)} invalid output(s) (op={CallOrigin('set_many', depth=2)}): " + '; '.join(errors)
+            LOGGER.error(error_msg)
+            raise ValueError(error_msg)
+
+        outputs_dict = self._outputs
+        for key, prop, value in resolved:
+            outputs_dict[key][prop] = value
 
     def view_output(self, component_id, property_id=None, default=None, allow_invalid=False):
         """Retrieve a callback's output ID."""
@@ -694,7 +1125,8 @@ class DashHelper:
         raise ValueError(f"Unexpected debug value type={type(debug)} value='{debug}'")
 
     def callback_log_done(self, log_level, event, message, show_debug=False, exc_info=False):
-        if not self.debug and event != LOG_EVENT_NO_CHANGE and event != LOG_EVENT_ERROR:
+        if not self.debug and event not in (LOG_EVENT_NO_CHANGE, LOG_EVENT_ERROR, LOG_EVENT_TIMEOUT) and \
+                self.memory_profile is None:
             return
         if exc_info is False:
             exc_info = event == LOG_EVENT_ERROR
@@ -707,6 +1139,13 @@ class DashHelper:
             base_msg = f"[{self._name}:None]"
 
         output = f"{base_msg} {message} (time={dur}s)"
+        if self.queue_wait:
+            output += f" (queue_wait={self.queue_wait:.3f}s)"
+        if self.memory_profile:
+            from .memory_profile import format_memory_profile
+            output += f" ({format_memory_profile(self.memory_profile)})"
+        if self.large_outputs:
+            output += f" (large outputs: {self.large_outputs_str})"
 
         if show_debug is True:
             output += f"\n{self.debug_str}"
@@ -719,6 +1158,66 @@ class DashHelper:
     def __str__(self):
         return self.debug_str
 
+_WILDCARD_TYPE = type(dash.ALL)
+
+
+def is_pattern_id(component_id):
+    """True if the component id is a dict containing an ALL / MATCH / ALLSMALLER wildcard"""
+    if not isinstance(component_id, dict):
+        return False
+    for value in component_id.values():
+        if isinstance(value, _WILDCARD_TYPE):
+            return True
+    return False
+
+
+def has_pattern_ids(*definition_lists):
+    """True if any Input / State / Output of the lists uses a pattern matching id"""
+    for definitions in definition_lists:
+        for definition in definitions:
+            if is_pattern_id(definition.component_id):
+                return True
+    return False
+
+
+def pattern_id_str(component_id):
+    """Canonical string for a (concrete) component id, the same form dash uses in prop_ids"""
+    if isinstance(component_id, dict):
+        return json.dumps(component_id, sort_keys=True, separators=(',', ':'))
+    return component_id
+
+
+def standalone_triggered(inputs_def, args, trigger_id, trigger_prop=None):
+    """
+    callback_context.triggered style list for a standalone trigger.   The value is the matching Input's value, the
+    property defaults to the first Input of trigger_id.
+    """
+    value = None
+    for definition, arg in zip(inputs_def, args or []):
+        if definition.component_id != trigger_id and not (
+                isinstance(trigger_id, dict) and isinstance(definition.component_id, dict)
+                and definition.component_id.get('type') == trigger_id.get('type')):
+            continue
+        if trigger_prop is None:
+            trigger_prop = definition.component_property
+        if definition.component_property == trigger_prop:
+            value = arg
+            break
+
+    if trigger_prop is None:
+        error_msg = f"Unable to find the property of trigger '{trigger_id}', it is not an Input"
+        LOGGER.error(error_msg)
+        raise ValueError(error_msg)
+    return [{'prop_id': f"{pattern_id_str(trigger_id)}.{trigger_prop}", 'value': value}]
+
+
+def pattern_key(component_id):
+    """Hashable key for a (concrete) component id, cheaper to build than pattern_id_str"""
+    if isinstance(component_id, dict):
+        return tuple(sorted(component_id.items()))
+    return component_id
+
+
 def get_comp_id_index1(component):
     if isinstance(component, dict):
         component_id = component['type']
@@ -792,6 +1291,49 @@ def format_callback_name(dash_app_name, callback_name):
         cb_name_str = 'invalid'
     return cb_name_str
 
+_PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def find_caller():
+    """(filename, line) of the first frame outside the dash_helper package, i.e. the code registering the callback"""
+    frame = sys._getframe(1)
+    while frame is not None and os.path.dirname(os.path.abspath(frame.f_code.co_filename)) == _PACKAGE_DIR:
+        frame = frame.f_back
+    if frame is None:
+        return '<unknown>', 0
+    return frame.f_code.co_filename, frame.f_lineno
+
+
+# Layout scans keyed by (app, layout), every callback of an app registered against the same layout shares one scan
+_LAYOUT_SCAN_CACHE = {}
+
+
+def get_layout_control_ids(app, dash_app_name, callback_name, layout=None, component_ids=None):
+    """
+    find_control_ids, cached per app / layout.   The layout is scanned again if one of component_ids is not in the
+    cached scan, in case components were added to the layout after an earlier callback was registered.
+    """
+    source = layout if layout is not None else getattr(app, 'layout', None)
+    cache_key = (id(app), id(source))
+    cached = _LAYOUT_SCAN_CACHE.get(cache_key)
+    if cached is not None and cached[0] is app and cached[1] is source:
+        control_ids = cached[2]
+        missing = False
+        for component_id in component_ids or ():
+            if isinstance(component_id, dict):
+                component_id = component_id.get('type')
+            if component_id not in control_ids:
+                missing = True
+                break
+        if not missing:
+            return control_ids
+
+    control_ids = find_control_ids(app, dash_app_name, callback_name, layout=layout)
+    if source is not None:
+        _LAYOUT_SCAN_CACHE[cache_key] = (app, source, control_ids)
+    return control_ids
+
+
 def find_control_ids(app, dash_app_name, callback_name, layout=None):
     # Find location component ID
     control_ids = {}
@@ -803,7 +1345,9 @@ def find_control_ids(app, dash_app_name, callback_name, layout=None):
         app_layout = app.layout
 
     elif callable(layout):
-        set_uuid(overwrite=True)
+        # the layout function may log, give it a correlation id but keep one the caller already set
+        if get_uuid() is None:
+            set_uuid()
         app_layout = layout()
 
     else:
@@ -812,16 +1356,25 @@ def find_control_ids(app, dash_app_name, callback_name, layout=None):
     if not app_layout:
         raise ValueError('app has a layout but it is is not populated')
 
+    # pattern matching ids share a 'type', only the full dict id has to be unique
+    pattern_ids = set()
+
     try:
         def find_controls(dash_app_name, callback_name, component, my_control_ids):
             if hasattr(component, 'id'):
                 my_type = type(component).__name__
+                is_repeat_pattern = False
                 if isinstance(component.id, dict) and 'type' in component.id:
                     control_id = component.id['type']
+                    id_str = pattern_id_str(component.id)
+                    is_repeat_pattern = id_str not in pattern_ids and my_control_ids.get(control_id) == my_type
+                    pattern_ids.add(id_str)
                 else:
                     control_id = component.id
 
-                if control_id in my_control_ids:
+                if is_repeat_pattern:
+                    pass
+                elif control_id in my_control_ids:
                     callback_name_str = format_callback_name(dash_app_name, callback_name)
                     raise ValueError(f"Control ID '{control_id}' has been used multiple times in the layout "
                                      f"'{callback_name_str}' first='{my_control_ids[control_id]}' second='{my_type}'")
@@ -856,7 +1409,34 @@ def validate_component(app, dash_app_name, callback_name, component_group, compo
                 cb_name_str = format_callback_name(dash_app_name, callback_name)
                 raise ValueError(f"App '{app.title}' callback '{cb_name_str}' has {component_group} id '{component_id}' that is not found on layout.   Valid component ids are {list(layout_component_ids.keys())}")
 
-def add_location_info(flat_args, location_id, defined_states, args):
+LOCATION_ATTRIBUTES = frozenset(('location_pathname', 'location_search', 'location_hash', 'location_params',
+                                 'match_route'))
+
+
+# (app id, location id) of the apps already warned about callbacks without their Location
+_DETACHED_LOCATION_WARNED = set()
+
+
+def references_location(func):
+    """
+    True if the function (or a function nested in it) accesses one of the DashHelper location attributes.
+    Only the function's own code is inspected, helpers it calls (router.dispatch(dh), CallbackDispatcher handlers,
+    ...) are not, callbacks reading the location through them need location=True.
+    """
+    code = getattr(func, '__code__', None)
+    if code is None:
+        code = getattr(getattr(func, '__call__', None), '__code__', None)
+    codes = [code] if code is not None else []
+    while codes:
+        code = codes.pop()
+        if not LOCATION_ATTRIBUTES.isdisjoint(code.co_names):
+            return True
+        codes.extend(x for x in code.co_consts if isinstance(x, types.CodeType))
+    return False
+
+
+def add_location_info(flat_args, location_id, defined_states):
+    """Add the Location pathname / search / hash States missing from the callback, returns the added States"""
     location_pathname_found = False
     location_search_found = False
     location_hash_found = False
@@ -874,20 +1454,59 @@ def add_location_info(flat_args, location_id, defined_states, args):
         else:
             continue
 
+    new_states = []
     if not location_pathname_found:
-        new_state = dash.State(location_id, 'pathname')
-        defined_states.append(new_state)
-        args.append(new_state)
+        new_states.append(dash.State(location_id, 'pathname'))
 
     if not location_search_found:
-        new_state = dash.State(location_id, 'search')
-        defined_states.append(new_state)
-        args.append(new_state)
+        new_states.append(dash.State(location_id, 'search'))
 
     if not location_hash_found:
-        new_state = dash.State(location_id, 'hash')
-        defined_states.append(new_state)
-        args.append(new_state)
+        new_states.append(dash.State(location_id, 'hash'))
+
+    defined_states.extend(new_states)
+    return new_states
+
+def record_memory_profile(dh, profile, span, incomplete=False):
+    """
+    Stop a memory profile and attach the result to the DashHelper, metrics registry and trace span.
+    An incomplete profile (func still running past its deadline) is only logged, it is not aggregated in the metrics.
+    """
+    result = profile.stop(label=dh.trigger_id_str, incomplete=incomplete)
+    if not result:
+        return
+
+    dh.memory_profile = result
+    metrics = METRICS.callback(profile.name)
+    if incomplete:
+        metrics.increment('memory_profile_incomplete')
+        if span.is_recording:
+            span.set_attribute('dash_helper.memory.incomplete', True)
+        return
+    metrics.increment('memory_profiled')
+    metrics.observe('memory_peak_bytes', result['peak_bytes'])
+    metrics.observe('memory_net_bytes', result['net_bytes'])
+    if span.is_recording:
+        span.set_attribute('dash_helper.memory.peak_bytes', result['peak_bytes'])
+        span.set_attribute('dash_helper.memory.net_bytes', result['net_bytes'])
+        if result['snapshot_path']:
+            span.set_attribute('dash_helper.memory.snapshot_path', result['snapshot_path'])
+
+def record_payload_sizes(dh, config, metrics_name):
+    """Measure the outputs of a completed callback and aggregate the sizes in the metrics registry"""
+    try:
+        sizes = dh.measure_payload(config)
+    except Exception as e:
+        LOGGER.error(f"[{metrics_name}] Unable to measure payload size: {e}", exc_info=True)
+        return
+
+    metrics = METRICS.callback(metrics_name)
+    metrics.observe('response_bytes', sum(sizes.values()))
+    for output_name, output_size in sizes.items():
+        metrics.observe(f'output_bytes:{output_name}', output_size)
+    if dh.large_outputs:
+        metrics.increment('large_responses')
+        LOGGER.warning(f"[{metrics_name}] Large outputs: {dh.large_outputs_str}")
 
 def dash_helper(*args, **kwargs):
     """
@@ -922,10 +1541,8 @@ def dash_helper(*args, **kwargs):
 
     flatten(args)
 
-    caller_frame = inspect.stack()[2]
-    cb_path = caller_frame.filename
+    cb_path, cb_line = find_caller()
     cb_file = Path(cb_path).stem
-    cb_line = caller_frame.lineno
 
     my_kwargs = kwargs.copy()
     trigger_fields = my_kwargs.pop('extra_trigger_fields', None)
@@ -946,13 +1563,48 @@ def dash_helper(*args, **kwargs):
         dash_app_name = cb_file
 
     callback_name = get_dash_helper_arg(my_kwargs, 'callback_name')
+    cb_name_str = format_callback_name(dash_app_name, callback_name)
     skip_no_callback = get_dash_helper_arg(my_kwargs, 'skip_no_callback', False)
     debug = get_dash_helper_arg(my_kwargs, 'debug')
     log_on_exit = get_dash_helper_arg(my_kwargs, 'log_on_exit')
+    trace = get_dash_helper_arg(my_kwargs, 'trace')
+    memory_profile = get_dash_helper_arg(my_kwargs, 'memory_profile')
+    if memory_profile is not None:
+        from .memory_profile import MemoryProfileConfig
+        memory_profile = MemoryProfileConfig.from_arg(memory_profile)
+    payload_size = PayloadSizeConfig.from_arg(get_dash_helper_arg(my_kwargs, 'payload_size'))
+    latest_wins = get_dash_helper_arg(my_kwargs, 'latest_wins', False)
+    max_concurrency = get_dash_helper_arg(my_kwargs, 'max_concurrency')
+    queue_timeout = get_dash_helper_arg(my_kwargs, 'queue_timeout')
+    priority = get_dash_helper_arg(my_kwargs, 'priority', PRIORITY_INTERACTIVE)
+    on_overload = get_dash_helper_arg(my_kwargs, 'on_overload', OVERLOAD_PREVENT_UPDATE)
+    timeout = get_dash_helper_arg(my_kwargs, 'timeout')
+    timeout_thread = get_dash_helper_arg(my_kwargs, 'timeout_thread', False)
+    timeout_fallback = get_dash_helper_arg(my_kwargs, 'timeout_fallback', dash.no_update)
+    # the result cache and fast_json modules are only imported by callbacks using them
+    cache = get_dash_helper_arg(my_kwargs, 'cache')
+    if cache is not None and cache is not False:
+        from .result_cache import ResultCacheConfig
+        cache = ResultCacheConfig.from_arg(cache)
+    else:
+        cache = None
+    fast_json = get_dash_helper_arg(my_kwargs, 'fast_json')
+    if fast_json is not None and fast_json is not False:
+        from .fast_json import FastJSONConfig
+        fast_json = FastJSONConfig.from_arg(fast_json)
+    else:
+        fast_json = None
+    if timeout is not None and timeout <= 0:
+        error = f"[{cb_name_str}] timeout must be greater than 0, found {timeout}"
+        LOGGER.error(error)
+        raise ValueError(error)
     layout = get_dash_helper_arg(my_kwargs, 'layout')
     prevent_initial_update = kwargs.get('prevent_initial_update', False)
 
-    layout_component_ids = find_control_ids(app, dash_app_name, callback_name, layout=layout)
+    layout_component_ids = get_layout_control_ids(app, dash_app_name, callback_name, layout=layout,
+                                                  component_ids=[x.component_id for x in flat_args
+                                                                 if isinstance(x, (dash.Input, dash.State, dash.Output,
+                                                                                   Input, State, Output))])
     if len(layout_component_ids) == 0:
         error = f"Dash App '{app.title}' layout has no components found"
         LOGGER.error(error)
@@ -969,15 +1621,13 @@ def dash_helper(*args, **kwargs):
     validate_component(app, dash_app_name, callback_name, 'output', defined_outputs, layout_component_ids)
     location_id = next((k for k, v in layout_component_ids.items() if v == 'Location'), None)
 
-    # If a location is present in the layout, but not present in an input or states, add it in as a state
-    if location_id:
-        my_args = list(args)
-        add_location_info(flat_args, location_id, defined_states, my_args)
-        args = tuple(my_args)
+    location = get_dash_helper_arg(my_kwargs, 'location')
+    if location not in (None, True, False):
+        error = f"[{cb_name_str}] location must be True, False or None, found '{location}'"
+        LOGGER.error(error)
+        raise ValueError(error)
 
-    def display_dash_helper_init():
-        cb_name_str = format_callback_name(dash_app_name, callback_name)
-        debug_str = f"Registered Callback [{cb_name_str}] at {cb_file}:{cb_line} (prevent_initial_update={prevent_initial_update})\n"
+    def build_layout_info():
         layout_info = []
 
         for callback_component, component_type in layout_component_ids.items():
@@ -1044,31 +1694,196 @@ def dash_helper(*args, **kwargs):
                     'output': component_type,
                 })
 
+        return layout_info
+
+    registration = REGISTRY.register(CallbackRegistration(
+        cb_name_str, app, dash_app_name, callback_name, cb_file, cb_path, cb_line,
+        defined_inputs, defined_states, defined_outputs,
+        options={'prevent_initial_update': prevent_initial_update, 'debug': debug, 'latest_wins': latest_wins,
+                 'max_concurrency': max_concurrency, 'priority': priority, 'timeout': timeout,
+                 'cache': cache.ttl if cache is not None and cache.ttl else cache is not None,
+                 'fast_json': fast_json is not None,
+                 'prevent_initial_call': my_kwargs.get('prevent_initial_call', False)},
+        layout_info=build_layout_info,
+    ))
+
+    def build_schema():
+        return CallbackSchema.build(
+            registration.name, defined_inputs, defined_states, defined_outputs, INPUT_FLAGS, STATE_FLAGS, OUTPUT_FLAGS,
+            has_patterns=has_pattern_ids(defined_inputs, defined_states, defined_outputs))
+
+    registration.schema = build_schema()
+    if cache is not None:
+        if registration.schema.has_patterns:
+            error = f"[{cb_name_str}] cache is not supported for pattern matching callbacks"
+            LOGGER.error(error)
+            raise ValueError(error)
+        from .result_cache import CallbackCache
+        registration.cache = CallbackCache(registration.name, cache)
+    if fast_json is not None:
+        if registration.schema.has_patterns:
+            error = f"[{cb_name_str}] fast_json is not supported for pattern matching callbacks"
+            LOGGER.error(error)
+            raise ValueError(error)
+        from .fast_json import install as install_fast_json
+        if not install_fast_json():
+            fast_json = None
+    multi_output = len(defined_outputs) > 1
+    # runs of a MATCH callback only supersede runs of the same matched instance
+    match_instance = any(isinstance(value, _WILDCARD_TYPE) and value == dash.MATCH
+                         for definition in defined_outputs if isinstance(definition.component_id, dict)
+                         for value in definition.component_id.values())
+    if latest_wins and not getattr(getattr(app, 'server', None), 'secret_key', None):
+        LOGGER.warning(f"[{cb_name_str}] latest_wins needs the flask session to tell browser sessions apart, set "
+                       f"app.server.secret_key or superseded runs will not be cancelled")
+    metrics = METRICS.callback(registration.name)
+    limiter = CallbackLimiter(registration.name, max_concurrency=max_concurrency, queue_timeout=queue_timeout,
+                              priority=priority, on_overload=on_overload)
+
+    def display_dash_helper_init():
+        from tabulate import tabulate
+
+        debug_str = f"Registered Callback [{cb_name_str}] at {cb_file}:{cb_line} (prevent_initial_update={prevent_initial_update})\n"
+        layout_info = registration.layout_info
         table_str = tabulate(layout_info, headers='keys', tablefmt='psql')
         table_str = table_str.replace('\n', '\n' + DEBUG_INDENT)
         debug_str += DEBUG_INDENT + table_str + '\n'
         LOGGER.info(debug_str)
 
     def decorator(func):
-        @app.callback(*dash_args, **my_kwargs)
-        def wrapper(*cb_args):
+        nonlocal location_id
+
+        # The Location properties are only sent with callbacks that use them: explicit Location Inputs / States,
+        # location=True, or a function that references dh.location_* / dh.match_route
+        if location_id:
+            explicit_location = any(x.component_id == location_id for x in (*defined_inputs, *defined_states))
+            if location or (location is None and references_location(func)):
+                location_states = add_location_info(flat_args, location_id, defined_states)
+                if location_states:
+                    dash_args.extend(location_states)
+                    registration.schema = build_schema()
+            elif not explicit_location:
+                warn_key = (id(app), location_id)
+                # location=False is an explicit choice, only warn when the detection decided
+                if location is None and warn_key not in _DETACHED_LOCATION_WARNED:
+                    _DETACHED_LOCATION_WARNED.add(warn_key)
+                    LOGGER.warning(f"[{cb_name_str}] Location '{location_id}' is not attached to callbacks whose "
+                                   f"function does not reference dh.location_* / dh.match_route, pass location=True "
+                                   f"to callbacks reading it indirectly (router.dispatch(dh), helper functions, "
+                                   f"CallbackDispatcher handlers)")
+                else:
+                    LOGGER.debug(f"[{cb_name_str}] Location '{location_id}' not attached, the function does not "
+                                 f"reference it")
+                location_id = None
+        registration.options['location'] = location_id is not None
+
+        def begin_latest():
+            """Start a 'latest wins' generation of this callback for the session (and MATCH instance)."""
+            from .session_cache import get_session_id
+            session_id = get_session_id()
+            if session_id is None:
+                return None
+            key = (session_id, registration.name)
+            if match_instance:
+                outputs = dash.callback_context.outputs_list
+                first = outputs[0] if isinstance(outputs, list) and outputs else outputs
+                if isinstance(first, dict):
+                    key += (json.dumps(first.get('id'), sort_keys=True),)
+            return GENERATIONS, key, GENERATIONS.begin(key)
+
+        def run_callback(cb_args, span):
+            # a run supersedes older ones as soon as it arrives, before it waits for the cache or a concurrency slot
+            generation = begin_latest() if latest_wins else None
+
+            # the cache is checked before queueing, a hit does not wait for a concurrency slot
+            cache_key = None
+            if registration.cache is not None:
+                invocation_start = time.perf_counter()
+                try:
+                    triggered = dash.callback_context.triggered or None
+                except LookupError:
+                    triggered = None
+                if triggered is not None or (skip_no_callback is not True and prevent_initial_update is not True):
+                    session_id = None
+                    if registration.cache.config.per_session:
+                        from .session_cache import get_session_id
+                        session_id = get_session_id()
+                    with start_span('cache'):
+                        cache_key, cached_value, cache_hit = registration.cache.lookup(triggered, list(cb_args),
+                                                                                       session_id=session_id)
+                    trigger_id_str = triggered[0]['prop_id'].rsplit('.', 1)[0] if triggered else None
+                    if cache_hit:
+                        metrics.increment(COUNTER_CACHE_HIT)
+                        if debug:
+                            LOGGER.debug(f"[{cb_name_str}:{trigger_id_str}] Callback Result: Cached "
+                                         f"(time={time.perf_counter() - invocation_start}s)")
+                        span.set_attribute('dash_helper.status', LOG_EVENT_CACHED)
+                        metrics.record_invocation(time.perf_counter() - invocation_start, LOG_EVENT_CACHED,
+                                                  trigger=trigger_id_str)
+                        return cached_value
+                    if cache_key is not None:
+                        metrics.increment(COUNTER_CACHE_MISS)
+
+            if not limiter.active:
+                return execute_callback(cb_args, span, cache_key=cache_key, generation=generation)
+
+            with start_span('queue') as queue_span:
+                try:
+                    queue_wait, app_limit = limiter.acquire()
+                except CallbackOverloaded as e:
+                    LOGGER.warning(f"Callback Result: Shed, {e}")
+                    metrics.increment(COUNTER_SHED)
+                    metrics.observe(METRIC_QUEUE_WAIT, e.queue_wait)
+                    metrics.record_invocation(e.queue_wait, LOG_EVENT_SHED)
+                    span.set_attribute('dash_helper.status', LOG_EVENT_SHED)
+                    queue_span.set_attribute('dash_helper.queue_wait', e.queue_wait)
+                    limiter.shed(e)
+                queue_span.set_attribute('dash_helper.queue_wait', queue_wait)
+            metrics.observe(METRIC_QUEUE_WAIT, queue_wait)
+
+            # a func thread that overruns its deadline keeps the slot until it finishes
+            slot = SharedRelease(lambda: limiter.release(app_limit))
             try:
-                dh = DashHelper(defined_inputs, defined_states, defined_outputs, cb_args,
-                                dash_app_name=dash_app_name,
-                                callback_name=callback_name,
-                                debug=debug,
-                                cb_file=cb_file,
-                                cb_path=cb_path,
-                                cb_line=cb_line,
-                                log_on_exit=log_on_exit,
-                                location_id=location_id,
-                                skip_no_callback=skip_no_callback,
-                                prevent_initial_update=prevent_initial_update,
-                                )
+                return execute_callback(cb_args, span, queue_wait=queue_wait, slot=slot, cache_key=cache_key,
+                                        generation=generation)
+            finally:
+                slot.done()
+
+        def execute_callback(cb_args, span, queue_wait=None, slot=None, cache_key=None, generation=None):
+            invocation_start = time.perf_counter()
+            try:
+                with start_span('construct'):
+                    dh = DashHelper(defined_inputs, defined_states, defined_outputs, cb_args,
+                                    dash_app_name=dash_app_name,
+                                    callback_name=callback_name,
+                                    debug=debug,
+                                    cb_file=cb_file,
+                                    cb_path=cb_path,
+                                    cb_line=cb_line,
+                                    log_on_exit=log_on_exit,
+                                    location_id=location_id,
+                                    skip_no_callback=skip_no_callback,
+                                    prevent_initial_update=prevent_initial_update,
+                                    schema=registration.schema,
+                                    )
             except Exception as e:
                 LOGGER.error(f"Error in DashHelper: {e}", exc_info=True)
+                span.set_status(STATUS_ERROR, f"Error in DashHelper: {e}")
+                metrics.record_invocation(time.perf_counter() - invocation_start, LOG_EVENT_ERROR, error=True)
                 return dash.no_update
 
+            dh.queue_wait = queue_wait
+            if timeout is not None:
+                dh.set_deadline(timeout)
+            dh._generation = generation
+
+            if span.is_recording:
+                span.set_attributes({
+                    'dash_helper.trigger_id': str(dh.trigger_id_str),
+                    'dash_helper.trigger_prop': str(dh.trigger_prop),
+                    'dash_helper.trigger_count': dh.trigger_count,
+                })
+
             # Determine if logging functionality should be triggered
             trigger_match = False
             trigger_key = None
@@ -1152,20 +1967,49 @@ def dash_helper(*args, **kwargs):
                                 pass
 
             if trigger_match is True:
-                dash_helper_log_cb_handler(dh, trigger=TRIGGER_LOG_FUNC_START, sub_cfg=sub_cfg,
-                                           display_trigger_id=display_trigger_id)
+                with start_span('log_start'):
+                    dash_helper_log_cb_handler(dh, trigger=TRIGGER_LOG_FUNC_START, sub_cfg=sub_cfg,
+                                               display_trigger_id=display_trigger_id)
 
             # If no change, just return no update
             if dh.raw_trigger_id is None and (dh.skip_no_callback is True or dh.prevent_initial_update is True):
                 dh.callback_log_done(logging.DEBUG, LOG_EVENT_NO_CHANGE, "Callback Result: No change",
                                      show_debug=dh.log_on_exit)
+                span.set_attribute('dash_helper.status', LOG_EVENT_NO_CHANGE)
+                metrics.record_invocation(time.perf_counter() - invocation_start, LOG_EVENT_NO_CHANGE,
+                                          trigger=dh.trigger_id_str)
                 return dash.no_update
 
             status_code = 200
-            import time
+            status = LOG_EVENT_COMPLETED
             start_time = time.perf_counter()
             try:
-                return_value = func(dh)
+                # A superseded run is skipped before func starts, and its result discarded if it finished anyway
+                if not dh.cancelled:
+                    profile = None
+                    if memory_profile is not None:
+                        from .memory_profile import start_memory_profile
+                        profile = start_memory_profile(memory_profile, registration.name)
+                    still_running = False
+                    try:
+                        with start_span('func'):
+                            if timeout is not None and timeout_thread:
+                                return_value = run_with_deadline(func, dh, name=registration.name, slot=slot)
+                            else:
+                                return_value = func(dh)
+                    except CallbackTimeout as e:
+                        still_running = e.still_running
+                        raise
+                    finally:
+                        if profile is not None:
+                            record_memory_profile(dh, profile, span, incomplete=still_running)
+
+                if dh.cancelled:
+                    status = LOG_EVENT_CANCELLED
+                    dh.callback_log_done(logging.DEBUG, LOG_EVENT_CANCELLED,
+                                         "Callback Result: Cancelled, superseded by a newer request")
+                    span.set_attribute('dash_helper.status', LOG_EVENT_CANCELLED)
+                    return dash.no_update
 
                 # Use return value from method
                 if isinstance(return_value, tuple):
@@ -1173,26 +2017,127 @@ def dash_helper(*args, **kwargs):
                 elif return_value and return_value != dash.no_update:
                     dh.set_list([return_value,])
 
+                if payload_size is not None:
+                    record_payload_sizes(dh, payload_size, registration.name)
+
                 dh.callback_log_done(logging.INFO, LOG_EVENT_COMPLETED, "Callback Result: Completed",
                                      show_debug=dh.log_on_exit)
 
+                if span.is_recording:
+                    span.set_attribute('dash_helper.status', LOG_EVENT_COMPLETED)
+                    span.set_status(STATUS_OK)
+                    output_sizes = dh.payload_sizes if dh.payload_sizes is not None else \
+                        dh.output_sizes(mode=PAYLOAD_MODE_ESTIMATE)
+                    for output_name, output_size in output_sizes.items():
+                        span.set_attribute(f'dash_helper.output_bytes.{output_name}', output_size)
+
+                if cache_key is not None:
+                    registration.cache.store(cache_key, dh.return_value)
                 return dh.return_value
 
+            except CallbackTimeout as e:
+                status = LOG_EVENT_TIMEOUT
+                status_code = 504
+                dh.callback_log_done(logging.WARNING, LOG_EVENT_TIMEOUT, f"Callback Result: Timed out: {e}",
+                                     show_debug=dh.log_on_exit)
+                span.set_attribute('dash_helper.status', LOG_EVENT_TIMEOUT)
+                span.set_status(STATUS_ERROR, f"Callback Result: Timed out: {e}")
+                return timeout_result(timeout_fallback, dh)
+
             except Exception as e:
+                status = LOG_EVENT_ERROR
                 status_code = 500
                 dh.callback_log_done(logging.ERROR, LOG_EVENT_ERROR, f"Callback Result: Failed: {e}",
                                      show_debug=True, exc_info=True)
+                span.set_attribute('dash_helper.status', LOG_EVENT_ERROR)
+                span.set_status(STATUS_ERROR, f"Callback Result: Failed: {e}")
                 return dash.no_update
 
             finally:
+                span.set_attribute('dash_helper.status_code', status_code)
+                metrics.record_invocation(time.perf_counter() - invocation_start, status,
+                                          trigger=dh.trigger_id_str, error=status_code != 200,
+                                          snapshot=lambda: dh.debug_str)
                 if trigger_match is True:
                     dur = time.perf_counter() - start_time
-                    dash_helper_log_cb_handler(dh, trigger=TRIGGER_LOG_FUNC_END, sub_cfg=sub_cfg,
-                                               display_trigger_id=display_trigger_id, dur=dur, status_code=status_code)
+                    with start_span('log_end'):
+                        dash_helper_log_cb_handler(dh, trigger=TRIGGER_LOG_FUNC_END, sub_cfg=sub_cfg,
+                                                   display_trigger_id=display_trigger_id, dur=dur,
+                                                   status_code=status_code)
 
+        @app.callback(*dash_args, **my_kwargs)
+        def wrapper(*cb_args):
+            # a fresh correlation id per invocation, reset on return so it does not leak into the next request
+            with correlation_scope():
+                return run_wrapper(cb_args)
+
+        def run_wrapper(cb_args):
+            tracer = get_tracer() if trace is not False else None
+            if tracer is None:
+                return_value = run_callback(cb_args, NOOP_SPAN)
+                if fast_json is not None:
+                    return_value = fast_json.serialize_outputs(return_value, multi_output)
+                return return_value
+
+            span_attributes = {
+                'dash_helper.callback': cb_name_str,
+                'dash_helper.app': dash_app_name,
+                'code.filepath': cb_path,
+                'code.lineno': cb_line,
+            }
+            with tracer.start_trace(f"callback {cb_name_str}", attributes=span_attributes) as span:
+                return_value = run_callback(cb_args, span)
+                if fast_json is not None:
+                    with start_span('serialize'):
+                        return_value = fast_json.serialize_outputs(return_value, multi_output)
+                return return_value
+
+        def run_standalone(values, triggered=None):
+            """
+            Run func outside of a dash request with the given argument values and callback_context.triggered style
+            list.   Returns the DashHelper holding the outputs, None if the call is skipped (initial call with
+            skip_no_callback / prevent_initial_update).
+            """
+            dh = DashHelper(defined_inputs, defined_states, defined_outputs, values,
+                            dash_app_name=dash_app_name,
+                            callback_name=callback_name,
+                            cb_file=cb_file,
+                            cb_path=cb_path,
+                            cb_line=cb_line,
+                            location_id=location_id,
+                            standalone_mode=True,
+                            schema=registration.schema,
+                            triggered=triggered,
+                            )
+            if dh.raw_trigger_id is None and (skip_no_callback is True or prevent_initial_update is True):
+                return None
+            return_value = func(dh)
+            if isinstance(return_value, tuple):
+                dh.set_list(return_value)
+            elif return_value and return_value != dash.no_update:
+                dh.set_list([return_value,])
+            return dh
+
+        def warm(values, triggered=None):
+            """Compute and cache the result for one set of argument values, used by the registry warmup."""
+            key, _, hit = registration.cache.lookup(triggered, values, record=False)
+            if hit:
+                return 'cached'
+            dh = run_standalone(values, triggered)
+            if dh is None:
+                return 'skipped'
+            registration.cache.store(key, dh.return_value)
+            return 'warmed'
+
+        registration.func = func
+        registration.wrapper = wrapper
+        registration.run_standalone = run_standalone
+        if registration.cache is not None and not registration.cache.config.per_session:
+            registration.warm = warm
         return wrapper
 
-    if debug:
+    # The layout table is only built when it will actually be logged
+    if debug and LOGGER.isEnabledFor(logging.INFO):
         display_dash_helper_init()
 
     return decorator
@@ -1256,34 +2201,22 @@ def dash_helper_log_cb_handler(dh, trigger, sub_cfg, display_trigger_id, dur=0,
 
 
 def set_uuid(new_uuid=None, overwrite=False):
-    import uuid
-    from flask import session, has_request_context
-    try:
-        from utils.tracing_context import get_trace_context, set_trace_correlation_id
-        if not overwrite and not new_uuid:
-            existing = get_trace_context().get("X-Correlation-ID")
-            if existing:
-                return existing
-    except Exception:
-        pass
-
-    val = new_uuid or str(uuid.uuid4())
-    try:
-        from utils.tracing_context import set_trace_correlation_id
-        set_trace_correlation_id(val)
-    except Exception:
-        pass
+    """
+    Establish the correlation id for the current callback.   The id is kept in a context variable, see
+    register_correlation_backend to also persist it (e.g. in the flask session).
+    """
+    return set_correlation_id(new_uuid, overwrite=overwrite)
 
-    if has_request_context():
-        try:
-            session['current_correlation_id'] = val
-        except Exception:
-            pass
-    return val
+
+def get_uuid(default=None):
+    """Return the correlation id established by set_uuid for the current context."""
+    return get_correlation_id(default)
 
 
 def dash_helper_log_cb_start(dh, sub_cfg, display_trigger_id):
-    set_uuid()
+    # the wrapper already established the id of this invocation
+    if get_uuid() is None:
+        set_uuid()
     start_msg = f"Callback [start] - Page: {dh.dash_app_name}, Trigger: {display_trigger_id} ({dh.cb_file}:{dh.cb_line})"
 
     extra_dict = {
@@ -1332,6 +2265,11 @@ def dash_helper_log_cb_end(dh, sub_cfg, display_trigger_id, dur, status_code):
         'status_code': status_code,
     }
 
+    if dh.payload_sizes is not None:
+        extra_dict['output_bytes'] = dh.payload_sizes
+        if dh.large_outputs:
+            end_msg += f" | Large outputs: {dh.large_outputs_str}"
+
     if sub_cfg and TRIGGER_DISPLAY_OUTPUT in sub_cfg:
         output_log_parts = []
         for field in sub_cfg[TRIGGER_DISPLAY_OUTPUT]:
@@ -1438,10 +2376,17 @@ class State():  # pylint: disable=too-few-public-methods
 class CallOrigin:
     def __init__(self, name=None, depth=1):
         self.name = name
-        caller_frame = inspect.stack()[depth]
-        self.call_path = caller_frame.filename
-        self.call_file = Path(self.call_path).stem
-        self.call_line = caller_frame.lineno
+        try:
+            caller_frame = sys._getframe(depth)
+            self.call_path = caller_frame.f_code.co_filename
+            self.call_line = caller_frame.f_lineno
+        except ValueError:
+            self.call_path = '<unknown>'
+            self.call_line = 0
+
+    @property
+    def call_file(self):
+        return Path(self.call_path).stem
 
     def __repr__(self):
         if self.name:
@@ -0,0 +1,349 @@
+"""
+DataTable paging logic.   Serve a server-held dataset to a dash_table.DataTable one page at a time.
+  - binds the table's page_current / page_size / sort_by / filter_query to a DataFrame (or Arrow table) kept in the
+    server, only the visible page is sent to the browser
+  - each column is ranked once (sorted factorize codes), a sort is then an index lookup or a lexsort of int codes
+  - filter_query clauses are parsed once (LRU cached) and evaluated as vectorized column masks, operators take the
+    DataTable 'i' (case insensitive) / 's' (case sensitive) prefixes
+  - the row order of each (filter, sort) view is kept in an LRU, paging through the same view is a slice
+"""
+import collections
+import functools
+import logging
+import re
+import threading
+import weakref
+
+LOGGER = logging.getLogger('dash_helper')
+
+DEFAULT_PAGE_SIZE = 250
+DEFAULT_VIEW_CACHE_SIZE = 32
+FILTER_CACHE_SIZE = 256
+
+_RELATIONAL_OPERATORS = {
+    '=': 'eq', 'eq': 'eq',
+    '!=': 'ne', 'ne': 'ne',
+    '<': 'lt', 'lt': 'lt',
+    '<=': 'le', 'le': 'le',
+    '>': 'gt', 'gt': 'gt',
+    '>=': 'ge', 'ge': 'ge',
+    'contains': 'contains',
+}
+
+FILTER_OPERATORS = {
+    'datestartswith': 'datestartswith',
+    'is blank': 'blank',
+    'is not blank': 'not_blank',
+}
+# every relational operator takes an optional 's' (case sensitive, the default) or 'i' (case insensitive) prefix
+for _name, _op in _RELATIONAL_OPERATORS.items():
+    FILTER_OPERATORS[_name] = _op
+    FILTER_OPERATORS[f's{_name}'] = _op
+    FILTER_OPERATORS[f'i{_name}'] = f'i{_op}'
+
+_CLAUSE_RE = re.compile(
+    r"^\s*\{(?P<column>[^}]+)\}\s*(?P<op>is not blank|is blank|[is]?(?:<=|>=|!=|=|<|>)|[a-z]+)\s*(?P<value>.*?)\s*$")
+
+
+def _filter_value(raw):
+    """Value of a filter clause: quoted strings stay strings, bare numbers become numbers."""
+    if len(raw) >= 2 and raw[0] == raw[-1] and raw[0] in '"\'`':
+        return raw[1:-1]
+    try:
+        number = float(raw)
+    except ValueError:
+        return raw
+    return int(number) if number.is_integer() and '.' not in raw and 'e' not in raw.lower() else number
+
+
+def _split_clauses(filter_query):
+    """Split a filter_query on '&&', ignoring operators inside quoted values and {column} names."""
+    clauses = []
+    start = 0
+    closing = None
+    idx = 0
+    while idx < len(filter_query):
+        char = filter_query[idx]
+        if closing is not None:
+            if char == closing:
+                closing = None
+        elif char in '"\'`':
+            closing = char
+        elif char == '{':
+            closing = '}'
+        elif filter_query.startswith('&&', idx):
+            clauses.append(filter_query[start:idx])
+            start = idx + 2
+            idx += 1
+        elif filter_query.startswith('||', idx):
+            raise ValueError(f"filter_query '{filter_query}': only '&&' is supported between clauses")
+        idx += 1
+    clauses.append(filter_query[start:])
+    return clauses
+
+
+@functools.lru_cache(maxsize=FILTER_CACHE_SIZE)
+def parse_filter_query(filter_query):
+    """
+    Parse a DataTable filter_query ('{col} op value && {col2} op value') into a tuple of (column, operator, value).
+    Operators are normalized to eq / ne / lt / le / gt / ge / contains / datestartswith / blank / not_blank, 'i'
+    prefixed for case insensitive comparisons (ieq, icontains, ...).   Only '&&' is supported between clauses.
+    """
+    if not filter_query or not filter_query.strip():
+        return ()
+
+    clauses = []
+    for text in _split_clauses(filter_query):
+        match = _CLAUSE_RE.match(text)
+        if match is None:
+            raise ValueError(f"Unable to parse filter_query clause '{text}'")
+        op = FILTER_OPERATORS.get(match.group('op'))
+        if op is None:
+            raise ValueError(f"Unknown filter_query operator '{match.group('op')}' in '{text}', valid operators are "
+                             f"{sorted(FILTER_OPERATORS)}")
+        value = None if op in ('blank', 'not_blank') else _filter_value(match.group('value'))
+        clauses.append((match.group('column'), op, value))
+    return tuple(clauses)
+
+
+class TableDataset:
+    """
+    A DataFrame served page by page.   Keep one instance per dataset (e.g. at module level or in the session cache),
+    its column ranks and views are reused by every request.
+    :param df: pandas DataFrame, or a pyarrow Table (converted once)
+    :param view_cache_size: number of (filter, sort) row orders kept
+    """
+
+    def __init__(self, df, view_cache_size=DEFAULT_VIEW_CACHE_SIZE):
+        if hasattr(df, 'to_pandas') and not hasattr(df, 'iloc'):
+            df = df.to_pandas()
+        self.df = df
+        self.view_cache_size = view_cache_size
+        self._codes = {}
+        self._missing = {}
+        self._orders = {}
+        self._masks = collections.OrderedDict()
+        self._views = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.df)
+
+    def _column(self, column):
+        if column not in self.df.columns:
+            raise ValueError(f"Unknown column '{column}', valid columns are {list(self.df.columns)}")
+        return self.df[column]
+
+    def _rank(self, column):
+        """Compute the dense ascending codes (missing values last) and the ascending row order of a column."""
+        import numpy as np
+        import pandas as pd
+
+        series = self._column(column)
+        values = series.to_numpy()
+        if values.dtype.kind in 'iufbmM':
+            # numeric columns: one argsort, equal neighbours of the sorted values share a code
+            missing = series.isna().to_numpy()
+            if values.dtype.kind in 'mM':
+                values = values.view(np.int64)
+            valid = np.flatnonzero(~missing) if missing.any() else None
+            order = np.argsort(values if valid is None else values[valid], kind='stable')
+            if valid is not None:
+                order = valid[order]
+            ordered = values[order]
+            starts = np.empty(len(ordered), dtype=bool)
+            starts[:1] = True
+            np.not_equal(ordered[1:], ordered[:-1], out=starts[1:])
+            codes = np.empty(len(values), dtype=np.int64)
+            codes[order] = np.cumsum(starts) - 1
+            missing_code = None
+            if valid is not None:
+                missing_code = int(starts.sum())
+                codes[missing] = missing_code
+                order = np.concatenate((order, np.flatnonzero(missing)))
+        else:
+            codes, uniques = pd.factorize(series, sort=True)
+            codes = codes.astype(np.int64)
+            missing_code = None
+            if (codes < 0).any():
+                missing_code = len(uniques)
+                codes[codes < 0] = missing_code
+            order = np.argsort(codes, kind='stable')
+        self._codes[column] = codes
+        self._missing[column] = missing_code
+        self._orders[(column, 'asc')] = order
+
+    def codes(self, column):
+        """Dense ascending rank of each row's value, missing values rank last."""
+        if column not in self._codes:
+            self._rank(column)
+        return self._codes[column]
+
+    def sort_key(self, column, direction):
+        """Integer sort key of a column: its codes, reversed for 'desc' with missing values still last."""
+        codes = self.codes(column)
+        if direction != 'desc':
+            return codes
+        import numpy as np
+
+        missing = self._missing[column]
+        if missing is None:
+            return (codes.max() if len(codes) else 0) - codes
+        return np.where(codes == missing, missing, missing - 1 - codes)
+
+    def order(self, column, direction='asc'):
+        """Row order of the whole dataset sorted on one column, computed once per column / direction."""
+        if column not in self._codes:
+            self._rank(column)
+        key = (column, 'desc' if direction == 'desc' else 'asc')
+        order = self._orders.get(key)
+        if order is None:
+            import numpy as np
+
+            ascending = self._orders[(column, 'asc')]
+            if not len(ascending):
+                return ascending
+            codes = self.codes(column)
+            # stable descending order from the ascending one without sorting again: each group of equal values
+            # moves to its descending position, rows keep their order inside the group
+            counts = np.bincount(codes)
+            asc_start = np.concatenate(([0], np.cumsum(counts)[:-1]))
+            desc_groups = np.arange(len(counts))[::-1]
+            if self._missing[column] is not None:
+                desc_groups = np.append(desc_groups[1:], desc_groups[0])
+            desc_start = np.empty(len(counts), dtype=np.int64)
+            desc_start[desc_groups] = np.concatenate(([0], np.cumsum(counts[desc_groups])[:-1]))
+            sorted_codes = codes[ascending]
+            target = desc_start[sorted_codes] + np.arange(len(ascending)) - asc_start[sorted_codes]
+            order = np.empty_like(ascending)
+            order[target] = ascending
+            self._orders[key] = order
+        return order
+
+    def prepare(self, *columns):
+        """Rank columns ahead of the first request (e.g. at app start), all columns if none are given."""
+        for column in columns or self.df.columns:
+            self.order(column, 'asc')
+            self.order(column, 'desc')
+        return self
+
+    def _clause_mask(self, column, op, value):
+        """Boolean row mask of one filter clause, kept in an LRU so refining a filter only evaluates the new clause."""
+        key = (column, op, value)
+        with self._lock:
+            clause = self._masks.get(key)
+            if clause is not None:
+                self._masks.move_to_end(key)
+                return clause
+
+        series = self._column(column)
+        if op in ('blank', 'not_blank'):
+            clause = series.isna().to_numpy()
+            if series.dtype == object:
+                clause |= (series == '').to_numpy()
+            if op == 'not_blank':
+                clause = ~clause
+        elif op in ('contains', 'icontains'):
+            text = series if series.dtype == object else series.astype(str)
+            clause = text.str.contains(str(value), case=op == 'contains', regex=False, na=False).to_numpy(dtype=bool)
+        elif op == 'datestartswith':
+            text = series if series.dtype == object else series.astype(str)
+            clause = text.str.startswith(str(value), na=False).to_numpy(dtype=bool)
+        else:
+            case_insensitive = op.startswith('i')
+            if case_insensitive:
+                op = op[1:]
+            if series.dtype.kind in 'iufb' and isinstance(value, str):
+                try:
+                    value = float(value)
+                except ValueError:
+                    raise ValueError(f"filter value '{value}' is not a number for column '{column}'")
+            elif series.dtype.kind in 'OSU' and not isinstance(value, str):
+                value = str(value)
+            elif series.dtype.kind == 'M':
+                import pandas as pd
+                value = pd.Timestamp(value)
+            if case_insensitive and series.dtype.kind in 'OSU':
+                series = series.str.lower()
+                value = value.lower()
+            clause = getattr(series, op)(value).to_numpy(dtype=bool)
+
+        with self._lock:
+            self._masks[key] = clause
+            while len(self._masks) > self.view_cache_size:
+                self._masks.popitem(last=False)
+        return clause
+
+    def mask(self, clauses):
+        """Boolean row mask of parsed filter clauses, None if there are none."""
+        import numpy as np
+
+        mask = None
+        for column, op, value in clauses:
+            clause = self._clause_mask(column, op, value)
+            mask = clause if mask is None else np.logical_and(mask, clause)
+        return mask
+
+    def view(self, sort_by=None, filter_query=None):
+        """Row positions of the filtered, sorted dataset, cached per (filter, sort)."""
+        sort_key = tuple((x['column_id'], x.get('direction', 'asc')) for x in sort_by or ())
+        key = (filter_query or '', sort_key)
+        with self._lock:
+            view = self._views.get(key)
+            if view is not None:
+                self._views.move_to_end(key)
+                return view
+
+        import numpy as np
+
+        mask = self.mask(parse_filter_query(filter_query or ''))
+        if not sort_key:
+            view = np.arange(len(self.df)) if mask is None else np.flatnonzero(mask)
+        elif len(sort_key) == 1:
+            order = self.order(*sort_key[0])
+            view = order if mask is None else order[mask[order]]
+        else:
+            rows = np.arange(len(self.df)) if mask is None else np.flatnonzero(mask)
+            # lexsort uses the last key as the primary one
+            keys = [self.sort_key(column, direction)[rows] for column, direction in reversed(sort_key)]
+            view = rows[np.lexsort(keys)]
+
+        with self._lock:
+            self._views[key] = view
+            while len(self._views) > self.view_cache_size:
+                self._views.popitem(last=False)
+        return view
+
+    def page(self, page_current=0, page_size=DEFAULT_PAGE_SIZE, sort_by=None, filter_query=None):
+        """
+        One page of records.
+        :return: (records, page_count, row_count) where row_count is the number of rows after filtering
+        """
+        view = self.view(sort_by=sort_by, filter_query=filter_query)
+        page_size = page_size or DEFAULT_PAGE_SIZE
+        page_count = max(1, -(-len(view) // page_size))
+        page_current = min(max(0, page_current or 0), page_count - 1)
+        rows = view[page_current * page_size:(page_current + 1) * page_size]
+        return self.df.iloc[rows].to_dict('records'), page_count, len(view)
+
+
+_DATASETS = {}
+_DATASETS_LOCK = threading.Lock()
+
+
+def table_dataset(df):
+    """The TableDataset of a DataFrame, created on first use and kept while the DataFrame is alive."""
+    if isinstance(df, TableDataset):
+        return df
+    key = id(df)
+    with _DATASETS_LOCK:
+        entry = _DATASETS.get(key)
+        if entry is not None and entry[0]() is df:
+            return entry[1]
+        dataset = TableDataset(df)
+        try:
+            _DATASETS[key] = (weakref.ref(df, lambda _, key=key: _DATASETS.pop(key, None)), dataset)
+        except TypeError:
+            # objects without weak reference support are not cached
+            pass
+        return dataset
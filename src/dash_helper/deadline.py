@@ -0,0 +1,123 @@
+"""
+Callback deadline logic.   Stop waiting for a callback once its timeout has passed.
+  - the deadline is cooperative, callbacks check dh.remaining() / dh.check_deadline() between slow steps
+  - optionally func(dh) runs on its own thread, so the request returns at the deadline even if func is stuck
+  - a thread that overruns its deadline can not be killed, it keeps running in the background until func returns, it
+    keeps the callback's concurrency slot until then, and at most MAX_OVERRUN_THREADS of them run at once
+"""
+import contextvars
+import logging
+import threading
+
+LOGGER = logging.getLogger('dash_helper')
+
+MAX_OVERRUN_THREADS = 32
+
+_overrun_lock = threading.Lock()
+_overrun_count = 0
+
+
+class CallbackTimeout(Exception):
+    """Raised when a callback runs past its deadline, still_running is True when func keeps running on its thread."""
+
+    def __init__(self, message, still_running=False):
+        super().__init__(message)
+        self.still_running = still_running
+
+
+class SharedRelease:
+    """
+    Calls release once every user is done, e.g. a concurrency slot shared by the request and the worker thread running
+    func, so a thread that overruns its deadline keeps the slot until it finishes.
+    """
+
+    def __init__(self, release):
+        self._release = release
+        self._users = 1
+        self._lock = threading.Lock()
+
+    def add_user(self):
+        with self._lock:
+            self._users += 1
+
+    def done(self):
+        with self._lock:
+            self._users -= 1
+            last = self._users == 0
+        if last:
+            self._release()
+
+
+def overrun_threads():
+    """Number of callback threads still running past their deadline."""
+    return _overrun_count
+
+
+def _overrun_finished():
+    global _overrun_count
+    with _overrun_lock:
+        _overrun_count -= 1
+
+
+def run_with_deadline(func, dh, name=None, slot=None):
+    """
+    Run func(dh) on a daemon thread and wait until dh.deadline.
+    The context (correlation id, current trace span, flask request) is copied to the thread.
+    When MAX_OVERRUN_THREADS threads already overran their deadline, func runs on the calling thread instead (the
+    deadline is then only cooperative).
+    :param slot: SharedRelease of the callback's concurrency slot, held by the thread until func returns
+    :raises CallbackTimeout: if func has not returned by the deadline
+    """
+    global _overrun_count
+    if _overrun_count >= MAX_OVERRUN_THREADS:
+        LOGGER.warning(f"[{name}] {_overrun_count} callback threads are past their deadline, running on the request "
+                       f"thread")
+        return func(dh)
+
+    result = {}
+    done = threading.Event()
+    overrun = []
+    lock = threading.Lock()
+    context = contextvars.copy_context()
+
+    def target():
+        try:
+            result['value'] = context.run(func, dh)
+        except BaseException as e:
+            result['error'] = e
+        finally:
+            with lock:
+                done.set()
+                overran = bool(overrun)
+            if overran:
+                _overrun_finished()
+            if slot is not None:
+                slot.done()
+
+    if slot is not None:
+        slot.add_user()
+    thread = threading.Thread(target=target, name=f"dash_helper-{name or 'callback'}", daemon=True)
+    thread.start()
+    if not done.wait(dh.remaining()):
+        with lock:
+            if not done.is_set():
+                overrun.append(True)
+                with _overrun_lock:
+                    _overrun_count += 1
+        if overrun:
+            raise CallbackTimeout(f"did not complete within {dh.timeout}s", still_running=True)
+    if 'error' in result:
+        raise result['error']
+    return result['value']
+
+
+def timeout_result(fallback, dh):
+    """
+    Return value of a timed out callback.
+    :param fallback: dash.no_update, a value in the same form func returns (tuple for several outputs) or callable(dh)
+    """
+    if callable(fallback):
+        fallback = fallback(dh)
+    if isinstance(fallback, tuple):
+        return list(fallback)
+    return fallback
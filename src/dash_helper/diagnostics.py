@@ -0,0 +1,239 @@
+"""
+Diagnostics page logic.   Serve a live view of the dash_helper callbacks of this process from the flask server.
+  - registered callbacks with the component table display_dash_helper_init logs at registration
+  - call counts, latency percentiles, error rates, cache hit ratios
+  - the slowest recent invocations with their debug_str snapshot
+  - the callback dependency graph with the critical path of each user action ('?view=graph')
+Data comes from the in-memory registries, so it only covers the worker process that serves the request.
+The page exposes callback code locations and debug snapshots, it is denied (403) unless an authorize callable allows the
+request or the flask server runs in debug mode.
+"""
+import html
+import json
+import logging
+import os
+import time
+from urllib.parse import quote
+
+from .metrics import METRICS, METRIC_LATENCY, COUNTER_CALLS, COUNTER_ERRORS
+from .registry import REGISTRY
+from .payload import format_size
+from .preload import memory_report
+
+LOGGER = logging.getLogger('dash_helper')
+
+DEFAULT_DIAGNOSTICS_ROUTE = '/_dash_helper'
+
+_PAGE_STYLE = """
+body { font-family: sans-serif; font-size: 13px; margin: 20px; }
+table { border-collapse: collapse; margin-bottom: 16px; }
+th, td { border: 1px solid #ccc; padding: 3px 8px; text-align: left; }
+th { background: #eee; }
+pre { background: #f6f6f6; padding: 8px; overflow-x: auto; }
+"""
+
+
+def _ms(value):
+    if value is None:
+        return ''
+    return f"{value * 1000:.1f}"
+
+
+def _pct(value):
+    if value is None:
+        return ''
+    return f"{value * 100:.1f}%"
+
+
+def collect_callback_summary():
+    """
+    One row per registered (or measured) callback with call counts, latency percentiles (seconds), error and cache
+    rates.
+    """
+    names = REGISTRY.names()
+    for name in METRICS.names():
+        if name not in names:
+            names.append(name)
+
+    rows = []
+    for name in names:
+        registration = REGISTRY.get(name)
+        metrics = METRICS.callback(name)
+        latency = metrics.get_summary(METRIC_LATENCY)
+        last_call = metrics.recent[-1]['time'] if metrics.recent else None
+        rows.append({
+            'callback': name,
+            'location': registration.location if registration else '',
+            'calls': metrics.counters.get(COUNTER_CALLS, 0),
+            'errors': metrics.counters.get(COUNTER_ERRORS, 0),
+            'error_rate': metrics.error_rate,
+            'p50': latency.percentile(50) if latency else None,
+            'p95': latency.percentile(95) if latency else None,
+            'p99': latency.percentile(99) if latency else None,
+            'max': latency.max if latency else None,
+            'cache_hit_ratio': metrics.cache_hit_ratio,
+            'last_call': last_call,
+        })
+    return rows
+
+
+def collect_diagnostics(callback=None, details=True):
+    """
+    All diagnostics data as a JSON serializable dict.
+    :param callback: only include this callback
+    :param details: include the registration, layout table and metrics detail of each callback
+    """
+    output = {
+        'pid': os.getpid(),
+        'time': time.time(),
+        'callbacks': collect_callback_summary(),
+        'memory': memory_report(),
+        'details': {},
+    }
+    if callback:
+        output['callbacks'] = [x for x in output['callbacks'] if x['callback'] == callback]
+
+    for row in output['callbacks'] if details else []:
+        name = row['callback']
+        registration = REGISTRY.get(name)
+        output['details'][name] = {
+            'registration': registration.to_dict() if registration else None,
+            'layout_info': registration.layout_info if registration else [],
+            'metrics': METRICS.callback(name).to_dict(),
+        }
+    return output
+
+
+def render_diagnostics_html(data, route=DEFAULT_DIAGNOSTICS_ROUTE):
+    from tabulate import tabulate
+
+    summary_rows = []
+    for row in data['callbacks']:
+        link = f'<a href="{route}?callback={quote(row["callback"])}">{html.escape(row["callback"])}</a>'
+        summary_rows.append([
+            link,
+            html.escape(row['location']),
+            row['calls'],
+            row['errors'],
+            _pct(row['error_rate']),
+            _ms(row['p50']),
+            _ms(row['p95']),
+            _ms(row['p99']),
+            _ms(row['max']),
+            _pct(row['cache_hit_ratio']),
+            time.strftime('%H:%M:%S', time.localtime(row['last_call'])) if row['last_call'] else '',
+        ])
+    headers = ['callback', 'location', 'calls', 'errors', 'error rate', 'p50 ms', 'p95 ms', 'p99 ms', 'max ms',
+               'cache hit', 'last call']
+
+    output = f"<html><head><title>dash_helper diagnostics</title><style>{_PAGE_STYLE}</style></head><body>"
+    output += f"<h2>dash_helper callbacks (pid {data['pid']})</h2>"
+    output += f'<p><a href="{route}?view=graph">callback graph</a></p>'
+    output += tabulate(summary_rows, headers=headers, tablefmt='unsafehtml')
+
+    memory = data.get('memory')
+    if memory:
+        memory_fields = ('rss', 'pss', 'shared', 'private', 'swap')
+        output += tabulate([[format_size(memory.get(x, 0)) for x in memory_fields]],
+                           headers=[f"{x} memory" for x in memory_fields], tablefmt='html')
+
+    for name, detail in data['details'].items():
+        output += f"<h3>{html.escape(name)}</h3>"
+        if detail['layout_info']:
+            output += tabulate(detail['layout_info'], headers='keys', tablefmt='html')
+
+        metrics = detail['metrics']
+        summaries = [dict(metric=metric, **{k: v for k, v in summary.items()})
+                     for metric, summary in metrics['summaries'].items()]
+        if summaries:
+            output += tabulate(summaries, headers='keys', tablefmt='html')
+        if metrics['counters']:
+            output += tabulate(sorted(metrics['counters'].items()), headers=['counter', 'value'], tablefmt='html')
+
+        for record in metrics['slowest']:
+            when = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(record['time']))
+            output += f"<p>{_ms(record['duration'])} ms - {html.escape(str(record['status']))} - " \
+                      f"trigger={html.escape(str(record['trigger']))} - {when}</p>"
+            if record.get('debug_str'):
+                output += f"<pre>{html.escape(record['debug_str'])}</pre>"
+
+    output += "</body></html>"
+    return output
+
+
+def render_graph_html(report, route=DEFAULT_DIAGNOSTICS_ROUTE):
+    from tabulate import tabulate
+
+    def names(values):
+        return html.escape(' -> '.join(values))
+
+    output = f"<html><head><title>dash_helper callback graph</title><style>{_PAGE_STYLE}</style></head><body>"
+    output += f'<h2>dash_helper callback graph</h2><p><a href="{route}">callbacks</a> - ' \
+              f'<a href="{route}?view=graph&format=dot">DOT</a> - <a href="{route}?view=graph&format=json">JSON</a></p>'
+
+    output += "<h3>User actions, slowest critical path first</h3>"
+    rows = [[html.escape(x['action']), x['round_trips'], _ms(x['latency']), names(x['critical_path']),
+             len(x['callbacks']), html.escape(', '.join(x['unmeasured']))] for x in report['cascades']]
+    output += tabulate(rows, headers=['action', 'round trips', 'latency ms', 'critical path', 'callbacks',
+                                      'not measured'], tablefmt='unsafehtml')
+
+    if report['cycles']:
+        output += "<h3>Cycles</h3>"
+        output += tabulate([[names(x)] for x in report['cycles']], headers=['callbacks'], tablefmt='unsafehtml')
+    if report['fan_outs']:
+        output += "<h3>Fan-outs</h3>"
+        output += tabulate([[html.escape(x['prop']), len(x['callbacks']), html.escape(', '.join(x['callbacks']))]
+                            for x in report['fan_outs']], headers=['property', 'count', 'callbacks'],
+                           tablefmt='unsafehtml')
+    if report['merge_candidates']:
+        output += "<h3>Merge candidates</h3>"
+        output += tabulate([[x['reason'], html.escape(', '.join(x['callbacks'])), html.escape(', '.join(x['props']))]
+                            for x in report['merge_candidates']], headers=['reason', 'callbacks', 'properties'],
+                           tablefmt='unsafehtml')
+
+    output += "</body></html>"
+    return output
+
+
+def register_diagnostics_route(app, route=DEFAULT_DIAGNOSTICS_ROUTE, authorize=None):
+    """
+    Mount the diagnostics page on the dash app's flask server.
+    :param app: dash application
+    :param route: url of the page, '?format=json' returns the raw data and '?callback=name' shows one callback,
+                  '?view=graph' shows the callback graph ('&format=json' / '&format=dot' to export it)
+    :param authorize: callable returning True if the current request may see the page, without it the page is only
+                      served while app.server.debug is on
+    """
+    from flask import Response, abort, request
+
+    if authorize is None:
+        LOGGER.warning(f"dash_helper diagnostics at {route} have no authorize callable, the page is only served while "
+                       f"the flask server runs in debug mode")
+
+    def dash_helper_diagnostics():
+        if authorize is None:
+            if not app.server.debug:
+                abort(403)
+        elif not authorize():
+            abort(403)
+
+        if request.args.get('view') == 'graph':
+            from .graph import callback_graph
+
+            graph = callback_graph(app=app)
+            if request.args.get('format') == 'json':
+                return Response(json.dumps(graph.to_dict(), default=str), mimetype='application/json')
+            if request.args.get('format') == 'dot':
+                return Response(graph.to_dot(), mimetype='text/vnd.graphviz')
+            return Response(render_graph_html(graph.analyse(), route=route), mimetype='text/html')
+
+        callback = request.args.get('callback')
+        if request.args.get('format') == 'json':
+            data = collect_diagnostics(callback=callback)
+            return Response(json.dumps(data, default=str), mimetype='application/json')
+
+        data = collect_diagnostics(callback=callback, details=callback is not None)
+        return Response(render_diagnostics_html(data, route=route), mimetype='text/html')
+
+    app.server.add_url_rule(route, endpoint='dash_helper_diagnostics', view_func=dash_helper_diagnostics)
+    LOGGER.info(f"dash_helper diagnostics available at {route}")
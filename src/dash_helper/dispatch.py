@@ -0,0 +1,178 @@
+"""
+Dispatch logic.   Route one dash callback to a handler per trigger instead of an if / elif chain on dh.triggered_id.
+    cb = dash_helper_dispatch(Output('output1', 'children'), Input('btn1', 'n_clicks'), Input('btn2', 'n_clicks'))
+
+    @cb.on('btn1')
+    def on_btn1(dh):
+        ...
+
+    @cb.on({'type': 'row'}, 'n_clicks')
+    def on_row(dh):
+        ...
+  - routes are a dict keyed by (trigger id / pattern 'type', property), a trigger is routed with at most two lookups
+  - each handler has its own metrics entry, trace span and memory profile label ('callback[handler]')
+"""
+import logging
+import time
+
+import dash
+
+from .dash_helper import dash_helper, record_memory_profile, LOG_EVENT_COMPLETED, LOG_EVENT_ERROR
+from .memory_profile import MemoryProfileConfig, start_memory_profile
+from .metrics import METRICS
+from .registry import REGISTRY
+from .tracing import start_span, current_span
+
+LOGGER = logging.getLogger('dash_helper')
+
+
+class TriggerHandler:
+    """A handler registered with CallbackDispatcher.on"""
+
+    def __init__(self, func, name, debug=None, log_on_exit=None, memory_profile=None):
+        self.func = func
+        self.name = name
+        self.debug = debug
+        self.log_on_exit = log_on_exit
+        self.memory_profile = MemoryProfileConfig.from_arg(memory_profile)
+        self.label = name
+        self.metrics = None
+
+    def bind(self, callback_name):
+        self.label = f"{callback_name}[{self.name}]"
+        self.metrics = METRICS.callback(self.label)
+
+    def __call__(self, dh):
+        if self.debug is not None:
+            dh.debug = self.debug
+        if self.log_on_exit is not None:
+            dh.log_on_exit = self.log_on_exit
+        dh.handler_name = self.name
+
+        start = time.perf_counter()
+        status = LOG_EVENT_COMPLETED
+        profile = None
+        if self.memory_profile is not None:
+            profile = start_memory_profile(self.memory_profile, self.label)
+        try:
+            with start_span(f"handler {self.name}"):
+                return self.func(dh)
+        except Exception:
+            status = LOG_EVENT_ERROR
+            raise
+        finally:
+            if profile is not None:
+                record_memory_profile(dh, profile, current_span())
+            if self.metrics is not None:
+                self.metrics.record_invocation(time.perf_counter() - start, status, trigger=dh.trigger_id_str,
+                                               error=status == LOG_EVENT_ERROR, snapshot=lambda: dh.debug_str)
+
+
+class CallbackDispatcher:
+    """
+    Routes a dash_helper callback to the handler registered for its trigger.
+    Handlers are looked up by (id, property) first, then by id, then the default handler runs.
+    """
+
+    def __init__(self, name=None):
+        self.name = name
+        self._routes = {}
+        self._handlers = []
+        self._default = None
+        self.registration = None
+
+    def on(self, component_id, component_property=None, name=None, debug=None, log_on_exit=None,
+           memory_profile=None):
+        """
+        Decorator registering a handler for a trigger.
+        :param component_id: trigger component id, or a pattern matching dict id (routed by its 'type')
+        :param component_property: only route triggers of this property
+        :param name: handler name used in metrics / traces (default is the function name)
+        :param debug: override the callback's debug setting when this handler runs
+        :param log_on_exit: override the callback's log_on_exit setting when this handler runs
+        :param memory_profile: memory profiling options for this handler (see dash_helper memory_profile)
+        """
+        if isinstance(component_id, dict):
+            if 'type' not in component_id:
+                raise ValueError(f"[{self.name}] Unable to find 'type' in dispatch key dict '{component_id}'")
+            route_id = component_id['type']
+        elif isinstance(component_id, str):
+            route_id = component_id
+        else:
+            raise ValueError(f"[{self.name}] dispatch key must be a 'str' or 'dict', found '{component_id}'")
+
+        route = (route_id, component_property)
+
+        def decorator(func):
+            if route in self._routes:
+                error_msg = f"[{self.name}] trigger '{route_id}' property '{component_property}' already has " \
+                            f"handler '{self._routes[route].name}'"
+                LOGGER.error(error_msg)
+                raise ValueError(error_msg)
+            handler = self._add_handler(func, name, debug, log_on_exit, memory_profile)
+            self._routes[route] = handler
+            return func
+
+        return decorator
+
+    def default(self, func=None, name=None, debug=None, log_on_exit=None, memory_profile=None):
+        """Decorator registering the handler for triggers without a route (including the initial call)."""
+        def decorator(default_func):
+            self._default = self._add_handler(default_func, name, debug, log_on_exit, memory_profile)
+            return default_func
+
+        if func is not None:
+            return decorator(func)
+        return decorator
+
+    def _add_handler(self, func, name, debug, log_on_exit, memory_profile):
+        handler = TriggerHandler(func, name or func.__name__, debug=debug, log_on_exit=log_on_exit,
+                                 memory_profile=memory_profile)
+        if self.registration is not None:
+            handler.bind(self.registration.name)
+        self._handlers.append(handler)
+        return handler
+
+    def bind(self, registration):
+        self.registration = registration
+        self.name = registration.name
+        for handler in self._handlers:
+            handler.bind(registration.name)
+
+    def route(self, dh):
+        """Handler for the trigger of dh, or the default handler (None if there is none)."""
+        routes = self._routes
+        handler = routes.get((dh.trigger_id, dh.trigger_prop))
+        if handler is None:
+            handler = routes.get((dh.trigger_id, None), self._default)
+        return handler
+
+    def __call__(self, dh):
+        handler = self.route(dh)
+        if handler is None:
+            LOGGER.debug(f"[{self.name}] No handler for trigger '{dh.trigger_id_str}' property '{dh.trigger_prop}'")
+            return dash.no_update
+        return handler(dh)
+
+    @property
+    def routes(self):
+        """{(id, property): handler name} of the registered routes."""
+        return {route: handler.name for route, handler in self._routes.items()}
+
+
+def dash_helper_dispatch(*args, **kwargs):
+    """
+    Register a dash_helper callback that dispatches to per trigger handlers, accepts the same arguments as dash_helper.
+    :return: CallbackDispatcher, register handlers with @dispatcher.on(...) and @dispatcher.default
+    """
+    callback_name = kwargs.get('callback_name')
+    dispatcher = CallbackDispatcher(name=callback_name)
+    if callback_name is None:
+        kwargs['callback_name'] = 'dispatch'
+
+    wrapper = dash_helper(*args, **kwargs)(dispatcher)
+    for registration in REGISTRY:
+        if registration.wrapper is wrapper:
+            dispatcher.bind(registration)
+            break
+    return dispatcher
@@ -0,0 +1,240 @@
+"""
+Downsampling logic.   Reduce large time-series figure traces before they are serialized.
+  - LTTB (largest triangle three buckets) keeps the visual shape, min-max keeps every peak and trough of each bucket
+  - bucket work is done with numpy, the target point count comes from the graph pixel width or a configured count
+  - a relayoutData zoom restricts the full resolution data to the visible range before downsampling, so zooming in
+    shows more detail instead of the already reduced points
+numpy is only imported when a figure is downsampled.
+"""
+import logging
+
+LOGGER = logging.getLogger('dash_helper')
+
+METHOD_LTTB = 'lttb'
+METHOD_MINMAX = 'minmax'
+METHODS = (METHOD_LTTB, METHOD_MINMAX)
+
+DEFAULT_TARGET_POINTS = 2000
+DEFAULT_POINTS_PER_PIXEL = 2
+DOWNSAMPLED_TRACE_TYPES = ('scatter', 'scattergl')
+
+
+def lttb_indices(x, y, n_out):
+    """
+    Indices of the n_out points selected by LTTB.   x and y are float numpy arrays without NaN in y.
+    Each bucket keeps the point forming the largest triangle with the previously kept point and the next bucket's
+    average, computed for the whole bucket at once.
+    """
+    import numpy as np
+
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    # next bucket averages, the last bucket's "next" is the final point
+    sums_x = np.add.reduceat(x[1:n - 1], edges[:-1] - 1)
+    sums_y = np.add.reduceat(y[1:n - 1], edges[:-1] - 1)
+    counts = np.diff(edges)
+    avg_x = np.append(sums_x / counts, x[-1])
+    avg_y = np.append(sums_y / counts, y[-1])
+
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+    prev = 0
+    for bucket in range(n_out - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        next_x, next_y = avg_x[bucket + 1], avg_y[bucket + 1]
+        bx = x[start:end]
+        by = y[start:end]
+        # twice the triangle area, the constant factor does not change the argmax
+        area = np.abs((x[prev] - next_x) * (by - y[prev]) - (x[prev] - bx) * (next_y - y[prev]))
+        prev = start + int(np.argmax(area))
+        selected[bucket + 1] = prev
+    return selected
+
+
+def minmax_indices(y, n_out):
+    """Indices of the minimum and maximum of each of n_out / 2 buckets, plus the first and last point, sorted."""
+    import numpy as np
+
+    n = len(y)
+    if n_out >= n or n_out < 4:
+        return np.arange(n)
+
+    buckets = max(1, (n_out - 2) // 2)
+    size = -(-n // buckets)
+    padded = np.full(buckets * size, np.nan)
+    padded[:n] = y
+    rows = padded.reshape(buckets, size)
+    valid = ~np.all(np.isnan(rows), axis=1)
+    offsets = np.arange(buckets)[valid] * size
+    rows = rows[valid]
+    mins = offsets + np.nanargmin(rows, axis=1)
+    maxs = offsets + np.nanargmax(rows, axis=1)
+    return np.unique(np.concatenate(([0], mins, maxs, [n - 1])))
+
+
+def _numeric_x(x):
+    """(float array for the bucket math, original array to index) of trace x values."""
+    import numpy as np
+
+    values = np.asarray(x)
+    if np.issubdtype(values.dtype, np.datetime64):
+        return values.astype('datetime64[ns]').astype(np.int64).astype(np.float64), values
+    if np.issubdtype(values.dtype, np.number):
+        return values.astype(np.float64), values
+    try:
+        dates = values.astype('datetime64[ns]')
+        return dates.astype(np.int64).astype(np.float64), values
+    except (TypeError, ValueError):
+        return np.arange(len(values), dtype=np.float64), values
+
+
+def _range_value(value):
+    """Float of a relayoutData range bound (number or date string), in the same units as _numeric_x."""
+    import numpy as np
+
+    if isinstance(value, (int, float)):
+        return float(value)
+    return float(np.datetime64(str(value).replace(' ', 'T'), 'ns').astype(np.int64))
+
+
+def relayout_range(relayout_data, axis='xaxis'):
+    """
+    Visible range of an axis from a dcc.Graph relayoutData dict.
+    :return: (start, end), None when the axis was reset (autorange) or relayoutData does not change it
+    """
+    if not relayout_data:
+        return None
+    if relayout_data.get(f'{axis}.autorange'):
+        return None
+    if f'{axis}.range[0]' in relayout_data and f'{axis}.range[1]' in relayout_data:
+        return relayout_data[f'{axis}.range[0]'], relayout_data[f'{axis}.range[1]']
+    if f'{axis}.range' in relayout_data:
+        start, end = relayout_data[f'{axis}.range']
+        return start, end
+    return None
+
+
+def downsample_xy(x, y, n_out=DEFAULT_TARGET_POINTS, method=METHOD_LTTB, x_range=None):
+    """
+    Downsample one series.
+    :param x: x values (numbers, datetimes or date strings), None for positions
+    :param y: y values
+    :param n_out: target number of points
+    :param method: 'lttb' or 'minmax'
+    :param x_range: (start, end) to keep before downsampling, e.g. from relayout_range
+    :return: (x, y) numpy arrays
+    """
+    import numpy as np
+
+    if method not in METHODS:
+        raise ValueError(f"downsample method must be one of {METHODS}, found '{method}'")
+    y_values = np.asarray(y, dtype=np.float64)
+    if x is None:
+        x_values = np.arange(len(y_values))
+        x_numeric = x_values.astype(np.float64)
+    else:
+        x_numeric, x_values = _numeric_x(x)
+
+    if x_range is not None:
+        start, end = sorted((_range_value(x_range[0]), _range_value(x_range[1])))
+        # keep one point either side so lines reach the edges of the plot
+        first = max(0, int(np.searchsorted(x_numeric, start, side='left')) - 1)
+        last = min(len(x_numeric), int(np.searchsorted(x_numeric, end, side='right')) + 1)
+        x_numeric, x_values, y_values = x_numeric[first:last], x_values[first:last], y_values[first:last]
+
+    # gaps (NaN) are kept as line breaks by downsampling each finite run separately
+    finite = np.isfinite(y_values)
+    if finite.all() or not finite.any():
+        indices = _indices(x_numeric, y_values, n_out, method)
+    else:
+        runs = np.flatnonzero(np.diff(np.concatenate(([0], finite.astype(np.int8), [0]))))
+        total = int(finite.sum())
+        parts = []
+        for run_start, run_end in zip(runs[::2], runs[1::2]):
+            run_out = max(4, int(round(n_out * (run_end - run_start) / total)))
+            parts.append(run_start + _indices(x_numeric[run_start:run_end], y_values[run_start:run_end], run_out,
+                                               method))
+            if run_end < len(y_values):
+                parts.append(np.array([run_end]))
+        indices = np.concatenate(parts)
+    return x_values[indices], y_values[indices]
+
+
+def _indices(x_numeric, y_values, n_out, method):
+    if method == METHOD_MINMAX:
+        return minmax_indices(y_values, n_out)
+    return lttb_indices(x_numeric, y_values, n_out)
+
+
+def target_points(fig_layout_width=None, width=None, n_out=None, points_per_pixel=DEFAULT_POINTS_PER_PIXEL):
+    """Target point count: n_out, else the pixel width (argument or figure layout) times points_per_pixel."""
+    if n_out:
+        return int(n_out)
+    width = width or fig_layout_width
+    if width:
+        return int(width * points_per_pixel)
+    return DEFAULT_TARGET_POINTS
+
+
+def _trace_with_xy(trace, x, y, is_dict):
+    """Copy of a trace with new x / y, the trace itself is left unchanged."""
+    if is_dict:
+        return dict(trace, x=x, y=y)
+    props = trace.to_plotly_json()
+    props['x'] = x
+    props['y'] = y
+    return type(trace)(props)
+
+
+def downsample_figure(fig, n_out=None, width=None, method=METHOD_LTTB, x_range=None,
+                      points_per_pixel=DEFAULT_POINTS_PER_PIXEL):
+    """
+    Downsample the scatter / scattergl traces of a figure.   fig is not modified, the caller can keep it (e.g. cached)
+    at full resolution and downsample it again for the next zoom.
+    :param fig: plotly Figure or figure dict
+    :param n_out: target points per trace (default from width)
+    :param width: graph width in pixels (default the figure layout width, else DEFAULT_TARGET_POINTS points)
+    :param method: 'lttb' or 'minmax'
+    :param x_range: (start, end) visible x range, e.g. relayout_range(relayoutData), also set on the x axis
+    :return: (new figure of the same type, {'points': original point count, 'downsampled': output point count})
+    """
+    is_dict = isinstance(fig, dict)
+    traces = fig.get('data', []) if is_dict else fig.data
+    layout = fig.get('layout', {}) if is_dict else fig.layout
+    layout_width = layout.get('width') if is_dict else layout.width
+    target = target_points(layout_width, width=width, n_out=n_out, points_per_pixel=points_per_pixel)
+
+    stats = {'points': 0, 'downsampled': 0}
+    new_traces = []
+    for trace in traces:
+        new_traces.append(trace)
+        trace_type = (trace.get('type') if is_dict else trace.type) or 'scatter'
+        y = trace.get('y') if is_dict else trace.y
+        if trace_type not in DOWNSAMPLED_TRACE_TYPES or y is None:
+            continue
+        x = trace.get('x') if is_dict else trace.x
+        stats['points'] += len(y)
+        if len(y) <= target and x_range is None:
+            stats['downsampled'] += len(y)
+            continue
+        new_x, new_y = downsample_xy(x, y, n_out=target, method=method, x_range=x_range)
+        stats['downsampled'] += len(new_y)
+        # x is always set, positions are no longer implied once points are removed
+        new_traces[-1] = _trace_with_xy(trace, new_x, new_y, is_dict)
+
+    if is_dict:
+        new_fig = dict(fig, data=new_traces)
+        if x_range is not None:
+            new_layout = dict(new_fig.get('layout') or {})
+            new_layout['xaxis'] = dict(new_layout.get('xaxis') or {}, range=list(x_range))
+            new_fig['layout'] = new_layout
+    else:
+        new_fig = type(fig)(data=new_traces, layout=layout)
+        if x_range is not None:
+            new_fig.update_xaxes(range=list(x_range))
+    LOGGER.debug(f"Downsampled figure from {stats['points']} to {stats['downsampled']} points ({method})")
+    return new_fig, stats
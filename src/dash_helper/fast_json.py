@@ -0,0 +1,244 @@
+"""
+Fast JSON logic.   Opt-in orjson serialization of dash_helper callback outputs.
+  - outputs are encoded with orjson (native numpy and datetime support) instead of the plotly encoder dash uses,
+    figures and components go through to_plotly_json, pandas objects through numpy
+  - the encoded text is returned to dash as a SerializedOutput and spliced into the response by a wrapper of dash's
+    to_json, the rest of the response is left to dash
+  - with cache, the text is kept per content fingerprint (blake2b of the value, numpy buffers hashed directly), so an
+    unchanged output is hashed but not encoded again
+  - without orjson, or for values orjson can not encode, outputs are left to dash's encoder
+"""
+import collections
+import decimal
+import hashlib
+import json
+import logging
+import pickle
+import threading
+import uuid
+
+import dash
+
+LOGGER = logging.getLogger('dash_helper')
+
+DEFAULT_CACHE_ENTRIES = 64
+DEFAULT_CACHE_MB = 256
+
+# same escaping as plotly's encoder, the response can be embedded in HTML
+_SWAP = (('<', '\\u003c'), ('>', '\\u003e'), ('/', '\\u002f'), ('\u2028', '\\u2028'), ('\u2029', '\\u2029'))
+_TOKEN_PREFIX = f"__dash_helper_json_{uuid.uuid4().hex}_"
+
+_install_lock = threading.Lock()
+_installed = False
+
+
+def get_orjson():
+    """The orjson module, None if it is not installed."""
+    try:
+        import orjson
+    except ImportError:
+        return None
+    return orjson
+
+
+class SerializedOutput:
+    """Pre-encoded JSON text of one output value."""
+    __slots__ = ('text',)
+
+    def __init__(self, text):
+        self.text = text
+
+    def to_plotly_json(self):
+        # only reached if the value meets an encoder other than the to_json wrapper
+        return json.loads(self.text)
+
+    def __len__(self):
+        return len(self.text)
+
+    def __repr__(self):
+        return f"SerializedOutput({len(self.text)} chars)"
+
+
+def _default(value):
+    """orjson fallback for the types plotly's encoder supports and orjson does not."""
+    if hasattr(value, 'to_plotly_json'):
+        return value.to_plotly_json()
+    module = type(value).__module__.split('.')[0]
+    if module == 'numpy':
+        # numpy arrays / scalars of dtypes orjson does not handle natively (object, float16, ...)
+        return value.tolist()
+    if module == 'pandas':
+        if hasattr(value, 'isoformat'):
+            return value.isoformat()
+        if hasattr(value, 'to_numpy'):
+            return value.to_numpy()
+    if isinstance(value, decimal.Decimal):
+        return float(value)
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def _safe(text):
+    for unsafe, safe in _SWAP:
+        if unsafe in text:
+            text = text.replace(unsafe, safe)
+    return text
+
+
+def encode(value):
+    """JSON text of a value with orjson, escaped like plotly's encoder.   None if orjson is missing or fails."""
+    orjson = get_orjson()
+    if orjson is None:
+        return None
+    try:
+        text = orjson.dumps(value, default=_default,
+                            option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS).decode('utf-8')
+    except TypeError as e:
+        LOGGER.debug(f"orjson could not encode {type(value).__name__}, left to dash: {e}")
+        return None
+    return _safe(text)
+
+
+def content_fingerprint(value):
+    """
+    blake2b digest of a value's content, None if it can not be pickled.   Figures and components are hashed from their
+    to_plotly_json, numpy buffers are hashed in place (pickle protocol 5 out of band buffers), so this is much cheaper
+    than encoding array backed outputs.   Equal values may pickle differently (a miss), never the reverse.
+    """
+    if hasattr(value, 'to_plotly_json'):
+        value = value.to_plotly_json()
+    buffers = []
+    try:
+        if pickle.HIGHEST_PROTOCOL >= 5:
+            data = pickle.dumps(value, protocol=5, buffer_callback=buffers.append)
+        else:
+            data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+    except Exception as e:
+        LOGGER.debug(f"fast_json can not fingerprint {type(value).__name__}: {e}")
+        return None
+    hasher = hashlib.blake2b(data, digest_size=20)
+    for buffer in buffers:
+        hasher.update(buffer.raw())
+    return hasher.hexdigest()
+
+
+class FastJSONConfig:
+    """
+    Fast serialization options for a callback.
+    :param cache: keep the encoded text of outputs by content fingerprint
+    :param max_entries: maximum number of cached outputs
+    :param max_mb: maximum size of the cached text
+    """
+
+    def __init__(self, cache=False, max_entries=DEFAULT_CACHE_ENTRIES, max_mb=DEFAULT_CACHE_MB):
+        self.cache = cache
+        self.max_entries = max_entries
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.hits = 0
+        self.misses = 0
+        self._entries = collections.OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_arg(cls, fast_json):
+        """
+        Build the config from the dash_helper 'fast_json' argument.
+        Accepts None/False (disabled), True (no cache), 'cache', a dict of options or a config.
+        """
+        if fast_json is None or fast_json is False:
+            return None
+        if isinstance(fast_json, cls):
+            return fast_json
+        if fast_json is True:
+            return cls()
+        if fast_json == 'cache':
+            return cls(cache=True)
+        if isinstance(fast_json, dict):
+            return cls(**fast_json)
+        raise ValueError(f"fast_json must be a bool, 'cache', dict or FastJSONConfig, found {type(fast_json)}")
+
+    def serialize(self, value):
+        """SerializedOutput of one output value, the value itself when it is left to dash."""
+        if value is dash.no_update or isinstance(value, SerializedOutput):
+            return value
+        key = content_fingerprint(value) if self.cache else None
+        if key is not None:
+            with self._lock:
+                text = self._entries.get(key)
+                if text is not None:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return SerializedOutput(text)
+                self.misses += 1
+
+        text = encode(value)
+        if text is None:
+            return value
+        if key is not None and len(text) <= self.max_bytes:
+            with self._lock:
+                if key not in self._entries:
+                    self._entries[key] = text
+                    self._size += len(text)
+                while self._entries and (len(self._entries) > self.max_entries or self._size > self.max_bytes):
+                    self._size -= len(self._entries.popitem(last=False)[1])
+        return SerializedOutput(text)
+
+    def serialize_outputs(self, return_value, multi):
+        """Serialize a callback return value, one entry per output when multi."""
+        if return_value is dash.no_update:
+            return return_value
+        if multi and isinstance(return_value, (list, tuple)):
+            return [self.serialize(x) for x in return_value]
+        return self.serialize(return_value)
+
+
+def _splice(response):
+    """Replace the SerializedOutputs of a response by tokens, return {quoted token: text}."""
+    spliced = {}
+    outputs = response.get('response') if isinstance(response, dict) else None
+    if not isinstance(outputs, dict):
+        return spliced
+    for props in outputs.values():
+        if not isinstance(props, dict):
+            continue
+        for prop, value in props.items():
+            if isinstance(value, SerializedOutput):
+                token = f"{_TOKEN_PREFIX}{len(spliced)}"
+                props[prop] = token
+                spliced[f'"{token}"'] = value.text
+    return spliced
+
+
+def install():
+    """
+    Wrap the to_json used for callback responses so SerializedOutputs are written as is.   Called by dash_helper for
+    the first callback using fast_json, responses without SerializedOutputs are encoded by dash unchanged.
+    :return: True if installed, False if this dash version does not allow it (outputs are then left to dash)
+    """
+    global _installed
+    with _install_lock:
+        if _installed:
+            return True
+        if get_orjson() is None:
+            LOGGER.warning("fast_json requires orjson (pip install orjson), outputs are left to dash's encoder")
+            return False
+        try:
+            from dash import _callback
+            dash_to_json = _callback.to_json
+        except (ImportError, AttributeError):
+            LOGGER.warning(f"fast_json is not supported by dash {dash.__version__}, outputs are left to dash's encoder")
+            return False
+
+        def to_json(value):
+            spliced = _splice(value)
+            text = dash_to_json(value)
+            for token, output_text in spliced.items():
+                text = text.replace(token, output_text, 1)
+            return text
+
+        to_json.dash_to_json = dash_to_json
+        _callback.to_json = to_json
+        _installed = True
+        return True
@@ -0,0 +1,290 @@
+"""
+Callback graph logic.   Analyse which dash_helper callbacks feed which, combined with their measured latencies.
+  - an edge links a callback to every callback that has one of its Outputs as an Input (States do not trigger)
+  - each user action (an Input property no callback outputs) starts a cascade, its critical path is the slowest chain
+    of serial round trips
+  - cycles, wide fan-outs and merge candidates are flagged
+  - exported as a JSON serializable dict or DOT, and shown on the diagnostics page ('?view=graph')
+Pattern matching ids are grouped by their 'type'.
+"""
+import logging
+
+from .metrics import METRICS, METRIC_LATENCY
+from .registry import REGISTRY
+
+LOGGER = logging.getLogger('dash_helper')
+
+DEFAULT_LATENCY_PERCENTILE = 50
+DEFAULT_FAN_OUT_THRESHOLD = 3
+
+
+def _prop(entry):
+    return f"{entry.key}.{entry.prop}"
+
+
+class CallbackGraph:
+    """
+    Dependency graph of registered callbacks.
+        graph = CallbackGraph.build()
+        report = graph.analyse()
+        graph.to_dot()
+    """
+
+    def __init__(self, callbacks, latencies):
+        # {name: {'inputs': (...), 'states': (...), 'outputs': (...)}} with 'id.prop' names
+        self.callbacks = callbacks
+        self.latencies = latencies
+        self.producers = {}
+        self.consumers = {}
+        for name, io in callbacks.items():
+            for prop in io['outputs']:
+                self.producers.setdefault(prop, []).append(name)
+            for prop in io['inputs']:
+                self.consumers.setdefault(prop, []).append(name)
+
+        # callback -> callbacks it triggers, with the properties linking them
+        self.edges = {name: {} for name in callbacks}
+        for name, io in callbacks.items():
+            for prop in io['outputs']:
+                for consumer in self.consumers.get(prop, ()):
+                    self.edges[name].setdefault(consumer, []).append(prop)
+
+    @classmethod
+    def build(cls, registry=None, app=None, metrics=None, percentile=DEFAULT_LATENCY_PERCENTILE):
+        """
+        Build the graph from the callback registry and the latencies of the metrics registry.
+        :param app: only include callbacks of this dash app
+        :param percentile: latency percentile used as each callback's cost (None uses the mean)
+        """
+        registry = registry if registry is not None else REGISTRY
+        metrics = metrics if metrics is not None else METRICS
+        callbacks = {}
+        latencies = {}
+        for registration in registry:
+            if app is not None and registration.app is not app:
+                continue
+            schema = registration.schema
+            if schema is None:
+                continue
+            callbacks[registration.name] = {
+                'inputs': tuple(_prop(x) for x in schema.inputs),
+                'states': tuple(_prop(x) for x in schema.states),
+                'outputs': tuple(_prop(x) for x in schema.outputs),
+            }
+            summary = metrics.callback(registration.name).get_summary(METRIC_LATENCY)
+            if summary is not None and summary.count:
+                latencies[registration.name] = summary.percentile(percentile) if percentile is not None \
+                    else summary.mean
+        return cls(callbacks, latencies)
+
+    @property
+    def actions(self):
+        """Input properties set by the user (no callback outputs them), each one starts a cascade."""
+        return sorted(prop for prop in self.consumers if prop not in self.producers)
+
+    def latency(self, name):
+        return self.latencies.get(name, 0.0)
+
+    def cycles(self):
+        """Groups of callbacks that trigger each other (strongly connected components), including self loops."""
+        index = {}
+        low = {}
+        stack = []
+        on_stack = set()
+        found = []
+        counter = [0]
+
+        def strongconnect(root):
+            # iterative Tarjan, call stacks of (node, iterator over its successors)
+            work = [(root, iter(self.edges[root]))]
+            index[root] = low[root] = counter[0]
+            counter[0] += 1
+            stack.append(root)
+            on_stack.add(root)
+            while work:
+                node, successors = work[-1]
+                for successor in successors:
+                    if successor not in index:
+                        index[successor] = low[successor] = counter[0]
+                        counter[0] += 1
+                        stack.append(successor)
+                        on_stack.add(successor)
+                        work.append((successor, iter(self.edges[successor])))
+                        break
+                    if successor in on_stack:
+                        low[node] = min(low[node], index[successor])
+                else:
+                    work.pop()
+                    if work:
+                        low[work[-1][0]] = min(low[work[-1][0]], low[node])
+                    if low[node] == index[node]:
+                        component = []
+                        while True:
+                            member = stack.pop()
+                            on_stack.discard(member)
+                            component.append(member)
+                            if member == node:
+                                break
+                        if len(component) > 1 or node in self.edges[node]:
+                            found.append(sorted(component))
+
+        for name in self.callbacks:
+            if name not in index:
+                strongconnect(name)
+        return found
+
+    def cascade(self, action):
+        """Callbacks triggered (directly or through other callbacks) by an action property."""
+        found = set()
+        pending = list(self.consumers.get(action, ()))
+        while pending:
+            name = pending.pop()
+            if name not in found:
+                found.add(name)
+                pending.extend(self.edges[name])
+        return found
+
+    def critical_path(self, action, cyclic=None):
+        """
+        (path, latency) of the slowest chain of callbacks an action triggers.   Each step is a separate round trip,
+        callbacks of the same step run in parallel so only the slowest chain adds up.
+        :param cyclic: callbacks that are part of a cycle, computed from cycles() when None
+        """
+        cascade = self.cascade(action)
+        if cyclic is None:
+            cyclic = {name for group in self.cycles() for name in group}
+        cyclic = set(cyclic)
+        best = {}
+
+        # callbacks in cycles are not followed, so the rest is acyclic and the longest tail of a callback is fixed
+        def longest(name):
+            if name in best:
+                return best[name]
+            tail = ([], 0.0)
+            for successor in self.edges[name]:
+                if successor in cyclic or successor not in cascade:
+                    continue
+                candidate = longest(successor)
+                if candidate[1] > tail[1] or (candidate[1] == tail[1] and len(candidate[0]) > len(tail[0])):
+                    tail = candidate
+            result = ([name] + tail[0], self.latency(name) + tail[1])
+            best[name] = result
+            return result
+
+        path, latency = [], 0.0
+        for name in sorted(self.consumers.get(action, ())):
+            candidate = longest(name)
+            if candidate[1] > latency or (candidate[1] == latency and len(candidate[0]) > len(path)):
+                path, latency = candidate
+        return path, latency
+
+    def fan_outs(self, threshold=DEFAULT_FAN_OUT_THRESHOLD):
+        """Properties triggering at least threshold callbacks, each one a separate request for the same change."""
+        return [{'prop': prop, 'callbacks': sorted(names)}
+                for prop, names in sorted(self.consumers.items()) if len(names) >= threshold]
+
+    def merge_candidates(self):
+        """
+        Callbacks that could be merged to save requests:
+          - 'same_inputs': callbacks with exactly the same Inputs always run together, one callback with all their
+            Outputs makes one request instead of several
+          - 'serial': a callback only triggered by another one, whose linking Outputs nothing else uses, adds a round
+            trip that merging both removes
+        """
+        candidates = []
+        by_inputs = {}
+        for name, io in self.callbacks.items():
+            if io['inputs']:
+                by_inputs.setdefault(frozenset(io['inputs']), []).append(name)
+        for inputs, names in sorted(by_inputs.items(), key=lambda x: sorted(x[1])):
+            if len(names) > 1:
+                candidates.append({'reason': 'same_inputs', 'callbacks': sorted(names), 'props': sorted(inputs)})
+
+        cyclic = {name for group in self.cycles() for name in group}
+        for name, io in sorted(self.callbacks.items()):
+            if name in cyclic:
+                continue
+            sources = {producer for prop in io['inputs'] for producer in self.producers.get(prop, ())}
+            if len(sources) != 1 or any(prop not in self.producers for prop in io['inputs']):
+                continue
+            source = next(iter(sources))
+            if source == name:
+                continue
+            links = self.edges[source][name]
+            if all(self.consumers.get(prop) == [name] for prop in links):
+                candidates.append({'reason': 'serial', 'callbacks': [source, name], 'props': sorted(links)})
+        return candidates
+
+    def analyse(self, fan_out_threshold=DEFAULT_FAN_OUT_THRESHOLD):
+        """Full report: cascades with critical paths (slowest first), cycles, fan-outs and merge candidates."""
+        cycles = self.cycles()
+        cyclic = {name for group in cycles for name in group}
+        cascades = []
+        for action in self.actions:
+            path, latency = self.critical_path(action, cyclic=cyclic)
+            cascade = self.cascade(action)
+            cascades.append({
+                'action': action,
+                'callbacks': sorted(cascade),
+                'critical_path': path,
+                'round_trips': len(path),
+                'latency': latency,
+                'unmeasured': sorted(x for x in cascade if x not in self.latencies),
+            })
+        cascades.sort(key=lambda x: (x['latency'], x['round_trips']), reverse=True)
+        return {
+            'cascades': cascades,
+            'cycles': cycles,
+            'fan_outs': self.fan_outs(fan_out_threshold),
+            'merge_candidates': self.merge_candidates(),
+        }
+
+    def to_dict(self):
+        """JSON serializable graph plus analysis."""
+        return {
+            'callbacks': {name: {'inputs': list(io['inputs']), 'states': list(io['states']),
+                                 'outputs': list(io['outputs']), 'latency': self.latencies.get(name)}
+                          for name, io in self.callbacks.items()},
+            'edges': [{'source': source, 'target': target, 'props': props}
+                      for source, targets in self.edges.items() for target, props in targets.items()],
+            'actions': self.actions,
+            'analysis': self.analyse(),
+        }
+
+    def to_dot(self, highlight_critical=True):
+        """Graphviz DOT text: user actions as ellipses, callbacks as boxes labelled with their latency."""
+        def quote(value):
+            return '"' + str(value).replace('"', '\\"') + '"'
+
+        critical_edges = set()
+        if highlight_critical:
+            cyclic = {name for group in self.cycles() for name in group}
+            for action in self.actions:
+                path, _ = self.critical_path(action, cyclic=cyclic)
+                if path:
+                    critical_edges.add((action, path[0]))
+                critical_edges.update(zip(path, path[1:]))
+
+        lines = ['digraph dash_helper {', '  rankdir=LR;', '  node [fontsize=10];']
+        for action in self.actions:
+            lines.append(f"  {quote(action)} [shape=ellipse, style=filled, fillcolor=lightgrey];")
+        for name in self.callbacks:
+            latency = self.latencies.get(name)
+            label = f"{name}\\n{latency * 1000:.1f} ms" if latency is not None else name
+            lines.append(f"  {quote(name)} [shape=box, label={quote(label)}];")
+        for action in self.actions:
+            for name in self.consumers[action]:
+                style = ', color=red, penwidth=2' if (action, name) in critical_edges else ''
+                lines.append(f"  {quote(action)} -> {quote(name)} [fontsize=8{style}];")
+        for source, targets in self.edges.items():
+            for target, props in targets.items():
+                style = ', color=red, penwidth=2' if (source, target) in critical_edges else ''
+                lines.append(f"  {quote(source)} -> {quote(target)} [label={quote(', '.join(props))}, "
+                             f"fontsize=8{style}];")
+        lines.append('}')
+        return '\n'.join(lines)
+
+
+def callback_graph(app=None, percentile=DEFAULT_LATENCY_PERCENTILE):
+    """CallbackGraph of the registered callbacks with the latencies measured so far."""
+    return CallbackGraph.build(app=app, percentile=percentile)
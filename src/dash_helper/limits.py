@@ -0,0 +1,174 @@
+"""
+Concurrency limit logic.   Keep one heavy callback from occupying every worker thread.
+  - each callback can have its own limit, the app can have a global limit shared by every dash_helper callback
+  - background priority callbacks can only use part of the app limit, the rest is reserved for interactive ones
+  - the uncontended path is a non-blocking semaphore acquire, time is only measured when a request has to wait
+  - requests that can not get a slot within queue_timeout are shed (PreventUpdate or HTTP 503)
+"""
+import logging
+import threading
+import time
+
+from dash.exceptions import PreventUpdate
+
+LOGGER = logging.getLogger('dash_helper')
+
+PRIORITY_INTERACTIVE = 'interactive'
+PRIORITY_BACKGROUND = 'background'
+PRIORITIES = (PRIORITY_INTERACTIVE, PRIORITY_BACKGROUND)
+
+OVERLOAD_PREVENT_UPDATE = 'prevent_update'
+OVERLOAD_503 = '503'
+OVERLOAD_MODES = (OVERLOAD_PREVENT_UPDATE, OVERLOAD_503)
+
+DEFAULT_QUEUE_TIMEOUT = 1.0
+
+
+class CallbackOverloaded(Exception):
+    """Raised when a request could not get a concurrency slot within its queue timeout."""
+
+    def __init__(self, message, queue_wait):
+        super().__init__(message)
+        self.queue_wait = queue_wait
+
+
+def _acquire(semaphore, timeout):
+    """Acquire a semaphore, return the time spent waiting or None on timeout."""
+    if semaphore.acquire(blocking=False):
+        return 0.0
+    if not timeout or timeout <= 0:
+        return None
+    start = time.perf_counter()
+    if semaphore.acquire(timeout=timeout):
+        return time.perf_counter() - start
+    return None
+
+
+class AppConcurrencyLimit:
+    """
+    Global limit across every dash_helper callback of the process.
+    :param max_concurrency: callbacks allowed to run at the same time
+    :param background_max: how many of those slots background priority callbacks may use (default half)
+    :param queue_timeout: default seconds a request may wait for a slot
+    """
+
+    def __init__(self, max_concurrency, background_max=None, queue_timeout=DEFAULT_QUEUE_TIMEOUT):
+        if max_concurrency < 1:
+            raise ValueError(f"max_concurrency must be at least 1, found {max_concurrency}")
+        if background_max is None:
+            background_max = max(1, max_concurrency // 2)
+        self.max_concurrency = max_concurrency
+        self.background_max = min(background_max, max_concurrency)
+        self.queue_timeout = queue_timeout
+        self._semaphore = threading.BoundedSemaphore(max_concurrency)
+        self._background = threading.BoundedSemaphore(self.background_max)
+
+    def acquire(self, priority, timeout):
+        """Return the time spent waiting, or None if no slot was available in time."""
+        if priority != PRIORITY_BACKGROUND:
+            return _acquire(self._semaphore, timeout)
+
+        deadline = time.perf_counter() + (timeout or 0)
+        background_wait = _acquire(self._background, timeout)
+        if background_wait is None:
+            return None
+        wait = _acquire(self._semaphore, deadline - time.perf_counter())
+        if wait is None:
+            self._background.release()
+            return None
+        return background_wait + wait
+
+    def release(self, priority):
+        self._semaphore.release()
+        if priority == PRIORITY_BACKGROUND:
+            self._background.release()
+
+
+GLOBAL_APP_LIMIT = None
+
+
+def register_app_concurrency_limit(max_concurrency, background_max=None, queue_timeout=DEFAULT_QUEUE_TIMEOUT):
+    """
+    Globally limit how many dash_helper callbacks run at the same time in this process.   Pass None to remove it.
+    Set it to (or below) the number of worker threads so interactive callbacks always find a free thread.
+    """
+    global GLOBAL_APP_LIMIT
+    if max_concurrency is None:
+        GLOBAL_APP_LIMIT = None
+    else:
+        GLOBAL_APP_LIMIT = AppConcurrencyLimit(max_concurrency, background_max=background_max,
+                                               queue_timeout=queue_timeout)
+    return GLOBAL_APP_LIMIT
+
+
+class CallbackLimiter:
+    """
+    Concurrency limit of one callback, combined with the app limit registered at call time.
+    :param name: callback name (for messages)
+    :param max_concurrency: runs of this callback allowed at the same time (None for no per callback limit)
+    :param queue_timeout: seconds a request may wait for a slot, None uses the app limit / default timeout
+    :param priority: 'interactive' or 'background'
+    :param on_overload: 'prevent_update' (no change in the browser) or '503' (request fails with HTTP 503)
+    """
+
+    def __init__(self, name, max_concurrency=None, queue_timeout=None, priority=PRIORITY_INTERACTIVE,
+                 on_overload=OVERLOAD_PREVENT_UPDATE):
+        if priority not in PRIORITIES:
+            raise ValueError(f"priority must be one of {PRIORITIES}, found '{priority}'")
+        if on_overload not in OVERLOAD_MODES:
+            raise ValueError(f"on_overload must be one of {OVERLOAD_MODES}, found '{on_overload}'")
+        if max_concurrency is not None and max_concurrency < 1:
+            raise ValueError(f"max_concurrency must be at least 1, found {max_concurrency}")
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.queue_timeout = queue_timeout
+        self.priority = priority
+        self.on_overload = on_overload
+        self._semaphore = threading.BoundedSemaphore(max_concurrency) if max_concurrency else None
+
+    @property
+    def active(self):
+        return self._semaphore is not None or GLOBAL_APP_LIMIT is not None
+
+    def acquire(self):
+        """
+        Wait for a slot.
+        :return: (queue wait in seconds, app limit that was acquired or None), pass the latter to release
+        :raises CallbackOverloaded: if no slot was available within the queue timeout
+        """
+        app_limit = GLOBAL_APP_LIMIT
+        timeout = self.queue_timeout
+        if timeout is None:
+            timeout = app_limit.queue_timeout if app_limit is not None else DEFAULT_QUEUE_TIMEOUT
+
+        start = time.perf_counter()
+        queue_wait = 0.0
+        if self._semaphore is not None:
+            queue_wait = _acquire(self._semaphore, timeout)
+            if queue_wait is None:
+                raise CallbackOverloaded(f"[{self.name}] {self.max_concurrency} running, no slot within {timeout}s",
+                                         time.perf_counter() - start)
+
+        if app_limit is not None:
+            app_wait = app_limit.acquire(self.priority, timeout - queue_wait)
+            if app_wait is None:
+                if self._semaphore is not None:
+                    self._semaphore.release()
+                raise CallbackOverloaded(f"[{self.name}] app limit of {app_limit.max_concurrency} reached, "
+                                         f"no {self.priority} slot within {timeout}s", time.perf_counter() - start)
+            queue_wait += app_wait
+
+        return queue_wait, app_limit
+
+    def release(self, app_limit):
+        if app_limit is not None:
+            app_limit.release(self.priority)
+        if self._semaphore is not None:
+            self._semaphore.release()
+
+    def shed(self, error):
+        """Reject an overloaded request per on_overload."""
+        if self.on_overload == OVERLOAD_503:
+            from flask import abort
+            abort(503, description=str(error))
+        raise PreventUpdate()
@@ -0,0 +1,167 @@
+"""
+Memory profile logic.   Sample callback invocations and record their tracemalloc peak and the memory they retain.
+  - nothing is imported or started unless a callback is registered with memory_profile
+  - only one invocation per process is profiled at a time, but tracemalloc traces every thread: allocations of requests
+    running concurrently in other threads are counted in the peak and the retained lines too
+  - the per line breakdown and the snapshot are taken when func returns, they show memory retained at exit, not what
+    made up the peak (temporaries freed before the return only show in peak_bytes)
+  - invocations whose peak is over the snapshot threshold have their tracemalloc snapshot written to disk
+"""
+import logging
+import os
+import random
+import re
+import threading
+import time
+
+LOGGER = logging.getLogger('dash_helper')
+
+DEFAULT_MEMORY_SAMPLE_RATE = 0.01
+DEFAULT_MEMORY_TOP_N = 10
+DEFAULT_MEMORY_FRAMES = 1
+
+_PROFILE_LOCK = threading.Lock()
+
+
+class MemoryProfileConfig:
+    """
+    Memory profiling options for a callback.
+    :param sample_rate: fraction (0-1) of invocations to profile
+    :param top_n: number of lines retaining the most memory at exit to keep
+    :param snapshot_dir: directory to write tracemalloc snapshots to (None to never write)
+    :param snapshot_threshold_mb: only write a snapshot if the peak is at least this many MB
+    :param frames: number of frames tracemalloc stores per allocation
+    """
+
+    def __init__(self, sample_rate=DEFAULT_MEMORY_SAMPLE_RATE, top_n=DEFAULT_MEMORY_TOP_N, snapshot_dir=None,
+                 snapshot_threshold_mb=512, frames=DEFAULT_MEMORY_FRAMES):
+        self.sample_rate = sample_rate
+        self.top_n = top_n
+        self.snapshot_dir = snapshot_dir
+        self.snapshot_threshold_mb = snapshot_threshold_mb
+        self.frames = frames
+
+    @classmethod
+    def from_arg(cls, memory_profile):
+        """
+        Build the config from the dash_helper 'memory_profile' argument.
+        Accepts None/False (disabled), True (default sample rate), a float sample rate, a dict of options or a config.
+        """
+        if memory_profile is None or memory_profile is False:
+            return None
+        if isinstance(memory_profile, cls):
+            return memory_profile
+        if memory_profile is True:
+            return cls()
+        if isinstance(memory_profile, (int, float)):
+            return cls(sample_rate=float(memory_profile))
+        if isinstance(memory_profile, dict):
+            return cls(**memory_profile)
+        raise ValueError(f"memory_profile must be a bool, float, dict or MemoryProfileConfig, found {type(memory_profile)}")
+
+
+class MemoryProfile:
+    """Tracks a single profiled invocation.   Use start_memory_profile to create one."""
+
+    def __init__(self, config, name):
+        self.config = config
+        self.name = name
+        self.started_tracing = False
+        self.baseline = 0
+        self.result = None
+
+    def start(self):
+        import tracemalloc
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.config.frames)
+            self.started_tracing = True
+        elif hasattr(tracemalloc, 'reset_peak'):
+            tracemalloc.reset_peak()
+        self.baseline = tracemalloc.get_traced_memory()[0]
+
+    def stop(self, label=None, incomplete=False):
+        """
+        Stop profiling and return the result dict (peak_bytes, net_bytes, retained_top, snapshot_path, incomplete).
+        retained_top and the snapshot are taken at the end of the invocation, they show memory still held then.
+        :param incomplete: the profiled code is still running (deadline overrun on its own thread), the result only
+            covers it up to now and no snapshot is written
+        """
+        import tracemalloc
+        try:
+            current, peak = tracemalloc.get_traced_memory()
+            snapshot = tracemalloc.take_snapshot().filter_traces((
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+                tracemalloc.Filter(False, __file__),
+            ))
+
+            retained_top = []
+            for stat in snapshot.statistics('lineno')[:self.config.top_n]:
+                frame = stat.traceback[0]
+                retained_top.append({'line': f"{frame.filename}:{frame.lineno}", 'size': stat.size,
+                                     'count': stat.count})
+
+            self.result = {
+                'peak_bytes': max(0, peak - self.baseline),
+                'net_bytes': current - self.baseline,
+                'retained_top': retained_top,
+                'snapshot_path': None,
+                'incomplete': incomplete,
+            }
+
+            threshold = self.config.snapshot_threshold_mb
+            if not incomplete and self.config.snapshot_dir and (threshold is None or self.result['peak_bytes'] >= threshold * 1024 * 1024):
+                self.result['snapshot_path'] = self._dump(snapshot, label)
+
+        except Exception as e:
+            LOGGER.error(f"[{self.name}] Unable to collect memory profile: {e}", exc_info=True)
+
+        finally:
+            if self.started_tracing:
+                tracemalloc.stop()
+            _PROFILE_LOCK.release()
+
+        return self.result
+
+    def _dump(self, snapshot, label):
+        name = re.sub(r'[^A-Za-z0-9_.-]+', '_', f"{self.name}_{label}" if label else self.name)
+        path = os.path.join(self.config.snapshot_dir, f"{name}_{int(time.time() * 1000)}_{os.getpid()}.tracemalloc")
+        try:
+            os.makedirs(self.config.snapshot_dir, exist_ok=True)
+            snapshot.dump(path)
+            LOGGER.warning(f"[{self.name}] Memory peak {self.result['peak_bytes'] / 1048576:.1f}MB, snapshot of the "
+                           f"memory retained at exit written to {path}")
+            return path
+        except OSError as e:
+            LOGGER.error(f"[{self.name}] Unable to write memory snapshot '{path}': {e}")
+            return None
+
+
+def start_memory_profile(config, name):
+    """
+    Start profiling an invocation if it is sampled and no other invocation is being profiled.
+    :return: MemoryProfile to stop() once the callback function returns, or None if this invocation is not profiled
+    """
+    if config.sample_rate < 1.0 and random.random() >= config.sample_rate:
+        return None
+    if not _PROFILE_LOCK.acquire(blocking=False):
+        return None
+
+    profile = MemoryProfile(config, name)
+    try:
+        profile.start()
+    except Exception:
+        _PROFILE_LOCK.release()
+        raise
+    return profile
+
+
+def format_memory_profile(result, top_n=3):
+    """Short one line summary used in the callback log."""
+    output = f"mem_peak={result['peak_bytes'] / 1048576:.1f}MB mem_net={result['net_bytes'] / 1048576:.1f}MB"
+    top = ', '.join(f"{item['line']}={item['size'] / 1048576:.1f}MB" for item in result['retained_top'][:top_n])
+    if top:
+        output += f" retained_at_exit=[{top}]"
+    if result.get('incomplete'):
+        output += " incomplete=still_running"
+    return output
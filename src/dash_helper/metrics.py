@@ -0,0 +1,211 @@
+"""
+Metrics logic.   In-process registry of per callback counters and value summaries.
+  - every update is a dict lookup plus an add / append, so recording is cheap enough to do on every callback
+  - summaries keep a bounded window of recent values for percentiles
+  - the registry is per process, each gunicorn worker has its own
+  - the most recent invocations and the slowest ones (with their debug_str) are kept in bounded buffers
+"""
+import collections
+import heapq
+import itertools
+import threading
+import time
+
+DEFAULT_SUMMARY_WINDOW = 1024
+DEFAULT_RECENT_SIZE = 100
+DEFAULT_SLOWEST_SIZE = 10
+
+METRIC_LATENCY = 'latency'
+COUNTER_CALLS = 'calls'
+COUNTER_ERRORS = 'errors'
+COUNTER_CACHE_HIT = 'cache_hit'
+COUNTER_CACHE_MISS = 'cache_miss'
+METRIC_QUEUE_WAIT = 'queue_wait'
+COUNTER_SHED = 'shed'
+
+_SEQUENCE = itertools.count()
+
+
+class Summary:
+    """Running count / total / min / max of an observed value plus a bounded window of recent values."""
+    __slots__ = ('count', 'total', 'min', 'max', 'recent')
+
+    def __init__(self, window=DEFAULT_SUMMARY_WINDOW):
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = None
+        self.recent = collections.deque(maxlen=window)
+
+    def observe(self, value):
+        self.count += 1
+        self.total += value
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+        self.recent.append(value)
+
+    @property
+    def mean(self):
+        if self.count == 0:
+            return None
+        return self.total / self.count
+
+    def percentile(self, pct):
+        """Percentile (0-100) of the recent window, None if nothing has been observed."""
+        values = sorted(self.recent)
+        if not values:
+            return None
+        idx = min(len(values) - 1, max(0, int(round(pct / 100.0 * (len(values) - 1)))))
+        return values[idx]
+
+    def to_dict(self):
+        return {
+            'count': self.count,
+            'total': self.total,
+            'mean': self.mean,
+            'min': self.min,
+            'max': self.max,
+            'p50': self.percentile(50),
+            'p95': self.percentile(95),
+            'p99': self.percentile(99),
+        }
+
+
+class CallbackMetrics:
+    """Counters, summaries and recent / slowest invocations for one callback."""
+
+    def __init__(self, name, window=DEFAULT_SUMMARY_WINDOW, recent_size=DEFAULT_RECENT_SIZE,
+                 slowest_size=DEFAULT_SLOWEST_SIZE):
+        self.name = name
+        self.window = window
+        self.counters = collections.defaultdict(int)
+        self.summaries = {}
+        self.recent = collections.deque(maxlen=recent_size)
+        self.slowest_size = slowest_size
+        self._slowest = []
+        self._lock = threading.Lock()
+
+    def increment(self, counter, value=1):
+        with self._lock:
+            self.counters[counter] += value
+
+    def observe(self, metric, value):
+        summary = self.summaries.get(metric)
+        if summary is None:
+            summary = self.summaries.setdefault(metric, Summary(self.window))
+        with self._lock:
+            summary.observe(value)
+
+    def record_invocation(self, duration, status, trigger=None, error=False, snapshot=None):
+        """
+        Record one callback invocation.
+        :param duration: total time in seconds
+        :param status: outcome (completed, error, no_change, ...)
+        :param trigger: trigger id string
+        :param error: count the invocation as an error
+        :param snapshot: callable returning the debug string, only called if the invocation is one of the slowest
+        """
+        record = {'time': time.time(), 'duration': duration, 'status': status, 'trigger': trigger}
+        self.recent.append(record)
+        latency = self.summaries.get(METRIC_LATENCY)
+        if latency is None:
+            latency = self.summaries.setdefault(METRIC_LATENCY, Summary(self.window))
+
+        with self._lock:
+            self.counters[COUNTER_CALLS] += 1
+            if error:
+                self.counters[COUNTER_ERRORS] += 1
+            latency.observe(duration)
+            is_slow = len(self._slowest) < self.slowest_size or duration > self._slowest[0][0]
+
+        if is_slow and self.slowest_size > 0:
+            if snapshot is not None:
+                try:
+                    record = dict(record, debug_str=snapshot())
+                except Exception as e:
+                    record = dict(record, debug_str=f"<<<error generating output: {e}>>>")
+            entry = (duration, next(_SEQUENCE), record)
+            with self._lock:
+                if len(self._slowest) < self.slowest_size:
+                    heapq.heappush(self._slowest, entry)
+                elif duration > self._slowest[0][0]:
+                    heapq.heapreplace(self._slowest, entry)
+
+    @property
+    def slowest(self):
+        """Slowest recorded invocations, slowest first."""
+        with self._lock:
+            entries = list(self._slowest)
+        return [entry[2] for entry in sorted(entries, key=lambda x: x[0], reverse=True)]
+
+    @property
+    def error_rate(self):
+        calls = self.counters.get(COUNTER_CALLS, 0)
+        if not calls:
+            return None
+        return self.counters.get(COUNTER_ERRORS, 0) / calls
+
+    @property
+    def cache_hit_ratio(self):
+        hits = self.counters.get(COUNTER_CACHE_HIT, 0)
+        total = hits + self.counters.get(COUNTER_CACHE_MISS, 0)
+        if not total:
+            return None
+        return hits / total
+
+    def get_summary(self, metric):
+        return self.summaries.get(metric)
+
+    def to_dict(self):
+        return {
+            'counters': dict(self.counters),
+            'summaries': {metric: summary.to_dict() for metric, summary in list(self.summaries.items())},
+            'error_rate': self.error_rate,
+            'cache_hit_ratio': self.cache_hit_ratio,
+            'recent': list(self.recent),
+            'slowest': self.slowest,
+        }
+
+
+class MetricsRegistry:
+    """Registry of CallbackMetrics keyed by callback name."""
+
+    def __init__(self, window=DEFAULT_SUMMARY_WINDOW):
+        self.window = window
+        self._callbacks = {}
+        self._lock = threading.Lock()
+
+    def callback(self, name):
+        metrics = self._callbacks.get(name)
+        if metrics is None:
+            with self._lock:
+                metrics = self._callbacks.get(name)
+                if metrics is None:
+                    metrics = CallbackMetrics(name, self.window)
+                    self._callbacks[name] = metrics
+        return metrics
+
+    def increment(self, name, counter, value=1):
+        self.callback(name).increment(counter, value)
+
+    def observe(self, name, metric, value):
+        self.callback(name).observe(metric, value)
+
+    def names(self):
+        return list(self._callbacks.keys())
+
+    def snapshot(self):
+        return {name: metrics.to_dict() for name, metrics in list(self._callbacks.items())}
+
+    def reset(self):
+        with self._lock:
+            self._callbacks = {}
+
+
+METRICS = MetricsRegistry()
+
+
+def get_metrics_registry():
+    return METRICS
@@ -0,0 +1,258 @@
+"""
+Offline execution logic.   Run chains of registered dash_helper callbacks without flask or a browser.
+  - the dependency graph links each callback's Outputs to the callbacks that have them as Inputs
+  - a simulated trigger (or the initial page load) propagates through the chain in dependency order, like the dash
+    renderer does: a callback runs once every callback feeding it has finished, and only if one of its Inputs changed
+  - independent branches run in parallel in a thread pool
+  - used for fast regression suites and for precomputing page states in batch jobs
+"""
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+import dash
+from dash.development.base_component import Component
+from dash.exceptions import PreventUpdate
+
+from .registry import REGISTRY
+
+LOGGER = logging.getLogger('dash_helper')
+
+RUN_COMPLETED = 'completed'
+RUN_PREVENTED = 'prevented'
+RUN_SKIPPED = 'skipped'
+RUN_ERROR = 'error'
+
+DEFAULT_OFFLINE_WORKERS = 4
+
+
+def prop_name(component_id, component_property):
+    return f"{component_id}.{component_property}"
+
+
+def layout_state(layout):
+    """
+    {'id.prop': value} of every property set in a layout, to use as the initial state of ChainExecutor.run.
+    Component valued properties (e.g. children holding components) are left out.
+    """
+    state = {}
+
+    def is_component(value):
+        if isinstance(value, (list, tuple)):
+            return any(is_component(x) for x in value)
+        return isinstance(value, Component)
+
+    def walk(component):
+        if isinstance(component, (list, tuple)):
+            for child in component:
+                walk(child)
+            return
+        if not isinstance(component, Component):
+            return
+        component_id = getattr(component, 'id', None)
+        for name in component._prop_names:
+            value = getattr(component, name, None)
+            if value is None:
+                continue
+            if is_component(value):
+                walk(value)
+            elif isinstance(component_id, str) and name != 'id':
+                state[prop_name(component_id, name)] = value
+
+    walk(layout() if callable(layout) else layout)
+    return state
+
+
+class CallbackNode:
+    """One callback of the dependency graph."""
+
+    def __init__(self, registration):
+        self.registration = registration
+        self.name = registration.name
+        self.inputs = tuple(prop_name(x.key, x.prop) for x in registration.schema.inputs)
+        self.states = tuple(prop_name(x.key, x.prop) for x in registration.schema.states)
+        self.outputs = tuple(prop_name(x.key, x.prop) for x in registration.schema.outputs)
+        self.prevent_initial_call = bool(registration.options.get('prevent_initial_call'))
+
+    def __repr__(self):
+        return f"CallbackNode({self.name}: {list(self.inputs)} -> {list(self.outputs)})"
+
+
+class ChainResult:
+    """Result of ChainExecutor.run: final state, changed properties and one entry per callback considered."""
+
+    def __init__(self, state, changed, runs, errors, duration):
+        self.state = state
+        self.changed = changed
+        self.runs = runs
+        self.errors = errors
+        self.duration = duration
+
+    @property
+    def ran(self):
+        """Names of the callbacks that ran, in completion order"""
+        return [x['name'] for x in self.runs if x['status'] != RUN_SKIPPED]
+
+    def __getitem__(self, item):
+        return self.state[item]
+
+    def get(self, item, default=None):
+        return self.state.get(item, default)
+
+    def __repr__(self):
+        return f"ChainResult({len(self.ran)} callbacks ran, {len(self.changed)} properties changed, " \
+               f"{len(self.errors)} errors, {self.duration:.3f}s)"
+
+
+class ChainExecutor:
+    """
+    Propagate a trigger through registered callbacks:
+        executor = ChainExecutor(app=app)
+        result = executor.run(layout_state(app.layout), trigger='dropdown.value', changes={'dropdown.value': 'EU'})
+        result['chart.figure']
+    Pattern matching callbacks are not part of the graph.
+    """
+
+    def __init__(self, app=None, names=None, registry=None, max_workers=DEFAULT_OFFLINE_WORKERS):
+        self.max_workers = max_workers
+        self.nodes = {}
+        self.skipped = []
+        for registration in registry if registry is not None else REGISTRY:
+            if app is not None and registration.app is not app:
+                continue
+            if names is not None and registration.name not in names:
+                continue
+            if registration.run_standalone is None or registration.schema is None or registration.schema.has_patterns:
+                self.skipped.append(registration.name)
+                continue
+            self.nodes[registration.name] = CallbackNode(registration)
+        if self.skipped:
+            LOGGER.debug(f"Offline executor skipped callbacks {self.skipped} (pattern matching or not decorated)")
+
+        self.consumers = {}
+        for node in self.nodes.values():
+            for name in node.inputs:
+                self.consumers.setdefault(name, []).append(node.name)
+
+    def downstream(self, props):
+        """Names of the callbacks reachable from the given properties."""
+        found = set()
+        pending = list(props)
+        while pending:
+            for name in self.consumers.get(pending.pop(), ()):
+                if name not in found:
+                    found.add(name)
+                    pending.extend(self.nodes[name].outputs)
+        return found
+
+    def _predecessors(self, candidates):
+        producers = {}
+        for name in candidates:
+            for output in self.nodes[name].outputs:
+                producers.setdefault(output, set()).add(name)
+        return {name: {p for x in self.nodes[name].inputs for p in producers.get(x, ()) if p != name}
+                for name in candidates}
+
+    def run(self, state=None, trigger=None, changes=None, raise_errors=True):
+        """
+        Run the callback chain.
+        :param state: initial {'id.prop': value} of the page, e.g. from layout_state(app.layout)
+        :param trigger: 'id.prop' (or list of them) the user changed, None simulates the initial page load
+        :param changes: {'id.prop': value} applied to the state before running, e.g. the new value of the trigger
+        :param raise_errors: re-raise the first callback exception once the chain is done, else only record it
+        :return: ChainResult
+        """
+        start = time.perf_counter()
+        state = dict(state or {})
+        state.update(changes or {})
+        initial_load = trigger is None
+        if initial_load:
+            changed = set()
+            candidates = set(self.nodes)
+        else:
+            changed = {trigger} if isinstance(trigger, str) else set(trigger)
+            unknown = [x for x in changed if x not in self.consumers]
+            if unknown:
+                error_msg = f"Trigger {unknown} is not an Input of any callback"
+                LOGGER.error(error_msg)
+                raise ValueError(error_msg)
+            candidates = self.downstream(changed)
+
+        predecessors = self._predecessors(candidates)
+        done = set()
+        runs = []
+        errors = {}
+        output_changes = set()
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='dash_helper-offline') as pool:
+            running = {}
+            while len(done) < len(candidates):
+                ready = [x for x in candidates
+                         if x not in done and x not in running.values() and predecessors[x] <= done]
+                for name in sorted(ready):
+                    node = self.nodes[name]
+                    fire = not node.prevent_initial_call if initial_load else any(x in changed for x in node.inputs)
+                    if not fire:
+                        done.add(name)
+                        runs.append({'name': name, 'status': RUN_SKIPPED, 'duration': 0.0, 'changed': []})
+                        continue
+                    triggered = None
+                    if not initial_load:
+                        triggered = [{'prop_id': x, 'value': state.get(x)} for x in node.inputs if x in changed]
+                    values = [state.get(x) for x in node.inputs + node.states]
+                    running[pool.submit(self._run_node, node, values, triggered)] = name
+
+                if not running:
+                    if not ready:
+                        error_msg = f"Callback dependency cycle between {sorted(candidates - done)}"
+                        LOGGER.error(error_msg)
+                        raise ValueError(error_msg)
+                    continue
+
+                finished, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                for future in finished:
+                    name = running.pop(future)
+                    run = future.result()
+                    for output, value in run.pop('outputs').items():
+                        state[output] = value
+                        changed.add(output)
+                        output_changes.add(output)
+                    if run['status'] == RUN_ERROR:
+                        errors[name] = run['exception']
+                    runs.append(run)
+                    done.add(name)
+
+        result = ChainResult(state, output_changes, runs, errors, time.perf_counter() - start)
+        LOGGER.debug(f"Offline chain {trigger or 'initial load'}: {result}")
+        if errors and raise_errors:
+            raise next(iter(errors.values()))
+        return result
+
+    def _run_node(self, node, values, triggered):
+        start = time.perf_counter()
+        run = {'name': node.name, 'status': RUN_COMPLETED, 'changed': [], 'outputs': {}}
+        try:
+            dh = node.registration.run_standalone(values, triggered)
+            if dh is None:
+                run['status'] = RUN_PREVENTED
+            else:
+                for output, entry in zip(node.outputs, node.registration.schema.outputs):
+                    value = dh._outputs[entry.key][entry.prop]
+                    if value is not dash.no_update:
+                        run['outputs'][output] = value
+                        run['changed'].append(output)
+        except PreventUpdate:
+            run['status'] = RUN_PREVENTED
+        except Exception as e:
+            LOGGER.error(f"[{node.name}] Offline run failed: {e}", exc_info=True)
+            run['status'] = RUN_ERROR
+            run['exception'] = e
+        run['duration'] = time.perf_counter() - start
+        return run
+
+
+def run_chain(state=None, trigger=None, changes=None, app=None, max_workers=DEFAULT_OFFLINE_WORKERS,
+              raise_errors=True):
+    """Shortcut for ChainExecutor(app=app, max_workers=max_workers).run(state, trigger, changes, raise_errors)"""
+    return ChainExecutor(app=app, max_workers=max_workers).run(state, trigger=trigger, changes=changes,
+                                                                raise_errors=raise_errors)
@@ -0,0 +1,123 @@
+"""
+Payload size logic.   Measure how many bytes each callback output adds to the response.
+  - 'exact' mode serializes with the same plotly JSON encoder dash uses
+  - 'estimate' mode walks the value and extrapolates from a sample of large lists / arrays, without building JSON
+"""
+import math
+
+PAYLOAD_MODE_EXACT = 'exact'
+PAYLOAD_MODE_ESTIMATE = 'estimate'
+
+DEFAULT_LARGE_OUTPUT_KB = 500
+ESTIMATE_SAMPLE_SIZE = 64
+
+# approximate characters per element when a numpy dtype kind is serialized to JSON
+_NUMPY_KIND_SIZE = {'b': 5, 'i': 8, 'u': 8, 'f': 19, 'c': 40, 'M': 28, 'm': 12, 'U': 16, 'S': 16, 'O': 16}
+
+
+class PayloadSizeConfig:
+    """
+    Payload size accounting options for a callback.
+    :param mode: 'exact' (plotly JSON encoder) or 'estimate' (fast walk of the value)
+    :param large_output_kb: outputs at or above this size are logged as a warning and flagged in the callback log
+    """
+
+    def __init__(self, mode=PAYLOAD_MODE_ESTIMATE, large_output_kb=DEFAULT_LARGE_OUTPUT_KB):
+        if mode not in (PAYLOAD_MODE_EXACT, PAYLOAD_MODE_ESTIMATE):
+            raise ValueError(f"payload size mode must be '{PAYLOAD_MODE_EXACT}' or '{PAYLOAD_MODE_ESTIMATE}', found '{mode}'")
+        self.mode = mode
+        self.large_output_kb = large_output_kb
+
+    @classmethod
+    def from_arg(cls, payload_size):
+        """
+        Build the config from the dash_helper 'payload_size' argument.
+        Accepts None/False (disabled), True (estimate), a mode string, a dict of options or a config.
+        """
+        if payload_size is None or payload_size is False:
+            return None
+        if isinstance(payload_size, cls):
+            return payload_size
+        if payload_size is True:
+            return cls()
+        if isinstance(payload_size, str):
+            return cls(mode=payload_size)
+        if isinstance(payload_size, dict):
+            return cls(**payload_size)
+        raise ValueError(f"payload_size must be a bool, str, dict or PayloadSizeConfig, found {type(payload_size)}")
+
+
+def json_size(value):
+    """Exact size in bytes of the value as serialized by dash (plotly JSON encoder)."""
+    from plotly.io.json import to_json_plotly
+    return len(to_json_plotly(value).encode('utf-8'))
+
+
+def estimate_json_size(value, _depth=0):
+    """
+    Estimate the serialized JSON size of a value in bytes.   Long lists are sampled and extrapolated, numpy arrays and
+    pandas objects are sized from their shape and dtype, so the cost does not grow with the size of the value.
+    """
+    if value is None or value is True:
+        return 4
+    if value is False:
+        return 5
+    if isinstance(value, str):
+        return len(value) + 2
+    if isinstance(value, int):
+        return len(int.__repr__(value))
+    if isinstance(value, float):
+        return 4 if math.isnan(value) else len(float.__repr__(value))
+    if isinstance(value, dict):
+        size = 2
+        for key, item in value.items():
+            size += len(str(key)) + 4 + estimate_json_size(item, _depth + 1)
+        return size
+    if isinstance(value, (list, tuple)):
+        return _estimate_sequence(value, _depth)
+
+    # numpy array
+    if hasattr(value, 'dtype') and hasattr(value, 'shape') and hasattr(value, 'size'):
+        kind = getattr(value.dtype, 'kind', 'O')
+        if kind == 'O' and value.size:
+            flat = value.ravel()
+            return _estimate_sequence(flat.tolist() if flat.size <= ESTIMATE_SAMPLE_SIZE else flat[:ESTIMATE_SAMPLE_SIZE].tolist(),
+                                      _depth, total=flat.size)
+        return 2 + value.size * (_NUMPY_KIND_SIZE.get(kind, 16) + 1)
+
+    # pandas DataFrame / Series
+    if hasattr(value, 'to_dict') and hasattr(value, 'dtypes'):
+        rows = len(value)
+        sample = value.head(ESTIMATE_SAMPLE_SIZE)
+        records = sample.to_dict('records') if hasattr(sample, 'columns') else sample.tolist()
+        sample_size = estimate_json_size(records, _depth + 1)
+        if not records:
+            return sample_size
+        return int(sample_size * rows / len(records))
+
+    # dash components and plotly figures
+    if hasattr(value, 'to_plotly_json'):
+        return estimate_json_size(value.to_plotly_json(), _depth + 1)
+
+    return len(str(value)) + 2
+
+
+def _estimate_sequence(value, depth, total=None):
+    count = len(value) if total is None else total
+    if count == 0:
+        return 2
+    if len(value) <= ESTIMATE_SAMPLE_SIZE:
+        sampled = value
+    else:
+        step = len(value) / ESTIMATE_SAMPLE_SIZE
+        sampled = [value[int(idx * step)] for idx in range(ESTIMATE_SAMPLE_SIZE)]
+    sampled_size = sum(estimate_json_size(item, depth + 1) + 1 for item in sampled)
+    return 2 + int(sampled_size * count / len(sampled))
+
+
+def format_size(size):
+    if size >= 1048576:
+        return f"{size / 1048576:.1f}MB"
+    if size >= 1024:
+        return f"{size / 1024:.1f}KB"
+    return f"{size}B"
@@ -0,0 +1,108 @@
+"""
+Preload logic.   Prepare dash_helper state in the master process before gunicorn forks its workers (--preload).
+  - lazily built per callback structures (layout tables, schemas) and optional modules are built / imported up front
+  - everything allocated so far is moved to the permanent GC generation (gc.freeze), so garbage collections in the
+    workers do not write to those objects and their memory pages stay shared copy-on-write
+  - memory_report shows how much of the worker memory is still shared with the master
+"""
+import gc
+import importlib
+import logging
+import os
+import time
+
+from .registry import REGISTRY
+
+LOGGER = logging.getLogger('dash_helper')
+
+# optional modules dash_helper imports lazily, imported by freeze so the workers do not each import them
+PRELOAD_MODULES = ('tabulate', 'plotly.io.json', 'flask', 'numpy', 'pandas', 'dash_helper.memory_profile',
+                   'dash_helper.diagnostics', 'dash_helper.blob_store', 'dash_helper.session_cache',
+                   'dash_helper.dispatch', 'dash_helper.router', 'dash_helper.batch',
+                   'dash_helper.result_cache', 'dash_helper.offline', 'dash_helper.graph', 'dash_helper.clientside',
+                   'dash_helper.downsample', 'dash_helper.datatable', 'dash_helper.fast_json',
+                   'dash_helper.chunked_store')
+
+_SMAPS_FIELDS = {
+    'Rss': 'rss',
+    'Pss': 'pss',
+    'Shared_Clean': 'shared_clean',
+    'Shared_Dirty': 'shared_dirty',
+    'Private_Clean': 'private_clean',
+    'Private_Dirty': 'private_dirty',
+    'Swap': 'swap',
+}
+
+
+def freeze(gc_freeze=True, preload_modules=PRELOAD_MODULES, gc_collect=False):
+    """
+    Build every registered callback's structures eagerly and freeze the heap for copy-on-write sharing.
+    Nothing is locked: a callback registered after freeze still works, its structures are just not shared.
+    Call it once at the end of the app module, after every callback has been registered, e.g.
+        app = dash.Dash(__name__)
+        ...
+        dash_helper.freeze()
+        server = app.server
+    :param gc_freeze: move all current objects to the permanent GC generation (python 3.7+)
+    :param preload_modules: optional modules to import now, missing ones are skipped
+    :param gc_collect: run gc.collect() before freezing.   Off by default, the holes a collection leaves in the
+        master's memory pages are filled by the workers' allocations, which copies those pages in every worker
+    :return: number of callbacks prepared
+    """
+    start = time.perf_counter()
+    for module_name in preload_modules or ():
+        try:
+            importlib.import_module(module_name)
+        except ImportError:
+            pass
+
+    count = 0
+    for registration in REGISTRY:
+        registration.prepare()
+        count += 1
+
+    frozen = 0
+    if gc_freeze and hasattr(gc, 'freeze'):
+        if gc_collect:
+            gc.collect()
+        gc.freeze()
+        frozen = gc.get_freeze_count()
+
+    LOGGER.info(f"dash_helper freeze: {count} callbacks prepared, {frozen} objects frozen "
+                f"({time.perf_counter() - start:.3f}s)")
+    return count
+
+
+def unfreeze():
+    """Move the frozen objects back to the collected generations."""
+    if hasattr(gc, 'unfreeze'):
+        gc.unfreeze()
+
+
+def memory_report(pid=None):
+    """
+    Shared versus private memory of a process from /proc/<pid>/smaps_rollup (linux only), in bytes.
+    'shared' is memory still shared with other processes (e.g. the gunicorn master), 'private' is owned by this worker.
+    Returns None if the information is not available.
+    """
+    path = f"/proc/{pid or 'self'}/smaps_rollup"
+    try:
+        with open(path) as f:
+            lines = f.readlines()
+    except OSError:
+        return None
+
+    report = {'pid': pid or os.getpid()}
+    for line in lines:
+        name, _, value = line.partition(':')
+        field = _SMAPS_FIELDS.get(name.strip())
+        if field is None:
+            continue
+        tokens = value.split()
+        if tokens:
+            report[field] = int(tokens[0]) * 1024
+    report['shared'] = report.get('shared_clean', 0) + report.get('shared_dirty', 0)
+    report['private'] = report.get('private_clean', 0) + report.get('private_dirty', 0)
+    if hasattr(gc, 'get_freeze_count'):
+        report['gc_frozen_objects'] = gc.get_freeze_count()
+    return report
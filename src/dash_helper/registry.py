@@ -0,0 +1,121 @@
+"""
+Callback registry logic.   Keep track of every callback registered through dash_helper.
+  - each registration records where it was defined, its inputs / states / outputs and the wrapped function
+  - names are unique within the process, so they can be used as metrics keys
+"""
+import threading
+
+
+class CallbackRegistration:
+    """Information about a single dash_helper callback."""
+
+    def __init__(self, name, app, dash_app_name, callback_name, cb_file, cb_path, cb_line,
+                 defined_inputs, defined_states, defined_outputs, options=None, layout_info=None):
+        self.name = name
+        self.app = app
+        self.dash_app_name = dash_app_name
+        self.callback_name = callback_name
+        self.cb_file = cb_file
+        self.cb_path = cb_path
+        self.cb_line = cb_line
+        self.defined_inputs = defined_inputs
+        self.defined_states = defined_states
+        self.defined_outputs = defined_outputs
+        self.options = options or {}
+        self.func = None
+        self.wrapper = None
+        self.schema = None
+        self.cache = None
+        self.warm = None
+        self.run_standalone = None
+        self._layout_info = layout_info
+
+    @property
+    def layout_info(self):
+        """Component table shown by display_dash_helper_init (built on first access)."""
+        self.prepare()
+        return self._layout_info or []
+
+    def prepare(self):
+        """Build the structures computed on first use now, e.g. before the workers fork (see preload.freeze)."""
+        if callable(self._layout_info):
+            self._layout_info = self._layout_info()
+
+    @property
+    def location(self):
+        return f"{self.cb_file}:{self.cb_line}"
+
+    def to_dict(self):
+        return {
+            'name': self.name,
+            'dash_app_name': self.dash_app_name,
+            'callback_name': self.callback_name,
+            'location': self.location,
+            'inputs': [f"{x.component_id}.{x.component_property}" for x in self.defined_inputs],
+            'states': [f"{x.component_id}.{x.component_property}" for x in self.defined_states],
+            'outputs': [f"{x.component_id}.{x.component_property}" for x in self.defined_outputs],
+            'options': {k: str(v) for k, v in self.options.items()},
+        }
+
+    def __repr__(self):
+        return f"CallbackRegistration({self.name} at {self.location})"
+
+
+class CallbackRegistry:
+    """Registry of CallbackRegistration keyed by unique callback name."""
+
+    def __init__(self):
+        self._registrations = {}
+        self._lock = threading.Lock()
+
+    def register(self, registration):
+        """Add a registration, making its name unique by appending the definition location if needed."""
+        with self._lock:
+            if registration.name in self._registrations:
+                base_name = f"{registration.name}@{registration.location}"
+                name = base_name
+                count = 1
+                while name in self._registrations:
+                    count += 1
+                    name = f"{base_name}#{count}"
+                registration.name = name
+            self._registrations[registration.name] = registration
+        return registration
+
+    def get(self, name, default=None):
+        return self._registrations.get(name, default)
+
+    def names(self):
+        return list(self._registrations.keys())
+
+    def clear(self):
+        with self._lock:
+            self._registrations = {}
+
+    def __iter__(self):
+        return iter(list(self._registrations.values()))
+
+    def warmup(self, names=None, examples=True, top_n=10, fingerprints=None, max_workers=1, background=True,
+               queue_timeout=None):
+        """Precompute the result cache of callbacks registered with cache=..., see result_cache.warmup"""
+        from .result_cache import warmup
+        return warmup(self, names=names, examples=examples, top_n=top_n, fingerprints=fingerprints,
+                      max_workers=max_workers, background=background, queue_timeout=queue_timeout)
+
+    def recorded_fingerprints(self, top_n=10):
+        """Most frequent invocations of each cached callback, e.g. to save and pass to warmup after a deploy"""
+        from .result_cache import recorded_fingerprints
+        return recorded_fingerprints(self, top_n=top_n)
+
+    def __len__(self):
+        return len(self._registrations)
+
+    def __contains__(self, name):
+        return name in self._registrations
+
+
+REGISTRY = CallbackRegistry()
+
+
+def get_callback_registry():
+    return REGISTRY
@@ -0,0 +1,351 @@
+"""
+Result cache logic.   Cache callback results keyed by a fingerprint of the trigger and the input / state values.
+  - enabled per callback with dash_helper(..., cache=True / ttl in seconds / dict of options)
+  - by default results are shared by every session, which is only correct for session independent callbacks, callbacks
+    reading dh.session_cache (or anything else per user) use per_session=True to add the session id to the key
+  - the cache is checked before the callback queues for a concurrency slot, a hit never waits
+  - only completed results are stored, errors, timeouts and cancelled runs are never cached
+  - the most frequent fingerprints are counted, so a new deploy can warm the cache with what production asked for
+  - warmup precomputes declared examples and the top fingerprints in background threads, each computation takes a
+    background priority slot of the app concurrency limit so it does not compete with live traffic
+"""
+import collections
+import hashlib
+import json
+import logging
+import threading
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+
+from .limits import CallbackLimiter, CallbackOverloaded, PRIORITY_BACKGROUND
+from .schema import argument_columns, values_from_row
+
+LOGGER = logging.getLogger('dash_helper')
+
+DEFAULT_CACHE_SIZE = 1024
+DEFAULT_RECORD_TOP = 100
+DEFAULT_WARMUP_TOP_N = 10
+DEFAULT_WARMUP_WORKERS = 1
+WARMUP_RETRY_INTERVAL = 0.5
+
+# row key of a warmup example holding the trigger ('id.prop'), the initial call is used without it
+WARMUP_TRIGGER = '_trigger'
+
+_MISSING = object()
+
+
+def fingerprint(triggered, values):
+    """Stable key of a callback invocation: the triggered prop_ids plus the input / state values."""
+    trigger_ids = [x.get('prop_id') for x in triggered or ()]
+    encoded = json.dumps([trigger_ids, list(values)], sort_keys=True, separators=(',', ':'), default=repr)
+    return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
+
+class ResultCacheBackend(ABC):
+    """Storage of cached callback results, implement get / set / delete / clear to use another store."""
+
+    @abstractmethod
+    def get(self, key, default=None):
+        raise NotImplementedError
+
+    @abstractmethod
+    def set(self, key, value, ttl=None):
+        raise NotImplementedError
+
+    @abstractmethod
+    def delete(self, key):
+        raise NotImplementedError
+
+    @abstractmethod
+    def clear(self):
+        raise NotImplementedError
+
+    def __contains__(self, key):
+        return self.get(key, _MISSING) is not _MISSING
+
+
+class MemoryResultCache(ResultCacheBackend):
+    """
+    In-process LRU result cache.
+    :param max_entries: results kept, least recently used ones are evicted first
+    """
+
+    def __init__(self, max_entries=DEFAULT_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+            value, expires = entry
+            if expires is not None and expires < time.monotonic():
+                del self._entries[key]
+                return default
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        expires = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            self._entries[key] = (value, expires)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+GLOBAL_RESULT_CACHE = None
+
+
+def register_result_cache(cache):
+    """Globally register the backend used by callbacks registered with cache=..."""
+    global GLOBAL_RESULT_CACHE
+    GLOBAL_RESULT_CACHE = cache
+
+
+def get_result_cache():
+    global GLOBAL_RESULT_CACHE
+    if GLOBAL_RESULT_CACHE is None:
+        GLOBAL_RESULT_CACHE = MemoryResultCache()
+    return GLOBAL_RESULT_CACHE
+
+
+class ResultCacheConfig:
+    """
+    Result cache options for a callback.
+    :param ttl: seconds a result stays valid (None for no expiry)
+    :param record_top: number of most frequent fingerprints to keep for warmup (0 to not record)
+    :param warmup: example rows precomputed by warmup, dicts keyed by 'id.prop' / 'id' (plus '_trigger') or lists
+                   of values in callback argument order
+    :param per_session: add the session id to the key, for results that depend on the session, such results are not
+                        recorded or warmed, and are not cached when the app has no session (flask secret_key)
+    """
+
+    def __init__(self, ttl=None, record_top=DEFAULT_RECORD_TOP, warmup=None, per_session=False):
+        self.ttl = ttl
+        self.per_session = per_session
+        self.record_top = 0 if per_session else record_top
+        self.warmup = [] if per_session else list(warmup or ())
+        if per_session and warmup:
+            LOGGER.warning("cache warmup examples are ignored with per_session=True")
+
+    @classmethod
+    def from_arg(cls, cache):
+        """
+        Build the config from the dash_helper 'cache' argument.
+        Accepts None/False (disabled), True (no expiry), a ttl in seconds, a dict of options or a config.
+        """
+        if cache is None or cache is False:
+            return None
+        if isinstance(cache, cls):
+            return cache
+        if cache is True:
+            return cls()
+        if isinstance(cache, (int, float)):
+            return cls(ttl=cache)
+        if isinstance(cache, dict):
+            return cls(**cache)
+        raise ValueError(f"cache must be a bool, number, dict or ResultCacheConfig, found {type(cache)}")
+
+
+class FingerprintCounter:
+    """Counts invocations per fingerprint and keeps the arguments of the most frequent ones."""
+
+    def __init__(self, max_tracked=DEFAULT_RECORD_TOP):
+        self.max_tracked = max_tracked
+        self._counts = collections.Counter()
+        self._arguments = {}
+        self._lock = threading.Lock()
+
+    def record(self, key, triggered, values):
+        if self.max_tracked <= 0:
+            return
+        with self._lock:
+            self._counts[key] += 1
+            if key not in self._arguments:
+                self._arguments[key] = (triggered, values)
+                # prune to the most frequent once twice the limit is tracked, so the cost is amortized
+                if len(self._arguments) > self.max_tracked * 2:
+                    keep = self._counts.most_common(self.max_tracked)
+                    self._counts = collections.Counter(dict(keep))
+                    self._arguments = {k: self._arguments[k] for k, _ in keep}
+
+    def top(self, n):
+        """[(count, triggered, values), ...] of the n most frequent fingerprints"""
+        with self._lock:
+            return [(count, *self._arguments[key]) for key, count in self._counts.most_common(n)]
+
+    def __len__(self):
+        return len(self._counts)
+
+
+class CallbackCache:
+    """The result cache of one callback: fingerprints, lookups and stores with the callback's options."""
+
+    def __init__(self, name, config):
+        self.name = name
+        self.config = config
+        self.fingerprints = FingerprintCounter(config.record_top)
+
+    def lookup(self, triggered, values, record=True, session_id=None):
+        """
+        (key, cached value or None, hit), the key is None when the result can not be cached
+        :param session_id: session of the invocation, part of the key with per_session
+        """
+        if self.config.per_session:
+            if session_id is None:
+                return None, None, False
+            key = f"{self.name}:{session_id}:{fingerprint(triggered, values)}"
+        else:
+            key = f"{self.name}:{fingerprint(triggered, values)}"
+        if record:
+            self.fingerprints.record(key, triggered, values)
+        value = get_result_cache().get(key, _MISSING)
+        if value is _MISSING:
+            return key, None, False
+        return key, value, True
+
+    def store(self, key, value):
+        get_result_cache().set(key, value, ttl=self.config.ttl)
+
+
+def _example_arguments(registration, example):
+    """(triggered, values) of a declared warmup example."""
+    if not isinstance(example, dict):
+        return None, list(example)
+
+    columns = argument_columns(registration.schema)
+    values = values_from_row(columns, example)
+    trigger = example.get(WARMUP_TRIGGER)
+    if not trigger:
+        return None, values
+    # the triggered value is the argument of the trigger property
+    trigger_value = next((value for (full_name, _), value in zip(columns, values) if full_name == trigger), None)
+    return [{'prop_id': trigger, 'value': trigger_value}], values
+
+
+class WarmupJob:
+    """Cache warmup run started by warmup(), per callback results are in .results once done."""
+
+    def __init__(self, tasks, max_workers, queue_timeout):
+        self.tasks = tasks
+        self.max_workers = max_workers
+        self.queue_timeout = queue_timeout
+        self.results = {}
+        self._done = threading.Event()
+        self._thread = None
+
+    def start(self, background=True):
+        if background:
+            self._thread = threading.Thread(target=self.run, name='dash_helper-warmup', daemon=True)
+            self._thread.start()
+        else:
+            self.run()
+        return self
+
+    def run(self):
+        start = time.perf_counter()
+        try:
+            with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='dash_helper-warmup') as pool:
+                for result in pool.map(lambda task: self._warm_callback(*task), self.tasks):
+                    self.results[result['name']] = result
+        finally:
+            self._done.set()
+        LOGGER.info(f"dash_helper warmup: {len(self.tasks)} callbacks in {time.perf_counter() - start:.3f}s")
+
+    def _warm_callback(self, registration, arguments):
+        start = time.perf_counter()
+        limiter = CallbackLimiter(f"{registration.name} warmup", queue_timeout=self.queue_timeout,
+                                  priority=PRIORITY_BACKGROUND)
+        result = {'name': registration.name, 'total': len(arguments), 'warmed': 0, 'cached': 0, 'skipped': 0,
+                  'failed': 0}
+        for idx, (triggered, values) in enumerate(arguments):
+            while True:
+                try:
+                    _, app_limit = limiter.acquire()
+                    break
+                except CallbackOverloaded:
+                    # live traffic is using the background slots, wait for it instead of giving up
+                    time.sleep(WARMUP_RETRY_INTERVAL)
+            try:
+                status = registration.warm(values, triggered)
+            except Exception as e:
+                LOGGER.warning(f"[{registration.name}] cache warmup entry {idx + 1} failed: {e}")
+                status = 'failed'
+            finally:
+                limiter.release(app_limit)
+            result[status] += 1
+            LOGGER.debug(f"[{registration.name}] cache warmup {idx + 1}/{len(arguments)} {status}")
+
+        result['duration'] = time.perf_counter() - start
+        LOGGER.info(f"[{registration.name}] cache warmup: {result['warmed']} warmed, {result['cached']} already cached, "
+                    f"{result['skipped']} skipped, {result['failed']} failed of {result['total']} "
+                    f"in {result['duration']:.3f}s")
+        return result
+
+    @property
+    def done(self):
+        return self._done.is_set()
+
+    def join(self, timeout=None):
+        """Wait for the warmup to finish, returns True if it did."""
+        return self._done.wait(timeout)
+
+
+def warmup(registry, names=None, examples=True, top_n=DEFAULT_WARMUP_TOP_N, fingerprints=None,
+           max_workers=DEFAULT_WARMUP_WORKERS, background=True, queue_timeout=None):
+    """
+    Precompute and cache results of callbacks registered with cache=...
+    :param registry: callback registry
+    :param names: callback names to warm (default every cached callback)
+    :param examples: include the examples declared with cache={'warmup': [...]}
+    :param top_n: include the top_n most frequent recorded fingerprints of each callback (0 for none)
+    :param fingerprints: {callback name: [(triggered, values), ...]} recorded elsewhere, e.g. exported from production
+                         with recorded_fingerprints()
+    :param max_workers: callbacks warmed at the same time
+    :param background: run in a background thread and return immediately
+    :param queue_timeout: seconds to wait for an app concurrency slot before retrying
+    :return: WarmupJob
+    """
+    tasks = []
+    for registration in registry:
+        if names is not None and registration.name not in names:
+            continue
+        if registration.cache is None or registration.warm is None:
+            continue
+
+        arguments = []
+        if examples:
+            arguments.extend(_example_arguments(registration, x) for x in registration.cache.config.warmup)
+        if fingerprints and registration.name in fingerprints:
+            arguments.extend((triggered, list(values)) for triggered, values in fingerprints[registration.name])
+        if top_n:
+            arguments.extend((triggered, values) for _, triggered, values in registration.cache.fingerprints.top(top_n))
+        if arguments:
+            tasks.append((registration, arguments))
+
+    return WarmupJob(tasks, max_workers=max(1, max_workers), queue_timeout=queue_timeout).start(background)
+
+
+def recorded_fingerprints(registry, top_n=DEFAULT_WARMUP_TOP_N):
+    """{callback name: [(triggered, values), ...]} of the most frequent invocations, JSON serializable."""
+    recorded = {}
+    for registration in registry:
+        if registration.cache is not None:
+            recorded[registration.name] = [[triggered, values]
+                                           for _, triggered, values in registration.cache.fingerprints.top(top_n)]
+    return recorded
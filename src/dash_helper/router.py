@@ -0,0 +1,297 @@
+"""
+URL routing logic.   Match dcc.Location pathname / search values to routes.
+  - routes are stored in a trie of path segments, matching walks the pathname once whatever the number of routes
+  - static segments win over parameters, parameters over a trailing '<path:...>' catch-all
+  - path parameters are typed ('<int:year>', '<float:ratio>', '<uuid:id>', '<path:rest>', default str), trie nodes are
+    shared by parameters of the same type and each route keeps its own parameter names ('/item/<int:id>' and
+    '/item/<int:item_id>/edit')
+  - query strings are parsed through an LRU cache, query parameters can be typed per route
+"""
+import functools
+import logging
+import uuid
+from urllib.parse import parse_qs, unquote
+
+LOGGER = logging.getLogger('dash_helper')
+
+QUERY_CACHE_SIZE = 1024
+
+
+def _to_bool(value):
+    if isinstance(value, bool):
+        return value
+    if str(value).lower() in ('1', 'true', 'yes', 'on'):
+        return True
+    if str(value).lower() in ('0', 'false', 'no', 'off', ''):
+        return False
+    raise ValueError(f"invalid boolean '{value}'")
+
+
+PATH_CONVERTERS = {
+    'str': str,
+    'int': int,
+    'float': float,
+    'uuid': uuid.UUID,
+    'bool': _to_bool,
+    'path': str,
+}
+
+
+@functools.lru_cache(maxsize=QUERY_CACHE_SIZE)
+def _parse_query_items(search):
+    parsed = parse_qs(search[1:] if search.startswith('?') else search)
+    # parse_qs returns values as lists, flatten them if single value
+    return tuple((k, v[0] if len(v) == 1 else tuple(v)) for k, v in parsed.items())
+
+
+def parse_query(search):
+    """Parse a location search string ('?a=1&b=2') into a new dict, single values are flattened."""
+    if not search:
+        return {}
+    return {k: list(v) if isinstance(v, tuple) else v for k, v in _parse_query_items(search)}
+
+
+def query_cache_info():
+    return _parse_query_items.cache_info()
+
+
+class RouteMatch:
+    """Result of a successful Router.match"""
+    __slots__ = ('route', 'path_params', 'query_params')
+
+    def __init__(self, route, path_params, query_params):
+        self.route = route
+        self.path_params = path_params
+        self.query_params = query_params
+
+    @property
+    def name(self):
+        return self.route.name
+
+    @property
+    def handler(self):
+        return self.route.handler
+
+    @property
+    def params(self):
+        """Query parameters overridden by path parameters."""
+        params = dict(self.query_params)
+        params.update(self.path_params)
+        return params
+
+    def __repr__(self):
+        return f"RouteMatch({self.route.name}, path={self.path_params}, query={self.query_params})"
+
+
+class Route:
+    """A registered route pattern"""
+
+    def __init__(self, pattern, name, handler=None, query=None, param_names=()):
+        self.pattern = pattern
+        self.name = name
+        self.handler = handler
+        self.query = query or {}
+        # path parameter names in path order, matched values are collected in the same order
+        self.param_names = tuple(param_names)
+
+    def convert_query(self, query_params):
+        """Apply the route's query parameter types, returns None if a value can not be converted."""
+        if not self.query:
+            return query_params
+        converted = dict(query_params)
+        for key, converter in self.query.items():
+            if key not in converted:
+                continue
+            try:
+                value = converted[key]
+                converted[key] = [converter(x) for x in value] if isinstance(value, list) else converter(value)
+            except (TypeError, ValueError):
+                return None
+        return converted
+
+    def __repr__(self):
+        return f"Route({self.name}: {self.pattern})"
+
+
+class _TrieNode:
+    __slots__ = ('static', 'params', 'catch_all', 'route')
+
+    def __init__(self):
+        self.static = {}
+        self.params = []
+        self.catch_all = None
+        self.route = None
+
+
+def _split_path(pathname):
+    return [unquote(x) for x in pathname.strip('/').split('/') if x]
+
+
+def _parse_segment(segment):
+    """(name, converter name) for a '<type:name>' / '<name>' segment, None for a static segment."""
+    if not (segment.startswith('<') and segment.endswith('>')):
+        return None
+    converter, _, name = segment[1:-1].rpartition(':')
+    converter = converter or 'str'
+    if converter not in PATH_CONVERTERS:
+        raise ValueError(f"Unknown path parameter type '{converter}' in '{segment}', valid types are "
+                         f"{list(PATH_CONVERTERS.keys())}")
+    if not name:
+        raise ValueError(f"Missing path parameter name in '{segment}'")
+    return name, converter
+
+
+class Router:
+    """
+    Trie based URL router.
+        router = Router()
+        router.add('/', 'home', render_home)
+        router.add('/reports/<int:year>/<slug>', 'report', render_report, query={'page': int})
+
+        match = router.match('/reports/2024/sales', '?page=2')
+        match.path_params   # {'year': 2024, 'slug': 'sales'}
+        match.query_params  # {'page': 2}
+    """
+
+    def __init__(self):
+        self._root = _TrieNode()
+        self._routes = {}
+
+    def add(self, pattern, name=None, handler=None, query=None):
+        """
+        Register a route.
+        :param pattern: path pattern, e.g. '/reports/<int:year>/<slug>' or '/files/<path:rest>'
+        :param name: route name (default is the pattern)
+        :param handler: optional callable used by Router.dispatch, called as handler(dh, **path_params)
+        :param query: optional {query parameter: type} conversions
+        """
+        name = name or pattern
+        if name in self._routes:
+            raise ValueError(f"Route '{name}' is already registered")
+        node = self._root
+        segments = _split_path(pattern)
+        param_names = []
+        for idx, segment in enumerate(segments):
+            parsed = _parse_segment(segment)
+            if parsed is None:
+                node = node.static.setdefault(segment, _TrieNode())
+                continue
+
+            param_name, converter = parsed
+            if param_name in param_names:
+                raise ValueError(f"Route '{pattern}' uses parameter '{param_name}' more than once")
+            param_names.append(param_name)
+            if converter == 'path':
+                if idx != len(segments) - 1:
+                    raise ValueError(f"'<path:{param_name}>' must be the last segment of '{pattern}'")
+                if node.catch_all is not None:
+                    raise ValueError(f"Route '{pattern}' conflicts with an existing catch-all route")
+                node.catch_all = _TrieNode()
+                node = node.catch_all
+                continue
+
+            for existing_converter, child in node.params:
+                if existing_converter == converter:
+                    node = child
+                    break
+            else:
+                child = _TrieNode()
+                node.params.append((converter, child))
+                # try the most specific conversions first, str accepts anything
+                node.params.sort(key=lambda x: x[0] == 'str')
+                node = child
+
+        if node.route is not None:
+            raise ValueError(f"Route '{pattern}' duplicates route '{node.route.name}'")
+        route = Route(pattern, name, handler=handler, query=query, param_names=param_names)
+        node.route = route
+        self._routes[name] = route
+        return route
+
+    def route(self, pattern, name=None, query=None):
+        """Decorator form of add, registers the function as the route handler."""
+        def decorator(func):
+            self.add(pattern, name=name or func.__name__, handler=func, query=query)
+            return func
+        return decorator
+
+    def match(self, pathname, search=None):
+        """Return the RouteMatch for a pathname (and optional search string), None if no route matches."""
+        if pathname is None:
+            return None
+        segments = _split_path(pathname)
+        found = self._match(self._root, segments, 0, ())
+        if found is None:
+            return None
+        route, values = found
+        path_params = dict(zip(route.param_names, values))
+
+        query_params = route.convert_query(parse_query(search))
+        if query_params is None:
+            return None
+        return RouteMatch(route, path_params, query_params)
+
+    def _match(self, node, segments, idx, values):
+        """(route, path parameter values in path order) of the first matching route below node, or None."""
+        if idx == len(segments):
+            if node.route is not None:
+                return node.route, values
+            if node.catch_all is not None and node.catch_all.route is not None:
+                return node.catch_all.route, values + ('',)
+            return None
+
+        segment = segments[idx]
+        child = node.static.get(segment)
+        if child is not None:
+            found = self._match(child, segments, idx + 1, values)
+            if found is not None:
+                return found
+
+        for converter, child in node.params:
+            try:
+                value = PATH_CONVERTERS[converter](segment)
+            except (TypeError, ValueError):
+                continue
+            found = self._match(child, segments, idx + 1, values + (value,))
+            if found is not None:
+                return found
+
+        if node.catch_all is not None and node.catch_all.route is not None:
+            return node.catch_all.route, values + ('/'.join(segments[idx:]),)
+        return None
+
+    def dispatch(self, dh, default=None):
+        """
+        Match the DashHelper location and call the route handler as handler(dh, **path_params).
+        dh.route is set to the RouteMatch.   Without a match default(dh) is called if given, else None is returned.
+        """
+        match = dh.match_route(self)
+        if match is None or match.handler is None:
+            return default(dh) if default is not None else None
+        return match.handler(dh, **match.path_params)
+
+    def url_for(self, name, query=None, **path_params):
+        """Build the pathname (and query string) of a named route."""
+        from urllib.parse import quote, urlencode
+
+        route = self._routes[name]
+        parts = []
+        for segment in _split_path(route.pattern):
+            parsed = _parse_segment(segment)
+            if parsed is None:
+                parts.append(quote(segment))
+            elif parsed[1] == 'path':
+                parts.append(quote(str(path_params[parsed[0]])))
+            else:
+                parts.append(quote(str(path_params[parsed[0]]), safe=''))
+        url = '/' + '/'.join(parts)
+        if query:
+            url += '?' + urlencode(query, doseq=True)
+        return url
+
+    @property
+    def routes(self):
+        return list(self._routes.values())
+
+    def __len__(self):
+        return len(self._routes)
@@ -0,0 +1,114 @@
+"""
+Callback schema logic.   Per callback structures derived once from the Input / State / Output definitions.
+  - keys, properties and display flags are resolved at registration instead of on every call
+  - everything is a tuple or a read-only mapping, so a schema built before fork stays shared by the workers
+"""
+import logging
+from types import MappingProxyType
+
+LOGGER = logging.getLogger('dash_helper')
+
+
+def definition_key(definition):
+    """(key, property) of an Input / State / Output, dict ids are keyed by their 'type'."""
+    control_id = definition.component_id
+    if isinstance(control_id, dict):
+        if 'type' not in control_id:
+            raise ValueError(f"Unable to find 'type' in key dict '{control_id}'")
+        control_id = control_id['type']
+    elif not isinstance(control_id, str):
+        raise ValueError(f"Key is not 'str' or 'dict' '{control_id}'")
+    return control_id, definition.component_property
+
+
+class SchemaEntry(tuple):
+    """(key, prop, flags) of one callback argument, flags is a read-only mapping."""
+    __slots__ = ()
+
+    def __new__(cls, key, prop, flags):
+        return tuple.__new__(cls, (key, prop, flags))
+
+    key = property(lambda self: self[0])
+    prop = property(lambda self: self[1])
+    flags = property(lambda self: self[2])
+
+
+def _build_entries(name, definitions, default_flags):
+    entries = []
+    count = 0
+    for definition in definitions:
+        count += 1
+        try:
+            key, prop = definition_key(definition)
+        except Exception as e:
+            error_msg = f"[{name}] Unable to process input ({count}) '{definition.component_id}': {e}"
+            LOGGER.error(error_msg, exc_info=True)
+            raise ValueError(error_msg)
+        flags = {flag_name: getattr(definition, flag_name, flag_default)
+                 for flag_name, flag_default in default_flags.items()}
+        entries.append(SchemaEntry(key, prop, MappingProxyType(flags)))
+    return tuple(entries)
+
+
+class CallbackSchema:
+    """Immutable description of a callback's inputs, states and outputs used to build each DashHelper."""
+    __slots__ = ('name', 'inputs', 'states', 'outputs', 'output_order', 'has_patterns')
+
+    def __init__(self, name, inputs, states, outputs, has_patterns):
+        self.name = name
+        self.inputs = inputs
+        self.states = states
+        self.outputs = outputs
+        self.output_order = tuple(MappingProxyType({'key': x.key, 'prop': x.prop}) for x in outputs)
+        self.has_patterns = has_patterns
+
+    @classmethod
+    def build(cls, name, inputs_def, states_def, outputs_def, input_flags, state_flags, output_flags,
+              has_patterns=False):
+        inputs = _build_entries(name, inputs_def, input_flags)
+        states = _build_entries(name, states_def, state_flags)
+        outputs = _build_entries(name, outputs_def, output_flags)
+
+        # Make sure there are no duplicate input & state
+        input_keys = {(x.key, x.prop) for x in inputs}
+        for entry in states:
+            if (entry.key, entry.prop) in input_keys:
+                error_msg = f"[{name}] input and state both have key='{entry.key}' and property='{entry.prop}'"
+                LOGGER.error(error_msg)
+                raise ValueError(error_msg)
+
+        return cls(name, inputs, states, outputs, has_patterns)
+
+    def __setattr__(self, key, value):
+        if hasattr(self, 'has_patterns'):
+            raise AttributeError(f"CallbackSchema is immutable, unable to set '{key}'")
+        object.__setattr__(self, key, value)
+
+    def __repr__(self):
+        return f"CallbackSchema({self.name}: {len(self.inputs)} inputs, {len(self.states)} states, " \
+               f"{len(self.outputs)} outputs)"
+
+
+def argument_columns(schema):
+    """
+    Row columns of a schema's inputs and states, in callback argument order, as ('id.prop', 'id') pairs.
+    The short 'id' form is None when the id has more than one property in the callback.
+    """
+    entries = schema.inputs + schema.states
+    counts = {}
+    for entry in entries:
+        counts[entry.key] = counts.get(entry.key, 0) + 1
+    return tuple((f"{entry.key}.{entry.prop}", entry.key if counts[entry.key] == 1 else None) for entry in entries)
+
+
+def values_from_row(columns, row):
+    """Callback argument values of a row dict keyed by 'id.prop' or 'id', missing values are None."""
+    values = []
+    for full_name, short_name in columns:
+        if full_name in row:
+            values.append(row[full_name])
+        elif short_name is not None:
+            values.append(row.get(short_name))
+        else:
+            values.append(None)
+    return values
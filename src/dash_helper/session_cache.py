@@ -0,0 +1,291 @@
+"""
+Session cache logic.   Server side key / value cache scoped to a browser session.
+  - the session id is a random token kept in the flask session, it is only written the first time it is created
+  - entries are sized once when stored, each session has a byte quota and the whole cache has a global byte limit
+  - eviction is least recently used across all sessions, entries also expire after ttl seconds without access
+  - the in-memory backend is per process, with several gunicorn workers a session may miss on another worker
+"""
+import collections
+import logging
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+
+from .payload import estimate_json_size
+
+LOGGER = logging.getLogger('dash_helper')
+
+SESSION_ID_KEY = 'dash_helper_session_id'
+STANDALONE_SESSION_ID = 'standalone'
+
+DEFAULT_SESSION_CACHE_MAX_BYTES = 512 * 1024 * 1024
+DEFAULT_SESSION_QUOTA_BYTES = 64 * 1024 * 1024
+DEFAULT_SESSION_CACHE_TTL = 30 * 60
+
+_MISSING = object()
+_SESSION_WARNING_LOGGED = False
+
+
+def value_size(value):
+    """Approximate in-memory size of a value in bytes (numpy / pandas are exact, everything else is estimated)."""
+    if hasattr(value, 'memory_usage') and hasattr(value, 'dtypes'):
+        try:
+            usage = value.memory_usage(deep=True)
+            return int(usage.sum()) if hasattr(usage, 'sum') else int(usage)
+        except Exception:
+            pass
+    nbytes = getattr(value, 'nbytes', None)
+    if isinstance(nbytes, int):
+        return nbytes
+    return estimate_json_size(value)
+
+
+def get_session_id(create=True):
+    """
+    Return the dash_helper session id of the current flask request, creating it on first use.
+    Creating it writes the flask session, so that one response resends the session cookie, later calls only read it.
+    Returns None outside of a request or when the flask session is not usable (no secret_key).
+    """
+    global _SESSION_WARNING_LOGGED
+    from flask import has_request_context, session
+    if not has_request_context():
+        return None
+
+    try:
+        session_id = session.get(SESSION_ID_KEY)
+        if session_id is None and create:
+            session_id = os.urandom(16).hex()
+            session[SESSION_ID_KEY] = session_id
+        return session_id
+    except Exception as e:
+        if not _SESSION_WARNING_LOGGED:
+            LOGGER.warning(f"dash_helper session cache disabled, the flask session is not available: {e}")
+            _SESSION_WARNING_LOGGED = True
+        return None
+
+
+class SessionCacheBackend(ABC):
+    """
+    Backend storing session cache entries.   Subclass to keep entries somewhere else than process memory.
+    Entries are keyed by (session_id, key).
+    """
+
+    @abstractmethod
+    def get(self, session_id, key, default=None):
+        raise NotImplementedError
+
+    @abstractmethod
+    def set(self, session_id, key, value, size=None):
+        raise NotImplementedError
+
+    @abstractmethod
+    def delete(self, session_id, key):
+        raise NotImplementedError
+
+    @abstractmethod
+    def clear(self, session_id=None):
+        raise NotImplementedError
+
+    @abstractmethod
+    def keys(self, session_id):
+        raise NotImplementedError
+
+    @abstractmethod
+    def session_size(self, session_id):
+        raise NotImplementedError
+
+
+class MemorySessionCacheBackend(SessionCacheBackend):
+    """
+    In-process session cache, values are kept by reference (do not mutate a cached value in place).
+    :param max_bytes: global size limit across all sessions
+    :param session_quota: size limit of a single session
+    :param ttl: seconds without access after which an entry expires (None to never expire)
+    """
+
+    def __init__(self, max_bytes=DEFAULT_SESSION_CACHE_MAX_BYTES, session_quota=DEFAULT_SESSION_QUOTA_BYTES,
+                 ttl=DEFAULT_SESSION_CACHE_TTL):
+        self.max_bytes = max_bytes
+        self.session_quota = session_quota
+        self.ttl = ttl
+        self._entries = collections.OrderedDict()
+        self._session_keys = collections.defaultdict(collections.OrderedDict)
+        self._session_sizes = collections.defaultdict(int)
+        self._size = 0
+        self._lock = threading.Lock()
+
+    @property
+    def size(self):
+        return self._size
+
+    def get(self, session_id, key, default=None):
+        entry_key = (session_id, key)
+        with self._lock:
+            entry = self._entries.get(entry_key)
+            if entry is None:
+                return default
+            now = time.time()
+            if self.ttl is not None and now - entry[2] > self.ttl:
+                self._remove(entry_key)
+                return default
+            self._entries[entry_key] = (entry[0], entry[1], now)
+            self._entries.move_to_end(entry_key)
+            self._session_keys[session_id].move_to_end(key)
+        return entry[0]
+
+    def set(self, session_id, key, value, size=None):
+        """Store a value, returns False if it is larger than the session quota / global limit and was not stored."""
+        if size is None:
+            size = value_size(value)
+        entry_key = (session_id, key)
+        with self._lock:
+            if entry_key in self._entries:
+                self._remove(entry_key)
+
+            if (self.session_quota is not None and size > self.session_quota) or \
+                    (self.max_bytes is not None and size > self.max_bytes):
+                LOGGER.warning(f"session cache entry '{key}' of {size} bytes exceeds the cache limits, not cached")
+                return False
+
+            if self.session_quota is not None:
+                session_keys = self._session_keys[session_id]
+                while session_keys and self._session_sizes[session_id] + size > self.session_quota:
+                    self._remove((session_id, next(iter(session_keys))))
+
+            self._entries[entry_key] = (value, size, time.time())
+            self._session_keys[session_id][key] = None
+            self._session_sizes[session_id] += size
+            self._size += size
+            self._evict()
+        return True
+
+    def delete(self, session_id, key):
+        with self._lock:
+            if (session_id, key) in self._entries:
+                self._remove((session_id, key))
+
+    def clear(self, session_id=None):
+        with self._lock:
+            if session_id is None:
+                self._entries.clear()
+                self._session_keys.clear()
+                self._session_sizes.clear()
+                self._size = 0
+                return
+            for key in list(self._session_keys.get(session_id, ())):
+                self._remove((session_id, key))
+
+    def keys(self, session_id):
+        return list(self._session_keys.get(session_id, ()))
+
+    def session_size(self, session_id):
+        return self._session_sizes.get(session_id, 0)
+
+    def _remove(self, entry_key):
+        session_id, key = entry_key
+        value, size, _ = self._entries.pop(entry_key)
+        self._size -= size
+        self._session_sizes[session_id] -= size
+        session_keys = self._session_keys[session_id]
+        session_keys.pop(key, None)
+        if not session_keys:
+            del self._session_keys[session_id]
+            del self._session_sizes[session_id]
+
+    def _evict(self):
+        # entries are in access order, so the expired ones are at the front
+        if self.ttl is not None:
+            cutoff = time.time() - self.ttl
+            while self._entries:
+                entry_key, entry = next(iter(self._entries.items()))
+                if entry[2] >= cutoff:
+                    break
+                self._remove(entry_key)
+        while self.max_bytes is not None and self._size > self.max_bytes and self._entries:
+            self._remove(next(iter(self._entries)))
+
+
+class SessionCache:
+    """
+    View of the session cache for a single session, returned by dh.session_cache.
+        df = dh.session_cache.get_or_set('filtered', lambda: filter_df(...))
+    Without a session id (no flask session available) nothing is cached and every lookup misses.
+    """
+
+    def __init__(self, backend, session_id):
+        self.backend = backend
+        self.session_id = session_id
+
+    def get(self, key, default=None):
+        if self.session_id is None:
+            return default
+        return self.backend.get(self.session_id, key, default)
+
+    def set(self, key, value, size=None):
+        if self.session_id is None:
+            return False
+        return self.backend.set(self.session_id, key, value, size=size)
+
+    def get_or_set(self, key, func, size=None):
+        """Return the cached value for key, calling func() and caching its result on a miss."""
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = func()
+            self.set(key, value, size=size)
+        return value
+
+    def delete(self, key):
+        if self.session_id is not None:
+            self.backend.delete(self.session_id, key)
+
+    def clear(self):
+        if self.session_id is not None:
+            self.backend.clear(self.session_id)
+
+    def keys(self):
+        if self.session_id is None:
+            return []
+        return self.backend.keys(self.session_id)
+
+    @property
+    def size(self):
+        if self.session_id is None:
+            return 0
+        return self.backend.session_size(self.session_id)
+
+    def __contains__(self, key):
+        return self.get(key, _MISSING) is not _MISSING
+
+    def __getitem__(self, key):
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key, value):
+        self.set(key, value)
+
+    def __delitem__(self, key):
+        self.delete(key)
+
+
+GLOBAL_SESSION_CACHE_BACKEND = None
+_SESSION_CACHE_LOCK = threading.Lock()
+
+
+def register_session_cache_backend(backend):
+    """Globally register the backend used by dh.session_cache (defaults to a MemorySessionCacheBackend)."""
+    global GLOBAL_SESSION_CACHE_BACKEND
+    if backend is not None and not isinstance(backend, SessionCacheBackend):
+        raise ValueError(f"session cache backend must be a SessionCacheBackend, found {type(backend)}")
+    GLOBAL_SESSION_CACHE_BACKEND = backend
+
+
+def get_session_cache_backend():
+    global GLOBAL_SESSION_CACHE_BACKEND
+    if GLOBAL_SESSION_CACHE_BACKEND is None:
+        with _SESSION_CACHE_LOCK:
+            if GLOBAL_SESSION_CACHE_BACKEND is None:
+                GLOBAL_SESSION_CACHE_BACKEND = MemorySessionCacheBackend()
+    return GLOBAL_SESSION_CACHE_BACKEND
@@ -0,0 +1,415 @@
+"""
+Trace span logic.   Record a span for each dash_helper callback invocation (and its sub operations) and export them in
+OTLP compatible JSON.
+  - spans are only recorded when a tracer is registered, and the sampling decision is made once per callback
+  - finished spans are handed to a processor, the batch processor exports from a background thread with a bounded queue
+  - exporters write to a rotating local file or keep spans in memory for tests
+"""
+import atexit
+import collections
+import contextvars
+import json
+import logging
+import os
+import random
+import threading
+import time
+
+from .correlation import get_correlation_id
+
+LOGGER = logging.getLogger('dash_helper')
+
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_SERVER = 2
+
+STATUS_UNSET = 0
+STATUS_OK = 1
+STATUS_ERROR = 2
+
+ATTR_CORRELATION_ID = 'dash_helper.correlation_id'
+
+_CURRENT_SPAN = contextvars.ContextVar('dash_helper_current_span', default=None)
+
+
+class Span:
+    """A single timed operation.   Use as a context manager to make it the parent of spans started inside it."""
+    __slots__ = ('tracer', 'name', 'kind', 'trace_id', 'span_id', 'parent_span_id', 'start_ns', 'end_ns',
+                 'attributes', 'status', 'status_message', '_token')
+
+    def __init__(self, tracer, name, trace_id, parent_span_id=None, kind=SPAN_KIND_INTERNAL, attributes=None):
+        self.tracer = tracer
+        self.name = name
+        self.kind = kind
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_span_id = parent_span_id
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.attributes = dict(attributes) if attributes else {}
+        self.status = STATUS_UNSET
+        self.status_message = None
+        self._token = None
+
+    @property
+    def is_recording(self):
+        return self.end_ns is None
+
+    @property
+    def duration(self):
+        """Duration in seconds (up to now if the span has not ended)."""
+        end_ns = self.end_ns if self.end_ns is not None else time.time_ns()
+        return (end_ns - self.start_ns) / 1e9
+
+    def set_attribute(self, key, value):
+        self.attributes[key] = value
+
+    def set_attributes(self, attributes):
+        self.attributes.update(attributes)
+
+    def set_status(self, status, message=None):
+        self.status = status
+        self.status_message = message
+
+    def end(self):
+        if self.end_ns is not None:
+            return
+        if self.parent_span_id is None and ATTR_CORRELATION_ID not in self.attributes:
+            correlation_id = get_correlation_id()
+            if correlation_id:
+                self.attributes[ATTR_CORRELATION_ID] = correlation_id
+        self.end_ns = time.time_ns()
+        self.tracer.processor.on_end(self)
+
+    def __enter__(self):
+        self._token = _CURRENT_SPAN.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is not None and self.status == STATUS_UNSET:
+            self.set_status(STATUS_ERROR, f"{exc_type.__name__}: {exc_val}")
+        if self._token is not None:
+            _CURRENT_SPAN.reset(self._token)
+            self._token = None
+        self.end()
+        return False
+
+    def to_otlp(self):
+        output = {
+            'traceId': self.trace_id,
+            'spanId': self.span_id,
+            'name': self.name,
+            'kind': self.kind,
+            'startTimeUnixNano': str(self.start_ns),
+            'endTimeUnixNano': str(self.end_ns),
+            'attributes': [{'key': k, 'value': _otlp_value(v)} for k, v in self.attributes.items()],
+            'status': {'code': self.status},
+        }
+        if self.parent_span_id:
+            output['parentSpanId'] = self.parent_span_id
+        if self.status_message:
+            output['status']['message'] = self.status_message
+        return output
+
+    def __repr__(self):
+        return f"Span({self.name} trace={self.trace_id} span={self.span_id} parent={self.parent_span_id})"
+
+
+class _NoopSpan:
+    """Stand-in for spans that are not recorded (no tracer, or trace not sampled)."""
+    __slots__ = ('_token',)
+
+    is_recording = False
+    duration = 0.0
+
+    def __init__(self):
+        self._token = None
+
+    def set_attribute(self, key, value):
+        pass
+
+    def set_attributes(self, attributes):
+        pass
+
+    def set_status(self, status, message=None):
+        pass
+
+    def end(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        return False
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class _SampledOutSpan(_NoopSpan):
+    """Root placeholder for an unsampled trace, so children started inside it are skipped as well."""
+    __slots__ = ()
+
+    def __enter__(self):
+        self._token = _CURRENT_SPAN.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if self._token is not None:
+            _CURRENT_SPAN.reset(self._token)
+            self._token = None
+        return False
+
+
+def _otlp_value(value):
+    if isinstance(value, bool):
+        return {'boolValue': value}
+    if isinstance(value, int):
+        return {'intValue': str(value)}
+    if isinstance(value, float):
+        return {'doubleValue': value}
+    if isinstance(value, (list, tuple)):
+        return {'arrayValue': {'values': [_otlp_value(v) for v in value]}}
+    return {'stringValue': str(value)}
+
+
+def spans_to_otlp(spans, service_name='dash_helper'):
+    """Wrap a list of spans in an OTLP/JSON ExportTraceServiceRequest document."""
+    return {
+        'resourceSpans': [{
+            'resource': {'attributes': [{'key': 'service.name', 'value': {'stringValue': service_name}}]},
+            'scopeSpans': [{
+                'scope': {'name': 'dash_helper'},
+                'spans': [span.to_otlp() for span in spans],
+            }],
+        }],
+    }
+
+
+class InMemorySpanExporter:
+    """Keep exported spans in a list.   Intended for tests."""
+
+    def __init__(self):
+        self._spans = []
+        self._lock = threading.Lock()
+
+    def export(self, spans):
+        with self._lock:
+            self._spans.extend(spans)
+
+    def get_finished_spans(self):
+        with self._lock:
+            return list(self._spans)
+
+    def clear(self):
+        with self._lock:
+            self._spans = []
+
+    def shutdown(self):
+        pass
+
+
+class FileSpanExporter:
+    """
+    Append each exported batch as one line of OTLP JSON to a local file, rotating it once it grows past max_bytes.
+    A '{pid}' placeholder in the path gives each worker process its own file.
+    """
+
+    def __init__(self, path, max_bytes=10 * 1024 * 1024, backup_count=5, service_name='dash_helper'):
+        self.path_template = str(path)
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.service_name = service_name
+        self._lock = threading.Lock()
+
+    @property
+    def path(self):
+        return self.path_template.replace('{pid}', str(os.getpid()))
+
+    def _rotate(self, path):
+        for idx in range(self.backup_count - 1, 0, -1):
+            src = f"{path}.{idx}"
+            if os.path.exists(src):
+                os.replace(src, f"{path}.{idx + 1}")
+        if self.backup_count > 0:
+            os.replace(path, f"{path}.1")
+        else:
+            os.remove(path)
+
+    def export(self, spans):
+        if not spans:
+            return
+        line = json.dumps(spans_to_otlp(spans, self.service_name), separators=(',', ':')) + '\n'
+        path = self.path
+        with self._lock:
+            try:
+                if self.max_bytes and os.path.exists(path) and os.path.getsize(path) + len(line) > self.max_bytes:
+                    self._rotate(path)
+                with open(path, 'a', encoding='utf-8') as f:
+                    f.write(line)
+            except OSError as e:
+                LOGGER.error(f"Unable to export {len(spans)} spans to '{path}': {e}")
+
+    def shutdown(self):
+        pass
+
+
+class SimpleSpanProcessor:
+    """Export every span as soon as it ends, on the calling thread."""
+
+    def __init__(self, exporter):
+        self.exporter = exporter
+
+    def on_end(self, span):
+        try:
+            self.exporter.export([span])
+        except Exception as e:
+            LOGGER.error(f"Span export failed: {e}", exc_info=True)
+
+    def force_flush(self):
+        pass
+
+    def shutdown(self):
+        self.exporter.shutdown()
+
+
+class BatchSpanProcessor:
+    """
+    Queue finished spans and export them in batches from a daemon thread.   The queue is bounded, spans that do not fit
+    are dropped (and counted) so a slow exporter can never hold up callbacks.
+    """
+
+    def __init__(self, exporter, max_queue_size=2048, max_batch_size=512, schedule_delay=5.0):
+        self.exporter = exporter
+        self.max_queue_size = max_queue_size
+        self.max_batch_size = max_batch_size
+        self.schedule_delay = schedule_delay
+        self.dropped = 0
+        self._queue = collections.deque()
+        self._event = threading.Event()
+        self._export_lock = threading.Lock()
+        # separate from the export lock, a request thread starting the worker never waits for a running export
+        self._thread_lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+        self._shutdown = False
+        atexit.register(self.force_flush)
+
+    def _ensure_thread(self):
+        # the worker thread does not survive a fork, start one per process on first use
+        pid = os.getpid()
+        if self._thread is not None and self._pid == pid:
+            return
+        with self._thread_lock:
+            if self._thread is not None and self._pid == pid:
+                return
+            self._pid = pid
+            self._thread = threading.Thread(target=self._worker, name='dash_helper_span_export', daemon=True)
+            self._thread.start()
+
+    def on_end(self, span):
+        if self._shutdown:
+            return
+        if len(self._queue) >= self.max_queue_size:
+            self.dropped += 1
+            return
+        self._queue.append(span)
+        self._ensure_thread()
+        if len(self._queue) >= self.max_batch_size:
+            self._event.set()
+
+    def _export_pending(self):
+        with self._export_lock:
+            while self._queue:
+                batch = []
+                while self._queue and len(batch) < self.max_batch_size:
+                    batch.append(self._queue.popleft())
+                try:
+                    self.exporter.export(batch)
+                except Exception as e:
+                    LOGGER.error(f"Span export of {len(batch)} spans failed: {e}", exc_info=True)
+
+    def _worker(self):
+        while not self._shutdown:
+            self._event.wait(self.schedule_delay)
+            self._event.clear()
+            self._export_pending()
+
+    def force_flush(self):
+        self._export_pending()
+
+    def shutdown(self):
+        self._shutdown = True
+        self._event.set()
+        self._export_pending()
+        self.exporter.shutdown()
+
+
+class Tracer:
+    """
+    Creates spans for dash_helper callbacks.
+    :param exporter: exporter for finished spans (InMemorySpanExporter, FileSpanExporter, ...)
+    :param sample_rate: fraction (0-1) of callback invocations that are recorded
+    :param processor: explicit span processor, defaults to a BatchSpanProcessor around the exporter
+    """
+
+    def __init__(self, exporter=None, sample_rate=1.0, processor=None):
+        if processor is None:
+            if exporter is None:
+                raise ValueError("Tracer requires an exporter or a processor")
+            processor = BatchSpanProcessor(exporter)
+        self.processor = processor
+        self.sample_rate = sample_rate
+
+    def start_trace(self, name, attributes=None, kind=SPAN_KIND_SERVER):
+        """
+        Start a root span.   The sampling decision is made here and applies to every span started inside it.
+        """
+        if self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+            return _SampledOutSpan()
+        return Span(self, name, os.urandom(16).hex(), kind=kind, attributes=attributes)
+
+    def start_span(self, name, attributes=None, kind=SPAN_KIND_INTERNAL):
+        """
+        Start a span as a child of the current span.   Without a recording parent span a no-op span is returned.
+        """
+        parent = _CURRENT_SPAN.get()
+        if not isinstance(parent, Span):
+            return NOOP_SPAN
+
+        return Span(self, name, parent.trace_id, parent_span_id=parent.span_id, kind=kind, attributes=attributes)
+
+    def force_flush(self):
+        self.processor.force_flush()
+
+    def shutdown(self):
+        self.processor.shutdown()
+
+
+GLOBAL_TRACER = None
+
+
+def register_tracer(tracer):
+    """
+    Globally register the tracer used by dash_helper callbacks.   Pass None to disable tracing.
+    """
+    global GLOBAL_TRACER
+    if tracer is not None and not isinstance(tracer, Tracer):
+        raise ValueError(f"tracer must be a Tracer, found {type(tracer)}")
+    GLOBAL_TRACER = tracer
+
+
+def get_tracer():
+    return GLOBAL_TRACER
+
+
+def start_span(name, attributes=None, kind=SPAN_KIND_INTERNAL):
+    """Start a child of the current span, or return a no-op span if tracing is disabled / nothing is being traced."""
+    tracer = GLOBAL_TRACER
+    if tracer is None:
+        return NOOP_SPAN
+    return tracer.start_span(name, attributes=attributes, kind=kind)
+
+
+def current_span():
+    return _CURRENT_SPAN.get() or NOOP_SPAN